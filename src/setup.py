@@ -34,7 +34,12 @@ setup(
         'spaceone-api',
         'google-auth',
         'google-api-python-client',
+        'requests',
         'schematics'
     ],
+    extras_require={
+        # asyncio serving mode: python -m spaceone.monitoring.aio_server
+        'aio': ['aiohttp']
+    },
     zip_safe=False,
 )
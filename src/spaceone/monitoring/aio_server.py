@@ -0,0 +1,195 @@
+""" asyncio (grpc.aio) serving mode
+
+The default server started by `spaceone grpc spaceone.monitoring` runs every RPC
+on a gRPC worker thread for its whole duration, so concurrency is capped by that
+thread pool (MAX_WORKERS). This server accepts RPCs on the event loop instead.
+
+RPCs that a servicer declares in async_methods (Metric.get_data) are awaited on
+the loop: their Monitoring API calls go through aiohttp
+(google_cloud_connector.aio_transport), so a get_data waiting for Google holds
+no thread. The other RPCs run the blocking service code on a separate executor
+(AIO_SERVER.max_workers).
+
+Server-streaming RPCs that a servicer declares in stream_methods (e.g.
+Metric.stream_data, see spaceone.monitoring.streaming) are registered here
+too, as on the default server.
+
+    python -m spaceone.monitoring.aio_server -p 50051
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import grpc
+
+from spaceone.core import config
+from spaceone.monitoring import instrumentation
+from spaceone.monitoring.conf.proto_conf import PROTO
+from spaceone.monitoring.streaming import add_stream_handlers, get_servicer_base
+
+__all__ = ['AsyncServicer', 'create_server', 'serve']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 200
+DEFAULT_MAX_CONCURRENT_RPCS = 1000
+
+
+class _Abort(Exception):
+    pass
+
+
+_END_OF_STREAM = object()
+
+
+class _ContextAdapter(object):
+    """ Gives the servicer code a sync view of a grpc.aio context
+
+    In grpc.aio abort() is a coroutine. BaseAPI._error_method cannot await it, so
+    the call is recorded here and replayed on the event loop by AsyncServicer.
+    """
+
+    def __init__(self, context):
+        self._context = context
+        self.aborted = None
+
+    def abort(self, code, details=''):
+        self.aborted = (code, details)
+        raise _Abort(details)
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+
+class AsyncServicer(object):
+    """ Exposes every unary RPC of a BaseAPI servicer as a coroutine
+
+    An RPC in the async_methods of the servicer ({RPC: coroutine method}) is
+    awaited, the others run on the executor.
+    """
+
+    def __init__(self, servicer, executor):
+        self._servicer = servicer
+        self._executor = executor
+
+    def __getattr__(self, name):
+        async_method_name = getattr(self._servicer, 'async_methods', {}).get(name)
+        if async_method_name:
+            return self._await(name, getattr(self._servicer, async_method_name))
+
+        method = getattr(self._servicer, name)
+
+        async def _call(request, context):
+            loop = asyncio.get_running_loop()
+            context_adapter = _ContextAdapter(context)
+
+            try:
+                return await loop.run_in_executor(self._executor, method, request, context_adapter)
+            except _Abort:
+                await context.abort(*context_adapter.aborted)
+
+        return _call
+
+    def _await(self, name, method):
+        """ The coroutine method is not wrapped by BaseAPI._grpc_method, so api_info and errors are handled here
+        """
+        async def _call(request, context):
+            context_adapter = _ContextAdapter(context)
+            context_adapter.api_info = {
+                'service': config.get_service(),
+                'resource': self._servicer.__class__.__name__,
+                'verb': name
+            }
+
+            try:
+                return await method(request, context_adapter)
+            except Exception as e:
+                try:
+                    self._servicer._error_method(e, context_adapter)
+                except _Abort:
+                    pass
+                await context.abort(*context_adapter.aborted)
+
+        return _call
+
+    def stream(self, name):
+        """ Same as a unary RPC, but the responses of the sync generator are pulled one at a time
+
+        The next response is only produced after the previous one was written, so
+        gRPC flow control is passed down to the generator.
+        """
+        method = getattr(self._servicer, name)
+
+        async def _call(request, context):
+            loop = asyncio.get_running_loop()
+            context_adapter = _ContextAdapter(context)
+            responses = None
+
+            try:
+                responses = await loop.run_in_executor(self._executor, method, request, context_adapter)
+                while True:
+                    response = await loop.run_in_executor(self._executor, next, responses, _END_OF_STREAM)
+                    if response is _END_OF_STREAM:
+                        break
+                    yield response
+            except _Abort:
+                await context.abort(*context_adapter.aborted)
+            finally:
+                if responses is not None:
+                    await loop.run_in_executor(self._executor, responses.close)
+
+        return _call
+
+
+def create_server(port, max_workers=None, max_concurrent_rpcs=None):
+    aio_conf = config.get_global('AIO_SERVER', {})
+    max_workers = max_workers or aio_conf.get('max_workers', DEFAULT_MAX_WORKERS)
+    max_concurrent_rpcs = max_concurrent_rpcs or aio_conf.get('max_concurrent_rpcs', DEFAULT_MAX_CONCURRENT_RPCS)
+
+    server = grpc.aio.server(maximum_concurrent_rpcs=max_concurrent_rpcs)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aio-servicer')
+
+    for module_name, api_class_names in PROTO.items():
+        module = importlib.import_module(module_name)
+        for api_class_name in api_class_names:
+            api_class = getattr(module, api_class_name)
+            servicer_base = get_servicer_base(api_class)
+            add_servicer = getattr(api_class.pb2_grpc, f'add_{servicer_base.__name__}_to_server')
+            async_servicer = AsyncServicer(api_class(), executor)
+            add_servicer(async_servicer, server)
+            add_stream_handlers(server, api_class, async_servicer, async_servicer.stream)
+            _LOGGER.debug(f'[create_server] {module_name}.{api_class_name} is registered')
+
+    server.add_insecure_port(f'[::]:{port}')
+    return server
+
+
+async def serve(port, max_workers=None, max_concurrent_rpcs=None):
+    server = create_server(port, max_workers, max_concurrent_rpcs)
+    await server.start()
+
+    metrics_port = config.get_global('INSTRUMENTATION', {}).get('metrics_port')
+    if metrics_port:
+        instrumentation.start_metrics_server(metrics_port)
+
+    _LOGGER.info(f'[serve] asyncio gRPC server is listening on port {port}')
+    await server.wait_for_termination()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the plugin with the asyncio gRPC server')
+    parser.add_argument('-p', '--port', type=int, default=50051)
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--max-concurrent-rpcs', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config.init_conf(package='spaceone.monitoring', server_type='grpc', port=args.port)
+    config.set_service_config()
+    asyncio.run(serve(args.port, args.max_workers, args.max_concurrent_rpcs))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,100 @@
+import json
+
 from spaceone.api.monitoring.plugin import metric_pb2, metric_pb2_grpc
-from spaceone.core.pygrpc import BaseAPI
+from spaceone.monitoring.model.metric_frame import MetricFrame
+from spaceone.monitoring.streaming import StreamingAPI
+
+# Partial results (failed resources or projects) are reported in this trailing metadata key as JSON:
+# [{'name', 'status', 'message', 'count', 'cloud_service_ids'}, ..., {'omitted': count}] grouped by the first three.
+# gRPC fails the whole RPC when its metadata is over 16 KB, so the value is kept within MAX_PARTIAL_ERRORS_BYTES.
+PARTIAL_ERRORS_KEY = 'partial-errors'
+MAX_PARTIAL_ERRORS_BYTES = 8192
+MAX_PARTIAL_ERROR_IDS = 20
 
 
-class Metric(BaseAPI, metric_pb2_grpc.MetricServicer):
+class Metric(StreamingAPI, metric_pb2_grpc.MetricServicer):
 
     pb2 = metric_pb2
     pb2_grpc = metric_pb2_grpc
+    # Server-streaming RPCs not in the spaceone-api proto yet: method -> RPC whose messages it reuses
+    # (see spaceone.monitoring.streaming)
+    stream_methods = {
+        'stream_data': 'get_data'
+    }
+    # RPCs that the aio server (spaceone.monitoring.aio_server) awaits on its event loop: RPC -> coroutine method
+    async_methods = {
+        'get_data': 'get_data_async'
+    }
 
     def list(self, request, context):
         params, metadata = self.parse_request(request, context)
 
         with self.locator.get_service('MetricService', metadata) as metric_service:
-            return self.locator.get_info('MetricsInfo', metric_service.list(params))
+            metrics_info = metric_service.list(params)
+            self._set_partial_errors(context, metrics_info)
+            return self.locator.get_info('MetricsInfo', metrics_info)
 
     def get_data(self, request, context):
         params, metadata = self.parse_request(request, context)
 
         with self.locator.get_service('MetricService', metadata) as metric_service:
-            return self.locator.get_info('MetricDataInfo', metric_service.get_data(params))
+            metric_data_info = metric_service.get_data(params)
+            self._set_partial_errors(context, metric_data_info)
+            return self.locator.get_info('MetricDataInfo', metric_data_info)
+
+    async def get_data_async(self, request, context):
+        params, metadata = self.parse_request(request, context)
+
+        with self.locator.get_service('MetricService', metadata) as metric_service:
+            metric_data_info = await metric_service.get_data_async(params)
+            self._set_partial_errors(context, metric_data_info)
+            return self.locator.get_info('MetricDataInfo', metric_data_info)
+
+    def stream_data(self, request, context):
+        params, metadata = self.parse_request(request, context)
+
+        with self.locator.get_service('MetricService', metadata) as metric_service:
+            for metric_data_info in metric_service.stream_data(params):
+                yield self.locator.get_info('MetricDataInfo', metric_data_info)
+
+    @staticmethod
+    def _set_partial_errors(context, response):
+        errors = response.errors if isinstance(response, MetricFrame) else response.get('errors')
+        if errors and context is not None:
+            context.set_trailing_metadata(((PARTIAL_ERRORS_KEY, _make_partial_errors(errors)),))
+
+
+def _make_partial_errors(errors, max_bytes=MAX_PARTIAL_ERRORS_BYTES):
+    """ One entry per failed unit or project (same name, status and message), at most max_bytes of JSON
+    """
+    groups = {}
+    for error in errors:
+        key = (error.get('name'), error.get('status'), error.get('message'))
+        if key not in groups:
+            groups[key] = {'name': key[0], 'status': key[1], 'message': key[2], 'count': 0}
+
+        group = groups[key]
+        group['count'] += 1
+        if 'cloud_service_id' in error:
+            cloud_service_ids = group.setdefault('cloud_service_ids', [])
+            if len(cloud_service_ids) < MAX_PARTIAL_ERROR_IDS:
+                cloud_service_ids.append(error['cloud_service_id'])
+
+    # Leave room for the omitted entry; ensure_ascii keeps one byte per character
+    budget = max_bytes - len(json.dumps({'omitted': len(errors)})) - 4
+    entries = []
+    size = 2
+    omitted = 0
+    for group in groups.values():
+        entry = json.dumps(group)
+        if size + len(entry) + 2 > budget:
+            omitted += group['count']
+            continue
+
+        entries.append(entry)
+        size += len(entry) + 2
+
+    if omitted:
+        entries.append(json.dumps({'omitted': omitted}))
+
+    return '[' + ', '.join(entries) + ']'
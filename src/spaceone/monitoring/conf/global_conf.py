@@ -1,5 +1,86 @@
 CONNECTORS = {
-    'GoogleCloudConnector': {}
+    'GoogleCloudConnector': {
+        'client_pool': {
+            'max_size': 32,
+            'ttl': 3600
+        },
+        # 'requests': one pooled keep-alive session shared by all threads
+        # 'httplib2': one httplib2.Http per thread
+        # verify_ssl: False skips TLS certificate verification of the 'requests' transport (e.g. an intercepting
+        #             HTTPS_PROXY), it stays on by default, with or without a proxy
+        # The aio serving mode sends its get_data calls through aiohttp with the same pool_size, pool_block,
+        # keep_alive, timeout and verify_ssl
+        'transport': {
+            'type': 'requests',
+            'pool_size': 32,
+            'pool_block': False,
+            'keep_alive': True,
+            'timeout': 60,
+            'verify_ssl': True
+        },
+        # Build clients from the pinned Monitoring v3 discovery document
+        'static_discovery': True,
+        'max_in_flight': 10,
+        # Per project: token bucket (calls per second), AIMD concurrency (max: max_in_flight)
+        # and retries of 429/503 with jittered exponential backoff or Retry-After
+        'rate_limit': {
+            'enabled': True,
+            'rate': 100,
+            'burst': 100,
+            'min_concurrency': 1,
+            'max_retries': 5,
+            'backoff_base': 0.5,
+            'backoff_max': 32,
+            # Limiters of projects idle for idle_ttl seconds, or beyond max_projects, are dropped
+            'max_projects': 1024,
+            'idle_ttl': 3600
+        },
+        'query_planner': {
+            'enabled': True,
+            'max_filter_length': 2048,
+            'max_batch_size': 100
+        },
+        'pagination': {
+            'page_size': None,
+            'max_series': None,
+            'max_points': None
+        },
+        'metric_catalog': {
+            'enabled': True,
+            'ttl': 3600,
+            'max_stale': 86400,
+            'cache_dir': None
+        },
+        'time_series_cache': {
+            'enabled': True,
+            'max_entries': 256,
+            'max_points': 200000,
+            'settle_seconds': 300,
+            # SQLite file of closed buckets, kept across restarts
+            'store': {
+                'enabled': False,
+                'path': None,
+                'max_points': 10000000,
+                'max_age': 7776000,
+                'compact_interval': 3600
+            }
+        },
+        # options.aggregation sends every resource in one request, so it gets a longer filter
+        'aggregation': {
+            'max_filter_length': 16384
+        },
+        # Resources of several projects (or Metric.list with options.projects): projects fetched at
+        # the same time, and seconds after which a project is reported as failed instead of awaited
+        'fan_out': {
+            'max_projects': 16,
+            'project_timeout': 30
+        },
+        # options.query_backend = 'mql': resources per timeSeries.query
+        'mql': {
+            'max_query_length': 8192,
+            'max_batch_size': 500
+        }
+    }
 }
 
 LOG = {
@@ -21,4 +102,47 @@ LOG = {
             }
         }
     }
-}
\ No newline at end of file
+}
+
+# strict: validate Metric.list responses with the schematics models (slow, for tests)
+RESPONSE_MODEL = {
+    'strict': False
+}
+
+# Points per series when get_data has no period (options.max_points overrides it)
+PERIOD_PLANNER = {
+    'max_points': 60
+}
+
+# wait_timeout: seconds a get_data call waits for an identical call in flight before calling Google itself
+SINGLE_FLIGHT = {
+    'enabled': True,
+    'wait_timeout': 60
+}
+
+# get_data puts the series of every resource on one grid of the alignment period.
+# fill: value of a bucket without a point, 'null' | 'zero' | 'previous' (options.fill overrides it),
+#       None keeps the points as they are
+ALIGNMENT = {
+    'fill': 'null'
+}
+
+# metrics_port: serve OpenMetrics text on http://<host>:<metrics_port>/metrics
+# profile_enabled: honor options.profile of get_data (any client could turn cProfile on otherwise)
+# profile_dir: where get_data with options.profile writes its cProfile stats (only logged when None)
+INSTRUMENTATION = {
+    'metrics_port': None,
+    'profile_enabled': False,
+    'profile_dir': None
+}
+
+# Thread pool of the gRPC server (`spaceone grpc`, spaceone-core default: 100). Every RPC holds a worker
+# while it waits for Google, so this caps the concurrent get_data calls.
+MAX_WORKERS = 200
+
+# Used by the asyncio serving mode (python -m spaceone.monitoring.aio_server), which awaits Google in
+# Metric.get_data on its event loop. max_workers: thread pool of the other RPCs (list, stream_data, ...)
+AIO_SERVER = {
+    'max_workers': 200,
+    'max_concurrent_rpcs': 1000
+}
@@ -1,7 +1,7 @@
+import asyncio
 import logging
 import os
 
-import google.oauth2.service_account
 import googleapiclient
 import googleapiclient.discovery
 import httplib2
@@ -9,6 +9,24 @@ import socks
 from google_auth_httplib2 import AuthorizedHttp
 
 from spaceone.core.connector import BaseConnector
+from spaceone.monitoring import instrumentation
+from spaceone.monitoring.error import *
+from spaceone.monitoring.connector.google_cloud_connector.client_pool import (
+    ClientPool,
+    ThreadLocalHttp,
+    ThreadSafeCredentials,
+    make_pool_key,
+)
+from spaceone.monitoring.connector.google_cloud_connector.discovery_document import (
+    MONITORING_V3,
+)
+from spaceone.monitoring.connector.google_cloud_connector.http_transport import (
+    PooledHttp,
+)
+from spaceone.monitoring.connector.google_cloud_connector.rate_limiter import (
+    get_rate_limiter_pool_stats,
+    get_rate_limiter_stats,
+)
 from spaceone.monitoring.connector.google_cloud_connector.google_cloud_monitoring import (
     GoogleCloudMonitoring,
 )
@@ -16,11 +34,25 @@ from spaceone.monitoring.connector.google_cloud_connector.google_cloud_monitorin
 __all__ = ["GoogleCloudConnector"]
 _LOGGER = logging.getLogger(__name__)
 
+_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+_CLIENT_POOL = ClientPool()
+# aio_transport.AsyncHttp per credentials, for the aio serving mode
+_AIO_HTTP_POOL = ClientPool()
+
+instrumentation.register_collector("client_pool", _CLIENT_POOL.stats)
+instrumentation.register_collector("aio_http_pool", _AIO_HTTP_POOL.stats)
+instrumentation.register_collector(
+    "rate_limiter", get_rate_limiter_stats, label="project"
+)
+instrumentation.register_collector("rate_limiter_pool", get_rate_limiter_pool_stats)
+
 
 class GoogleCloudConnector(BaseConnector):
     def __init__(self, *args, **kwargs):
         self.client = None
+        self.aio_http = None
         self.project_id = None
+        self.pool_key = None
         super().__init__(*args, **kwargs)
 
     def set_connect(self, schema, options: dict, secret_data: dict):
@@ -30,56 +62,157 @@ class GoogleCloudConnector(BaseConnector):
             - project_id: ...
             - token_uri: ...
             - ...
+
+        Clients are pooled per credentials and proxy setting, so repeated calls
+        with the same secret_data reuse a warm client instead of rebuilding it.
         """
         try:
-            google_client_service = "monitoring"
-            version = "v3"
+            with instrumentation.span("set_connect"):
+                self.project_id = secret_data.get("project_id")
+                https_proxy = self._get_https_proxy()
 
-            self.project_id = secret_data.get("project_id")
-            credentials = (
-                google.oauth2.service_account.Credentials.from_service_account_info(
-                    secret_data
-                )
-            )
-            proxy_http = self._create_http_client()
-            if proxy_http:
-                _LOGGER.info(
-                    f"** Using proxy in environment variable HTTPS_PROXY/https_proxy: {proxy_http}"
-                )
-                self.client = googleapiclient.discovery.build(
-                    google_client_service,
-                    version,
-                    http=AuthorizedHttp(
-                        credentials.with_scopes(
-                            [
-                                "https://www.googleapis.com/auth/cloud-platform"
-                            ]  # FOR PROXY SCOPE SUPPORT
-                        ),
-                        http=proxy_http,
+                self.pool_key = make_pool_key(secret_data, https_proxy)
+
+                _CLIENT_POOL.configure(**self._get_client_pool_conf())
+                self.client = _CLIENT_POOL.get(
+                    self.pool_key,
+                    lambda: self._build_client(
+                        secret_data,
+                        self._get_transport_conf(),
+                        (self.config or {}).get("static_discovery", True),
                     ),
                 )
-            else:
-                self.client = googleapiclient.discovery.build(
-                    google_client_service,
-                    version,
-                    credentials=credentials,
-                )
         except Exception as e:
-            print(e)
-            raise self.client(
-                message="connection failed. Please check your authentication information."
+            _LOGGER.error(f"[set_connect] connection failed: {e}", exc_info=True)
+            raise ERROR_INVALID_CREDENTIALS()
+
+    async def set_connect_async(self, schema, options: dict, secret_data: dict):
+        """
+        set_connect() and the asyncio transport of the same credentials, for the
+        *_async calls of the aio serving mode. Building a client may fetch the
+        discovery document, so set_connect() runs off the event loop.
+        """
+        await asyncio.to_thread(self.set_connect, schema, options, secret_data)
+
+        try:
+            _AIO_HTTP_POOL.configure(**self._get_client_pool_conf())
+            self.aio_http = _AIO_HTTP_POOL.get(
+                self.pool_key,
+                lambda: self._build_aio_http(secret_data, self._get_transport_conf()),
             )
+        except Exception as e:
+            _LOGGER.error(f"[set_connect_async] connection failed: {e}", exc_info=True)
+            raise ERROR_INVALID_CREDENTIALS()
 
     def list_metrics(self, *args, **kwargs):
-        monitoring = GoogleCloudMonitoring(self.client, self.project_id)
+        monitoring = GoogleCloudMonitoring(
+            self.client, self.project_id, self.config, self.pool_key
+        )
         return monitoring.list_metrics(*args, **kwargs)
 
     def get_metric_data(self, *args, **kwargs):
-        monitoring = GoogleCloudMonitoring(self.client, self.project_id)
+        monitoring = GoogleCloudMonitoring(
+            self.client, self.project_id, self.config, self.pool_key
+        )
         return monitoring.get_metric_data(*args, **kwargs)
 
-    def _create_http_client(self):
-        https_proxy = os.environ.get("HTTPS_PROXY") or os.environ.get("https_proxy")
+    async def get_metric_data_async(self, *args, **kwargs):
+        monitoring = GoogleCloudMonitoring(
+            self.client, self.project_id, self.config, self.pool_key, self.aio_http
+        )
+        return await monitoring.get_metric_data_async(*args, **kwargs)
+
+    def iter_metric_data(self, *args, **kwargs):
+        monitoring = GoogleCloudMonitoring(
+            self.client, self.project_id, self.config, self.pool_key
+        )
+        return monitoring.iter_metric_data(*args, **kwargs)
+
+    @staticmethod
+    def get_client_pool_stats():
+        return _CLIENT_POOL.stats()
+
+    @staticmethod
+    def get_rate_limiter_stats():
+        return get_rate_limiter_stats()
+
+    def _get_client_pool_conf(self):
+        return (self.config or {}).get("client_pool", {})
+
+    def _get_transport_conf(self):
+        return (self.config or {}).get("transport", {})
+
+    @staticmethod
+    def _build_credentials(secret_data):
+        return ThreadSafeCredentials.from_service_account_info(secret_data).with_scopes(
+            _SCOPES
+        )
+
+    @staticmethod
+    def _build_client(secret_data, transport_conf=None, static_discovery=True):
+        transport_conf = transport_conf or {}
+        credentials = GoogleCloudConnector._build_credentials(secret_data)
+
+        if transport_conf.get("type", "requests") == "requests":
+            http = PooledHttp(
+                credentials,
+                pool_size=transport_conf.get("pool_size", 32),
+                pool_block=transport_conf.get("pool_block", False),
+                keep_alive=transport_conf.get("keep_alive", True),
+                timeout=transport_conf.get("timeout", 60),
+                https_proxy=GoogleCloudConnector._get_https_proxy(),
+                verify_ssl=transport_conf.get("verify_ssl", True),
+            )
+            return GoogleCloudConnector._build_service(http, static_discovery)
+
+        def _create_authorized_http():
+            return AuthorizedHttp(
+                credentials,
+                http=GoogleCloudConnector._create_http_client() or httplib2.Http(),
+            )
+
+        return GoogleCloudConnector._build_service(
+            ThreadLocalHttp(_create_authorized_http), static_discovery
+        )
+
+    @staticmethod
+    def _build_aio_http(secret_data, transport_conf=None):
+        # aiohttp is only required by the aio serving mode
+        from spaceone.monitoring.connector.google_cloud_connector.aio_transport import (
+            AsyncHttp,
+        )
+
+        transport_conf = transport_conf or {}
+        return AsyncHttp(
+            GoogleCloudConnector._build_credentials(secret_data),
+            pool_size=transport_conf.get("pool_size", 32),
+            pool_block=transport_conf.get("pool_block", False),
+            keep_alive=transport_conf.get("keep_alive", True),
+            timeout=transport_conf.get("timeout", 60),
+            https_proxy=GoogleCloudConnector._get_https_proxy(),
+            verify_ssl=transport_conf.get("verify_ssl", True),
+        )
+
+    @staticmethod
+    def _build_service(http, static_discovery=True):
+        """
+        The pinned discovery document avoids fetching and parsing the full
+        Monitoring v3 document on every client build
+        """
+        if static_discovery:
+            return googleapiclient.discovery.build_from_document(
+                MONITORING_V3, http=http
+            )
+
+        return googleapiclient.discovery.build("monitoring", "v3", http=http)
+
+    @staticmethod
+    def _get_https_proxy():
+        return os.environ.get("HTTPS_PROXY") or os.environ.get("https_proxy")
+
+    @staticmethod
+    def _create_http_client():
+        https_proxy = GoogleCloudConnector._get_https_proxy()
 
         if https_proxy:
             _LOGGER.info(
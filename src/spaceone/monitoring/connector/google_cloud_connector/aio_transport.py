@@ -0,0 +1,126 @@
+""" asyncio transport of the Monitoring REST calls, for the aio serving mode (spaceone.monitoring.aio_server)
+
+The discovery client still builds every request (URI, query parameters,
+body) and parses the response, only the HTTP round trip is awaited on the
+event loop through an aiohttp session. A get_data waiting for Google holds
+no thread.
+
+aiohttp is only needed by the aio serving mode, this module is imported when
+the first asynchronous call is made.
+"""
+
+import asyncio
+import logging
+import urllib.parse
+
+import aiohttp
+import httplib2
+from google.auth.transport.requests import Request
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MAX_URI_LENGTH
+
+__all__ = ['AsyncHttp']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = 60
+
+
+class AsyncHttp(object):
+    """ Async counterpart of PooledHttp: request() returns the same httplib2 style (response, content) pair
+
+    An aiohttp session belongs to the event loop it was opened on, so one is
+    opened per loop (the server has a single loop). As with PooledHttp,
+    pool_size only bounds the open connections when pool_block is set.
+    """
+
+    def __init__(self, credentials, pool_size=DEFAULT_POOL_SIZE, pool_block=False, keep_alive=True,
+                 timeout=DEFAULT_TIMEOUT, https_proxy=None, verify_ssl=True):
+        self.credentials = credentials
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.timeout = timeout
+        self._keep_alive = keep_alive
+        self._https_proxy = https_proxy
+        self._verify_ssl = verify_ssl
+        self._session = None
+        self._loop = None
+
+        if https_proxy:
+            _LOGGER.info(f'** Using proxy in environment variable HTTPS_PROXY/https_proxy: {https_proxy}')
+
+        if not verify_ssl:
+            _LOGGER.warning('** TLS certificate verification is disabled (transport.verify_ssl = False)')
+
+    async def request(self, uri, method='GET', body=None, headers=None):
+        headers = dict(headers or {})
+        await self._authorize(headers)
+
+        async with self._get_session().request(method, uri, data=body, headers=headers, proxy=self._https_proxy,
+                                               ssl=None if self._verify_ssl else False) as response:
+            content = await response.read()
+
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info['status'] = str(response.status)
+        http_response = httplib2.Response(info)
+        http_response.reason = response.reason
+
+        return http_response, content
+
+    async def execute(self, http_request):
+        """ HttpRequest.execute() of a request built by the discovery client, with the round trip awaited
+
+        Like execute(), a GET whose URI is too long (e.g. a long one_of() filter)
+        is sent as a POST with the parameters in the body.
+        """
+        uri, method, body = http_request.uri, http_request.method, http_request.body
+        headers = dict(http_request.headers)
+
+        if len(uri) > MAX_URI_LENGTH and method == 'GET':
+            parsed = urllib.parse.urlparse(uri)
+            uri = urllib.parse.urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, None, None))
+            method = 'POST'
+            body = parsed.query
+            headers.update({'x-http-method-override': 'GET', 'content-type': 'application/x-www-form-urlencoded'})
+
+        # aiohttp sets content-length from the body it sends
+        headers.pop('content-length', None)
+
+        response, content = await self.request(uri, method, body, headers)
+        if response.status >= 300:
+            raise HttpError(response, content, uri=uri)
+
+        return http_request.postproc(response, content)
+
+    def close(self):
+        """ Safe from any thread (ClientPool closes evicted entries), the session is closed on its own loop
+        """
+        session, loop = self._session, self._loop
+        self._session = self._loop = None
+
+        if session is None or session.closed or loop.is_closed():
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        except RuntimeError as e:
+            _LOGGER.debug(f'[AsyncHttp] session of a stopped loop is not closed: {e}')
+
+    async def _authorize(self, headers):
+        if not self.credentials.valid:
+            # google-auth only refreshes synchronously, the token then serves until it expires
+            await asyncio.to_thread(self.credentials.refresh, Request())
+        self.credentials.apply(headers)
+
+    def _get_session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self.close()
+            connector = aiohttp.TCPConnector(limit=self.pool_size if self.pool_block else 0,
+                                             force_close=not self._keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._loop = loop
+
+        return self._session
+
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import google.oauth2.service_account
+
+__all__ = ['ClientPool', 'ThreadLocalHttp', 'ThreadSafeCredentials', 'make_pool_key']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 32
+DEFAULT_TTL = 3600
+
+
+def make_pool_key(secret_data, https_proxy=None):
+    """ Hash of the credentials and proxy setting, so raw secrets are never kept as dict keys
+    """
+    payload = json.dumps(secret_data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{payload}|{https_proxy or ""}'.encode('utf-8')).hexdigest()
+
+
+class ThreadSafeCredentials(google.oauth2.service_account.Credentials):
+    """ Service account credentials whose token refresh is serialized
+
+    A pooled client is shared by every worker thread, so only the first thread
+    that sees an expired token goes to the token endpoint. The others wait and
+    reuse the refreshed token.
+    """
+
+    def refresh(self, request):
+        with self._get_refresh_lock():
+            if self.valid:
+                return
+            super().refresh(request)
+
+    def _get_refresh_lock(self):
+        return self.__dict__.setdefault('_refresh_lock', threading.Lock())
+
+
+class ThreadLocalHttp(object):
+    """ httplib2.Http is not thread-safe, so each thread gets its own authorized instance
+
+    The instance is kept for the lifetime of the thread, which keeps its
+    connection to googleapis.com warm between requests.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+        self._instances = []
+        self._lock = threading.Lock()
+
+    def request(self, *args, **kwargs):
+        return self._get_http().request(*args, **kwargs)
+
+    def close(self):
+        """ Closes the instances of every thread, not only the calling one
+        """
+        with self._lock:
+            instances, self._instances = self._instances, []
+
+        for http in instances:
+            http.close()
+
+    def _get_http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = self._factory()
+            with self._lock:
+                self._instances.append(http)
+        return http
+
+    def __getattr__(self, name):
+        return getattr(self._get_http(), name)
+
+
+class ClientPool(object):
+    """ Process-wide LRU pool of Cloud Monitoring clients with TTL expiry
+
+    Evicted clients are closed, which releases the pooled connections of their
+    transport. A thread still holding one can keep using it, its transport
+    opens new connections.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def configure(self, max_size=None, ttl=None):
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            evicted_clients = self._evict_overflow()
+
+        self._close_clients(evicted_clients)
+
+    def get(self, key, factory):
+        client = self._lookup(key)
+        if client is not None:
+            return client
+
+        # Only one thread builds the client for a given key, the others wait for it
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        try:
+            with build_lock:
+                client = self._lookup(key, count=False)
+                if client is not None:
+                    return client
+
+                client = factory()
+
+                with self._lock:
+                    self._entries[key] = {
+                        'client': client,
+                        'created_at': time.monotonic()
+                    }
+                    evicted_clients = self._evict_overflow()
+        finally:
+            # Also when factory() raises, so a failing key does not leave its lock behind
+            with self._lock:
+                if self._build_locks.get(key) is build_lock:
+                    del self._build_locks[key]
+
+        self._close_clients(evicted_clients)
+        return client
+
+    def clear(self):
+        with self._lock:
+            evicted_clients = [entry['client'] for entry in self._entries.values()]
+            self._entries.clear()
+
+        self._close_clients(evicted_clients)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def _lookup(self, key, count=True):
+        expired_entry = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() - entry['created_at'] < self.ttl:
+                    self._entries.move_to_end(key)
+                    if count:
+                        self.hits += 1
+                    return entry['client']
+
+                expired_entry = self._entries.pop(key)
+                self.evictions += 1
+
+            if count:
+                self.misses += 1
+
+        if expired_entry is not None:
+            self._close_clients([expired_entry['client']])
+
+        return None
+
+    def _evict_overflow(self):
+        evicted_clients = []
+        while len(self._entries) > self.max_size:
+            _, entry = self._entries.popitem(last=False)
+            evicted_clients.append(entry['client'])
+            self.evictions += 1
+        return evicted_clients
+
+    @staticmethod
+    def _close_clients(clients):
+        # Outside of the pool lock, closing a session can block on its connections
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                _LOGGER.warning(f'[ClientPool] failed to close an evicted client: {e}')
@@ -0,0 +1,203 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+__all__ = ['MetricDescriptorCatalog', 'ProjectCatalog']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_STALE = 86400
+
+_METRIC_LABEL_PREFIXES = ['metric.labels.', 'metric.label.']
+
+
+class ProjectCatalog(object):
+    """ Metric descriptors of one project, sorted by type for prefix lookups
+    """
+
+    __slots__ = ['descriptors', 'types', 'fetched_at']
+
+    def __init__(self, descriptors, fetched_at):
+        self.descriptors = sorted(descriptors, key=lambda descriptor: descriptor.get('type', ''))
+        self.types = [descriptor.get('type', '') for descriptor in self.descriptors]
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def find(self, metric_type_prefix, labels=None):
+        """ Local equivalent of metric.type = starts_with(prefix) AND label OR label ...
+        """
+        index = bisect.bisect_left(self.types, metric_type_prefix)
+        while index < len(self.types) and self.types[index].startswith(metric_type_prefix):
+            descriptor = self.descriptors[index]
+            if self._match_labels(descriptor, labels or []):
+                yield descriptor
+            index += 1
+
+    @staticmethod
+    def _match_labels(descriptor, labels):
+        """ Label conditions are OR-ed like in the original filter
+
+        A descriptor only knows its metric label keys and monitored resource
+        types, so conditions on anything else (e.g. resource label values)
+        cannot exclude it.
+        """
+        if not labels:
+            return True
+
+        label_keys = {label.get('key') for label in descriptor.get('labels', [])}
+        resource_types = descriptor.get('monitoredResourceTypes')
+
+        for label in labels:
+            key = label.get('key', '')
+            if key == 'resource.type':
+                if not resource_types or label.get('value') in resource_types:
+                    return True
+            elif any(key.startswith(prefix) for prefix in _METRIC_LABEL_PREFIXES):
+                if key.split('.', 2)[2] in label_keys:
+                    return True
+            else:
+                return True
+
+        return False
+
+
+class MetricDescriptorCatalog(object):
+    """ Process-wide cache of metric descriptor catalogs, optionally persisted to disk
+
+    A catalog older than ttl is still served while a background thread refreshes
+    it. Only a catalog older than max_stale (or a missing one) is fetched inline,
+    by one caller per catalog while the others wait for its result.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_stale=DEFAULT_MAX_STALE, cache_dir=None):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.cache_dir = cache_dir
+        self._catalogs = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def configure(self, ttl=None, max_stale=None, cache_dir=None, **kwargs):
+        if ttl is not None:
+            self.ttl = ttl
+        if max_stale is not None:
+            self.max_stale = max_stale
+        if cache_dir is not None:
+            self.cache_dir = cache_dir
+
+    def get(self, namespace, name, fetch):
+        """ Returns the ProjectCatalog of name. fetch() must return the list of descriptors
+        """
+        key = (namespace, name)
+
+        with self._lock:
+            catalog = self._catalogs.get(key)
+
+        if catalog is None:
+            catalog = self._load(key)
+
+        if catalog is None or catalog.age > self.max_stale:
+            return self._refresh_inline(key, fetch)
+
+        if catalog.age > self.ttl:
+            self._refresh_in_background(key, fetch)
+
+        return catalog
+
+    def invalidate(self, namespace=None, name=None):
+        with self._lock:
+            for key in list(self._catalogs.keys()):
+                if namespace in (None, key[0]) and name in (None, key[1]):
+                    del self._catalogs[key]
+
+    def _refresh(self, key, fetch):
+        catalog = ProjectCatalog(fetch(), time.time())
+        _LOGGER.debug(f'[MetricDescriptorCatalog] {key[1]}: {len(catalog.types)} descriptors fetched')
+
+        with self._lock:
+            self._catalogs[key] = catalog
+
+        self._save(key, catalog)
+        return catalog
+
+    def _refresh_inline(self, key, fetch):
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        try:
+            with build_lock:
+                # Fetched by the caller this one waited for
+                with self._lock:
+                    catalog = self._catalogs.get(key)
+                if catalog is not None and catalog.age <= self.max_stale:
+                    return catalog
+
+                return self._refresh(key, fetch)
+        finally:
+            with self._lock:
+                if self._build_locks.get(key) is build_lock:
+                    del self._build_locks[key]
+
+    def _refresh_in_background(self, key, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                self._refresh(key, fetch)
+            except Exception as e:
+                _LOGGER.warning(f'[MetricDescriptorCatalog] background refresh of {key[1]} failed: {e}')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, name='metric-descriptor-catalog-refresh', daemon=True).start()
+
+    def _get_cache_path(self, key):
+        digest = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'metric_descriptors_{digest}.json')
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+
+        path = self._get_cache_path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            catalog = ProjectCatalog(data['descriptors'], data['fetched_at'])
+        except Exception as e:
+            _LOGGER.warning(f'[MetricDescriptorCatalog] failed to load {path}: {e}')
+            return None
+
+        with self._lock:
+            self._catalogs[key] = catalog
+
+        return catalog
+
+    def _save(self, key, catalog):
+        if not self.cache_dir:
+            return
+
+        path = self._get_cache_path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'fetched_at': catalog.fetched_at, 'descriptors': catalog.descriptors}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            _LOGGER.warning(f'[MetricDescriptorCatalog] failed to save {path}: {e}')
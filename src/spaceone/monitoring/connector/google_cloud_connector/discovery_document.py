@@ -0,0 +1,199 @@
+""" Pinned Cloud Monitoring v3 discovery document
+
+Maintained by hand, not generated: it only describes the methods, parameters
+and schemas this plugin uses, written after revision REVISION of
+https://monitoring.googleapis.com/$discovery/rest?version=v3, so building a
+client needs neither a network round trip nor parsing the full document.
+Add a method or parameter here, as it appears in that document, before
+calling it through the client; test_discovery_document builds a client from
+it with the parameters the plugin passes.
+"""
+
+__all__ = ['MONITORING_V3', 'REVISION']
+
+REVISION = '20240211'
+
+_STANDARD_PARAMETERS = {
+    '$.xgafv': {'type': 'string', 'location': 'query', 'enum': ['1', '2']},
+    'access_token': {'type': 'string', 'location': 'query'},
+    'alt': {'type': 'string', 'location': 'query', 'default': 'json', 'enum': ['json', 'media', 'proto']},
+    'callback': {'type': 'string', 'location': 'query'},
+    'fields': {'type': 'string', 'location': 'query'},
+    'key': {'type': 'string', 'location': 'query'},
+    'oauth_token': {'type': 'string', 'location': 'query'},
+    'prettyPrint': {'type': 'boolean', 'location': 'query', 'default': 'true'},
+    'quotaUser': {'type': 'string', 'location': 'query'},
+    'uploadType': {'type': 'string', 'location': 'query'},
+    'upload_protocol': {'type': 'string', 'location': 'query'}
+}
+
+
+def _aggregation_parameters(prefix):
+    return {
+        f'{prefix}.alignmentPeriod': {'type': 'string', 'location': 'query', 'format': 'google-duration'},
+        f'{prefix}.crossSeriesReducer': {'type': 'string', 'location': 'query'},
+        f'{prefix}.groupByFields': {'type': 'string', 'location': 'query', 'repeated': True},
+        f'{prefix}.perSeriesAligner': {'type': 'string', 'location': 'query'}
+    }
+
+
+_NAME_PARAMETER = {
+    'name': {'type': 'string', 'location': 'path', 'required': True, 'pattern': '^projects/[^/]+$'}
+}
+
+_PAGE_PARAMETERS = {
+    'pageSize': {'type': 'integer', 'location': 'query', 'format': 'int32'},
+    'pageToken': {'type': 'string', 'location': 'query'}
+}
+
+MONITORING_V3 = {
+    'kind': 'discovery#restDescription',
+    'discoveryVersion': 'v1',
+    'id': 'monitoring:v3',
+    'name': 'monitoring',
+    'version': 'v3',
+    'revision': REVISION,
+    'title': 'Cloud Monitoring API',
+    'protocol': 'rest',
+    'rootUrl': 'https://monitoring.googleapis.com/',
+    'mtlsRootUrl': 'https://monitoring.mtls.googleapis.com/',
+    'servicePath': '',
+    'baseUrl': 'https://monitoring.googleapis.com/',
+    'batchPath': 'batch',
+    'parameters': _STANDARD_PARAMETERS,
+    'auth': {
+        'oauth2': {
+            'scopes': {
+                'https://www.googleapis.com/auth/cloud-platform': {},
+                'https://www.googleapis.com/auth/monitoring': {},
+                'https://www.googleapis.com/auth/monitoring.read': {}
+            }
+        }
+    },
+    'resources': {
+        'projects': {
+            'resources': {
+                'metricDescriptors': {
+                    'methods': {
+                        'list': {
+                            'id': 'monitoring.projects.metricDescriptors.list',
+                            'path': 'v3/{+name}/metricDescriptors',
+                            'flatPath': 'v3/projects/{projectsId}/metricDescriptors',
+                            'httpMethod': 'GET',
+                            'parameterOrder': ['name'],
+                            'parameters': {
+                                **_NAME_PARAMETER,
+                                **_PAGE_PARAMETERS,
+                                'filter': {'type': 'string', 'location': 'query'}
+                            },
+                            'response': {'$ref': 'ListMetricDescriptorsResponse'}
+                        }
+                    }
+                },
+                'timeSeries': {
+                    'methods': {
+                        'list': {
+                            'id': 'monitoring.projects.timeSeries.list',
+                            'path': 'v3/{+name}/timeSeries',
+                            'flatPath': 'v3/projects/{projectsId}/timeSeries',
+                            'httpMethod': 'GET',
+                            'parameterOrder': ['name'],
+                            'parameters': {
+                                **_NAME_PARAMETER,
+                                **_PAGE_PARAMETERS,
+                                **_aggregation_parameters('aggregation'),
+                                **_aggregation_parameters('secondaryAggregation'),
+                                'filter': {'type': 'string', 'location': 'query'},
+                                'interval.endTime': {'type': 'string', 'location': 'query',
+                                                     'format': 'google-datetime'},
+                                'interval.startTime': {'type': 'string', 'location': 'query',
+                                                       'format': 'google-datetime'},
+                                'orderBy': {'type': 'string', 'location': 'query'},
+                                'view': {'type': 'string', 'location': 'query', 'enum': ['FULL', 'HEADERS']}
+                            },
+                            'response': {'$ref': 'ListTimeSeriesResponse'}
+                        },
+                        'query': {
+                            'id': 'monitoring.projects.timeSeries.query',
+                            'path': 'v3/{+name}/timeSeries:query',
+                            'flatPath': 'v3/projects/{projectsId}/timeSeries:query',
+                            'httpMethod': 'POST',
+                            'parameterOrder': ['name'],
+                            'parameters': _NAME_PARAMETER,
+                            'request': {'$ref': 'QueryTimeSeriesRequest'},
+                            'response': {'$ref': 'QueryTimeSeriesResponse'}
+                        }
+                    }
+                }
+            }
+        }
+    },
+    'schemas': {
+        'ListMetricDescriptorsResponse': {
+            'id': 'ListMetricDescriptorsResponse',
+            'type': 'object',
+            'properties': {
+                'metricDescriptors': {'type': 'array', 'items': {'$ref': 'MetricDescriptor'}},
+                'nextPageToken': {'type': 'string'}
+            }
+        },
+        'ListTimeSeriesResponse': {
+            'id': 'ListTimeSeriesResponse',
+            'type': 'object',
+            'properties': {
+                'executionErrors': {'type': 'array', 'items': {'type': 'object'}},
+                'nextPageToken': {'type': 'string'},
+                'timeSeries': {'type': 'array', 'items': {'$ref': 'TimeSeries'}},
+                'unit': {'type': 'string'}
+            }
+        },
+        'MetricDescriptor': {
+            'id': 'MetricDescriptor',
+            'type': 'object',
+            'properties': {
+                'description': {'type': 'string'},
+                'displayName': {'type': 'string'},
+                'labels': {'type': 'array', 'items': {'type': 'object'}},
+                'metadata': {'type': 'object'},
+                'metricKind': {'type': 'string'},
+                'monitoredResourceTypes': {'type': 'array', 'items': {'type': 'string'}},
+                'name': {'type': 'string'},
+                'type': {'type': 'string'},
+                'unit': {'type': 'string'},
+                'valueType': {'type': 'string'}
+            }
+        },
+        'QueryTimeSeriesRequest': {
+            'id': 'QueryTimeSeriesRequest',
+            'type': 'object',
+            'properties': {
+                'pageSize': {'type': 'integer', 'format': 'int32'},
+                'pageToken': {'type': 'string'},
+                'query': {'type': 'string'}
+            }
+        },
+        'QueryTimeSeriesResponse': {
+            'id': 'QueryTimeSeriesResponse',
+            'type': 'object',
+            'properties': {
+                'nextPageToken': {'type': 'string'},
+                'partialErrors': {'type': 'array', 'items': {'type': 'object'}},
+                'timeSeriesData': {'type': 'array', 'items': {'type': 'object'}},
+                'timeSeriesDescriptor': {'type': 'object'}
+            }
+        },
+        'TimeSeries': {
+            'id': 'TimeSeries',
+            'type': 'object',
+            'properties': {
+                'metadata': {'type': 'object'},
+                'metric': {'type': 'object'},
+                'metricKind': {'type': 'string'},
+                'points': {'type': 'array', 'items': {'type': 'object'}},
+                'resource': {'type': 'object'},
+                'unit': {'type': 'string'},
+                'valueType': {'type': 'string'}
+            }
+        }
+    }
+}
@@ -0,0 +1,103 @@
+""" Run the work of many projects concurrently, each within its own deadline
+
+Every project is a job on a shared pool of max_projects threads. A project
+that fails or runs past project_timeout is reported in errors and the
+others are returned without waiting for it; its thread is left to finish on
+its own (the HTTP timeout of the transport bounds it). fan_out_async does
+the same with coroutines, for the aio serving mode.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+__all__ = ['fan_out', 'fan_out_async', 'ProjectTimeoutError', 'DEFAULT_MAX_PROJECTS', 'DEFAULT_PROJECT_TIMEOUT']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_PROJECTS = 16
+DEFAULT_PROJECT_TIMEOUT = 30
+
+
+class ProjectTimeoutError(TimeoutError):
+
+    def __init__(self, project, timeout):
+        super().__init__(f'{project} did not answer within {timeout}s')
+        self.project = project
+
+
+def fan_out(jobs, max_projects=DEFAULT_MAX_PROJECTS, project_timeout=DEFAULT_PROJECT_TIMEOUT):
+    """ jobs: {project: func}. Returns ({project: result}, {project: exception})
+
+    The deadline of a project starts when its job starts, so projects queued
+    behind max_projects are not charged for the wait.
+    """
+    results = {}
+    errors = {}
+    if not jobs:
+        return results, errors
+
+    started_at = {}
+
+    def _run(project, func):
+        started_at[project] = time.monotonic()
+        return func()
+
+    executor = ThreadPoolExecutor(max_workers=min(max_projects, len(jobs)), thread_name_prefix='fan-out')
+    try:
+        pending = {executor.submit(contextvars.copy_context().run, _run, project, func): project
+                   for project, func in jobs.items()}
+
+        while pending:
+            now = time.monotonic()
+            deadlines = [started_at[project] + project_timeout for project in pending.values()
+                         if project in started_at]
+            timeout = max(min(deadlines) - now, 0) if deadlines else project_timeout
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                project = pending.pop(future)
+                try:
+                    results[project] = future.result()
+                except Exception as e:
+                    _LOGGER.debug(f'[fan_out] {project} failed: {e}', exc_info=True)
+                    errors[project] = e
+
+            now = time.monotonic()
+            for future, project in list(pending.items()):
+                if project in started_at and now - started_at[project] >= project_timeout:
+                    _LOGGER.warning(f'[fan_out] {project} timed out after {project_timeout}s')
+                    future.cancel()
+                    errors[project] = ProjectTimeoutError(project, project_timeout)
+                    del pending[future]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, errors
+
+
+async def fan_out_async(jobs, max_projects=DEFAULT_MAX_PROJECTS, project_timeout=DEFAULT_PROJECT_TIMEOUT):
+    """ fan_out() on the event loop: jobs is {project: coroutine function}
+
+    At most max_projects jobs run at once and, as in fan_out(), the deadline
+    of a project starts when its job starts. A job past its deadline is
+    cancelled.
+    """
+    results = {}
+    errors = {}
+    semaphore = asyncio.Semaphore(max_projects)
+
+    async def _run(project, func):
+        async with semaphore:
+            try:
+                results[project] = await asyncio.wait_for(func(), project_timeout)
+            except asyncio.TimeoutError:
+                _LOGGER.warning(f'[fan_out_async] {project} timed out after {project_timeout}s')
+                errors[project] = ProjectTimeoutError(project, project_timeout)
+            except Exception as e:
+                _LOGGER.debug(f'[fan_out_async] {project} failed: {e}', exc_info=True)
+                errors[project] = e
+
+    await asyncio.gather(*[_run(project, func) for project, func in jobs.items()])
+    return results, errors
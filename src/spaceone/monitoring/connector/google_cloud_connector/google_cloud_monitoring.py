@@ -1,31 +1,129 @@
+import asyncio
+import contextvars
+import functools
 import logging
+import threading
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-from spaceone.core import utils
-from datetime import datetime, timezone
+from spaceone.monitoring import instrumentation
 from spaceone.monitoring.error import *
+from spaceone.monitoring.connector.google_cloud_connector.descriptor_catalog import MetricDescriptorCatalog
+from spaceone.monitoring.connector.google_cloud_connector.fan_out import *
+from spaceone.monitoring.connector.google_cloud_connector.mql import *
+from spaceone.monitoring.connector.google_cloud_connector.point_aligner import *
+from spaceone.monitoring.connector.google_cloud_connector.point_decoder import *
+from spaceone.monitoring.connector.google_cloud_connector.query_planner import *
+from spaceone.monitoring.connector.google_cloud_connector.query_planner import get_series_label
+from spaceone.monitoring.connector.google_cloud_connector.rate_limiter import (RETRYABLE_STATUS, get_error_message,
+                                                                              get_rate_limiter, get_status_code)
+from spaceone.monitoring.connector.google_cloud_connector.time_series_cache import (TimeSeriesCache, get_series_key,
+                                                                                    parse_period)
+from spaceone.monitoring.model.metric_frame import MetricFrame
 
 __all__ = ['GoogleCloudMonitoring']
 _LOGGER = logging.getLogger(__name__)
 PERCENT_METRIC = ['10^2.%']
+DEFAULT_MAX_IN_FLIGHT = 10
+DEFAULT_AGGREGATION_MAX_FILTER_LENGTH = 16384
+AGGREGATED_VALUES_KEY = 'all'
+
+_DESCRIPTOR_CATALOG = MetricDescriptorCatalog()
+_TIME_SERIES_CACHE = TimeSeriesCache()
+_RESOURCES = weakref.WeakKeyDictionary()
+_RESOURCES_LOCK = threading.Lock()
+
+instrumentation.register_collector('time_series_cache', _TIME_SERIES_CACHE.stats)
+
+
+def _get_resources(client):
+    """ projects().timeSeries() and projects().metricDescriptors() built once per client
+
+    Every projects() call on a discovery client builds new resource objects, so
+    they are kept for as long as the (pooled) client lives.
+    """
+    with _RESOURCES_LOCK:
+        resources = _RESOURCES.get(client)
+        if resources is None:
+            projects = client.projects()
+            resources = _RESOURCES[client] = {
+                'timeSeries': projects.timeSeries(),
+                'metricDescriptors': projects.metricDescriptors()
+            }
+        return resources
+
+
+def _count_time_series(time_series):
+    point_count = sum(len(series.get('points', [])) for series in time_series)
+    instrumentation.inc('time_series', len(time_series))
+    instrumentation.inc('points', point_count)
+    return point_count
+
+
+class _PageLimit(object):
+    """ Paging limits of one timeSeries.list call, see iter_time_series_pages
+    """
+
+    __slots__ = ['max_series', 'max_points', 'series_count', 'point_count']
+
+    def __init__(self, max_series=None, max_points=None):
+        self.max_series = max_series
+        self.max_points = max_points
+        self.series_count = 0
+        self.point_count = 0
+
+    def take(self, response):
+        """ Returns (response, last): response truncated to max_series, last when no page should follow
+        """
+        time_series = response.get('timeSeries', [])
+
+        if self.max_series and self.series_count + len(time_series) >= self.max_series:
+            response['timeSeries'] = time_series = time_series[:self.max_series - self.series_count]
+            _count_time_series(time_series)
+            return response, True
+
+        self.series_count += len(time_series)
+        self.point_count += _count_time_series(time_series)
+
+        if self.max_points and self.point_count >= self.max_points:
+            _LOGGER.debug(f'[iter_time_series_pages] stop paging at {self.point_count} points '
+                          f'(max: {self.max_points})')
+            return response, True
+
+        return response, False
 
 
 class GoogleCloudMonitoring(object):
 
-    def __init__(self, client, project_id):
+    def __init__(self, client, project_id, config=None, cache_namespace=None, aio_http=None):
         self.client = client
         self.project_id = project_id
+        # aio_transport.AsyncHttp of the same credentials, used by the *_async methods (aio serving mode)
+        self.aio_http = aio_http
+        self.config = config or {}
+        # Keeps cached data of one set of credentials away from the others
+        self.cache_namespace = cache_namespace
+        self.max_in_flight = self.config.get('max_in_flight', DEFAULT_MAX_IN_FLIGHT)
+        self.query_planner_conf = self.config.get('query_planner', {})
+        self.pagination_conf = self.config.get('pagination', {})
+        self.metric_catalog_conf = self.config.get('metric_catalog', {})
+        self.time_series_cache_conf = self.config.get('time_series_cache', {})
+        self.aggregation_conf = self.config.get('aggregation', {})
+        self.rate_limit_conf = self.config.get('rate_limit', {})
+        self.mql_conf = self.config.get('mql', {})
+        self.fan_out_conf = self.config.get('fan_out', {})
+
+    def list_metrics(self, query, projects=None):
+        """ projects: list the metrics of each of them instead of query['name'] (see _list_projects_metrics)
+        """
+        if projects:
+            return self._list_projects_metrics(query, projects)
 
-    def list_metrics(self, query):
         metrics_info = []
 
         if 'name' in query:
             for metric_filter in query.get('filters', []):
-                _query = {
-                    'name': query['name'],
-                    'filter': self.set_metric_filter(metric_filter)
-                }
-
-                for gc_metric in self.list_metric_descriptors(_query):
+                for gc_metric in self._find_metric_descriptors(query['name'], metric_filter):
                     metric_kind = gc_metric.get('metricKind', '')
                     value_type = gc_metric.get('valueType', '')
                     key = gc_metric.get('type', '')
@@ -49,92 +147,833 @@ class GoogleCloudMonitoring(object):
 
         return {'metrics': metrics_info}
 
-    def get_metric_data(self, metric_query, metric, start, end, period, stat):
+    def _list_projects_metrics(self, query, projects):
+        """ Union of the metrics of every project, listed concurrently
+
+        A metric found in several projects is returned once, with the
+        metric_query of the first of them in projects. Projects that fail or
+        time out are reported in errors.
+        """
+        names = [project if project.startswith('projects/') else f'projects/{project}' for project in projects]
+        results, project_errors = self._fan_out({
+            name: functools.partial(self.list_metrics, {**query, 'name': name}) for name in names
+        })
+
+        metrics_info = []
+        keys = set()
+        for name in names:
+            for metric_info in results.get(name, {}).get('metrics', []):
+                if metric_info['key'] not in keys:
+                    keys.add(metric_info['key'])
+                    metrics_info.append(metric_info)
+
+        errors = [{'name': name, 'status': get_status_code(error), 'message': get_error_message(error)}
+                  for name, error in project_errors.items()]
+
+        return {'metrics': metrics_info, 'errors': errors}
+
+    def _fan_out(self, jobs):
+        results, errors = fan_out(jobs,
+                                  max_projects=self.fan_out_conf.get('max_projects', DEFAULT_MAX_PROJECTS),
+                                  project_timeout=self.fan_out_conf.get('project_timeout', DEFAULT_PROJECT_TIMEOUT))
+        self._count_project_errors(errors)
+        return results, errors
+
+    async def _fan_out_async(self, jobs):
+        results, errors = await fan_out_async(
+            jobs,
+            max_projects=self.fan_out_conf.get('max_projects', DEFAULT_MAX_PROJECTS),
+            project_timeout=self.fan_out_conf.get('project_timeout', DEFAULT_PROJECT_TIMEOUT))
+        self._count_project_errors(errors)
+        return results, errors
+
+    @staticmethod
+    def _count_project_errors(errors):
+        for error in errors.values():
+            instrumentation.inc('project_errors', reason='timeout' if isinstance(error, TimeoutError) else 'error')
+
+    def _find_metric_descriptors(self, name, metric_filter):
+        """ Answer the descriptor filter from the cached project catalog when it is enabled
+        """
+        if not self.metric_catalog_conf.get('enabled', True):
+            return self.list_metric_descriptors({
+                'name': name,
+                'filter': self.set_metric_filter(metric_filter)
+            })
+
+        _DESCRIPTOR_CATALOG.configure(**self.metric_catalog_conf)
+        catalog = _DESCRIPTOR_CATALOG.get(self.cache_namespace, name,
+                                          lambda: self.list_metric_descriptors({'name': name}))
+        return catalog.find(metric_filter['metric_type'], metric_filter.get('labels'))
+
+    def get_metric_data(self, metric_query, metric, start, end, period, stat, aggregation=None, all_series=False,
+                        mql=None, fill=None):
+        """ Returns a MetricFrame with a column per resource
+
+        mql: {'query': custom MQL pipeline or None, 'resource_type': ...} reads with timeSeries.query
+        fill: one of FILL_POLICIES puts every column on one grid of the period (see point_aligner),
+              None keeps the points as they are with the timestamps of the first column
+        """
+        start = self.date_time_to_iso(start)
+        end = self.date_time_to_iso(end)
+
+        if aggregation:
+            return self.get_aggregated_metric_data(metric_query, metric, start, end, period, stat, aggregation,
+                                                   fill)
+
+        response_data = self.list_metrics_time_series(metric_query, metric, start, end, period, stat, mql)
+        return self._make_metric_data_response(response_data, period, all_series, fill)
+
+    async def get_metric_data_async(self, metric_query, metric, start, end, period, stat, aggregation=None,
+                                    all_series=False, mql=None, fill=None):
+        """ get_metric_data() with every Google call awaited on aio_http
+        """
         start = self.date_time_to_iso(start)
         end = self.date_time_to_iso(end)
-        response_data = self.list_metrics_time_series(metric_query, metric, start, end, period, stat)
+
+        if aggregation:
+            return await self.get_aggregated_metric_data_async(metric_query, metric, start, end, period, stat,
+                                                               aggregation, fill)
+
+        response_data = await self.list_metrics_time_series_async(metric_query, metric, start, end, period, stat,
+                                                                  mql)
+        return self._make_metric_data_response(response_data, period, all_series, fill)
+
+    def _make_metric_data_response(self, response_data, period, all_series=False, fill=None):
+        """ MetricFrame of a list_metrics_time_series response, with the resources that failed as its errors
+        """
         multiply = True if response_data.get('unit') in PERCENT_METRIC else False
 
-        metric_data_info = {
-            'labels': [],
-            'values': {}
-        }
+        errors = response_data.get('errors', [])
+        for error in errors:
+            _LOGGER.error(f'[get_metric_data] failed to get metric data: {error}')
 
         metric_data_set = response_data.get('metric_data', [])
 
+        # Report throttling instead of an empty chart when nothing could be read
+        if errors and not metric_data_set and all(error.get('status') in RETRYABLE_STATUS for error in errors):
+            raise ERROR_QUOTA_EXCEEDED(project=self.project_id)
+
+        columns = []
         for metric_data in metric_data_set:
-            cloud_service_id = metric_data['cloud_service_id']
-            time_series = metric_data['time_series']
+            columns.extend(self.decode_metric_data(metric_data['cloud_service_id'], metric_data['time_series'],
+                                                   multiply, all_series))
 
-            labels, values = self.set_metric_data_labels_values(cloud_service_id, time_series, multiply)
+        metric_data_frame = self.make_metric_data_frame(columns, period, fill)
 
-            if not metric_data_info['labels']:
-                metric_data_info['labels'] = labels
+        if errors:
+            # Partial result: not part of MetricDataInfo, the API reports it in the trailing metadata
+            metric_data_frame.errors = errors
 
-            metric_data_info['values'].update(values)
+        return metric_data_frame
 
-        return metric_data_info
+    def iter_metric_data(self, metric_query, metric, start, end, period, stat, all_series=False, mql=None,
+                         fill=None):
+        """ Yield a MetricFrame per resource as soon as it is fetched, aligned on its own grid with fill
+
+        Requests are only started while the consumer keeps reading, so at most
+        max_in_flight responses are held in memory whatever the size of
+        metric_query. Resources come in completion order; failed ones are
+        logged and skipped like in get_metric_data.
+        """
+        start = self.date_time_to_iso(start)
+        end = self.date_time_to_iso(end)
+        units = self._plan_queries(metric_query, period, stat, mql)
+
+        for unit, response, error in self._iter_concurrently(
+                self._list_unit_time_series, [(unit, metric, start, end, period, stat) for unit in units]):
+            if error:
+                _LOGGER.error(f'[iter_metric_data] failed to get metric data: {unit.cloud_service_ids} {error}')
+                continue
+
+            multiply = True if response.get('unit') in PERCENT_METRIC else False
+            for cloud_service_id, time_series in unit.demultiplex(response.get('timeSeries', [])).items():
+                columns = self.decode_metric_data(cloud_service_id, time_series, multiply, all_series)
+                if columns:
+                    yield self.make_metric_data_frame(columns, period, fill)
+
+    def get_aggregated_metric_data(self, metric_query, metric, start, end, period, stat, aggregation, fill=None):
+        """ Let Google reduce the series of every resource in metric_query
+
+        aggregation is {'reducer': 'REDUCE_MEAN', 'group_by': ['resource.labels.zone', ...]}.
+        The frame has one column per group, keyed by its group_by label values
+        ('resource.labels.zone=asia-northeast3-a'), or AGGREGATED_VALUES_KEY
+        when there is no group_by.
+        """
+        unit = self._plan_aggregated_query(metric_query)
+        group_by = aggregation.get('group_by') or []
+        response = self._list_unit_time_series(unit, metric, start, end, period, stat,
+                                               aggregation['reducer'], group_by)
+        return self._make_aggregated_data_response(response, period, group_by, fill)
+
+    async def get_aggregated_metric_data_async(self, metric_query, metric, start, end, period, stat, aggregation,
+                                               fill=None):
+        unit = self._plan_aggregated_query(metric_query)
+        group_by = aggregation.get('group_by') or []
+        response = await self._list_unit_time_series_async(unit, metric, start, end, period, stat,
+                                                           aggregation['reducer'], group_by)
+        return self._make_aggregated_data_response(response, period, group_by, fill)
+
+    def _make_aggregated_data_response(self, response, period, group_by, fill=None):
+        multiply = True if response.get('unit') in PERCENT_METRIC else False
+
+        columns = []
+        with instrumentation.span('decode_points'):
+            for time_series in response.get('timeSeries', []):
+                time_stamps, metric_values = self._decode_series(time_series, multiply)
+                columns.append((self._get_group_key(time_series, group_by), None, time_stamps, metric_values))
+
+        return self.make_metric_data_frame(columns, period, fill)
 
     def list_metric_descriptors(self, query):
-        response = self.client.projects().metricDescriptors().list(**query).execute()
-        return response.get('metricDescriptors', [])
+        return list(self.iter_metric_descriptors(query))
+
+    def iter_metric_descriptors(self, query, page_size=None, max_descriptors=None):
+        """ Stream metric descriptors page by page, following nextPageToken
+        """
+        page_size = page_size or self.pagination_conf.get('page_size')
+        count = 0
+
+        for response in self._iter_pages(_get_resources(self.client)['metricDescriptors'], 'metricDescriptors.list',
+                                         query, page_size):
+            for descriptor in response.get('metricDescriptors', []):
+                yield descriptor
+                count += 1
+                if max_descriptors and count >= max_descriptors:
+                    return
+
+    def list_time_series(self, query, page_size=None, max_series=None, max_points=None):
+        """ Collect every page of a timeSeries.list call into one response
+
+        Returns {'unit': ..., 'timeSeries': [...]}. A series split across pages
+        is merged back into one.
+        """
+        return self._join_pages(self.iter_time_series_pages(query, page_size, max_series, max_points))
+
+    async def list_time_series_async(self, query, page_size=None, max_series=None, max_points=None):
+        return self._join_pages([response async for response in
+                                 self.iter_time_series_pages_async(query, page_size, max_series, max_points)])
+
+    def _join_pages(self, responses):
+        response_data = {'timeSeries': []}
+        pages = 0
+
+        for response in responses:
+            pages += 1
+            if 'unit' in response:
+                response_data['unit'] = response['unit']
+            response_data['timeSeries'].extend(response.get('timeSeries', []))
+
+        if pages > 1:
+            response_data['timeSeries'] = self._merge_split_time_series(response_data['timeSeries'])
 
-    def set_metric_data_labels_values(self, cloud_service_id, time_series, multiply):
-        labels = []
-        values = {}
+        return response_data
 
-        if time_series:
-            time_series = time_series[0]
-            metric_points = time_series.get('points', [])
+    def iter_time_series(self, query, page_size=None, max_series=None, max_points=None):
+        """ Stream time series one at a time so the whole response is never held in memory
 
-            time_stamps = []
-            values = []
-            sorted_metric_points = sorted(metric_points, key=lambda point: (point['interval']['startTime']))
-            for metric_point in sorted_metric_points:
-                interval = metric_point.get('interval', {})
-                value = metric_point.get('value', {})
-                time_stamps.append(self._get_time_stamps(interval))
-                values.append(self._get_value(value, multiply))
+        Only the current page is held. A series carries the unit of its page
+        (TimeSeries.unit). A series split across pages comes once per page.
+        """
+        for response in self.iter_time_series_pages(query, page_size, max_series, max_points):
+            yield from self._iter_page_time_series(response)
 
-            labels = list(map(self._convert_timestamp, time_stamps))
-            values = {cloud_service_id: values}
+    async def iter_time_series_async(self, query, page_size=None, max_series=None, max_points=None):
+        async for response in self.iter_time_series_pages_async(query, page_size, max_series, max_points):
+            for time_series in self._iter_page_time_series(response):
+                yield time_series
 
-        return labels, values
+    @staticmethod
+    def _iter_page_time_series(response):
+        unit = response.get('unit')
+        for time_series in response.get('timeSeries', []):
+            if unit is not None:
+                time_series.setdefault('unit', unit)
+            yield time_series
+
+    def decode_time_series(self, query, page_size=None, max_series=None, max_points=None):
+        """ list_time_series with the points of each series decoded while its page is read
+
+        Series come from iter_time_series, so the JSON points of one page at a
+        time are in memory, the rest is kept as arrays: a series is returned
+        without points and with 'decoded_points': (timestamps, values), as
+        decode_points returns them (not scaled). Parts of a series split
+        across pages are joined.
+        """
+        response_data = {'timeSeries': []}
+        series_by_key = {}
+
+        for time_series in self.iter_time_series(query, page_size, max_series, max_points):
+            self._add_decoded_time_series(response_data, series_by_key, time_series)
 
-    def list_metrics_time_series(self, metric_query, metric, start, end, period, stat):
-        response_data = {}
-        metric_data = []
-        for cloud_service_id, _query in metric_query.items():
+        return response_data
+
+    async def decode_time_series_async(self, query, page_size=None, max_series=None, max_points=None):
+        response_data = {'timeSeries': []}
+        series_by_key = {}
+
+        async for time_series in self.iter_time_series_async(query, page_size, max_series, max_points):
+            self._add_decoded_time_series(response_data, series_by_key, time_series)
+
+        return response_data
+
+    @staticmethod
+    def _add_decoded_time_series(response_data, series_by_key, time_series):
+        if 'unit' in time_series:
+            response_data.setdefault('unit', time_series['unit'])
+
+        with instrumentation.span('decode_points'):
+            decoded_points = decode_points(time_series.get('points', []))
+
+        series_key = get_series_key(time_series)
+        series = series_by_key.get(series_key)
+        if series is None:
+            series = series_by_key[series_key] = {key: value for key, value in time_series.items()
+                                                  if key != 'points'}
+            series['decoded_points'] = decoded_points
+            response_data['timeSeries'].append(series)
+        else:
+            series['decoded_points'] = join_points(series['decoded_points'], decoded_points)
+
+    def iter_time_series_pages(self, query, page_size=None, max_series=None, max_points=None):
+        """ Yield timeSeries.list pages until there is no nextPageToken or enough data is collected
+
+        page_size is the number of points per page (view FULL). max_series truncates
+        the result to that many series; max_points stops paging once that many points
+        have been received.
+        """
+        page_size = page_size or self.pagination_conf.get('page_size')
+        page_limit = _PageLimit(max_series or self.pagination_conf.get('max_series'),
+                                max_points or self.pagination_conf.get('max_points'))
+
+        for response in self._iter_pages(_get_resources(self.client)['timeSeries'], 'timeSeries.list', query,
+                                         page_size):
+            response, last = page_limit.take(response)
+            yield response
+            if last:
+                return
+
+    async def iter_time_series_pages_async(self, query, page_size=None, max_series=None, max_points=None):
+        page_size = page_size or self.pagination_conf.get('page_size')
+        page_limit = _PageLimit(max_series or self.pagination_conf.get('max_series'),
+                                max_points or self.pagination_conf.get('max_points'))
+
+        async for response in self._iter_pages_async(_get_resources(self.client)['timeSeries'], 'timeSeries.list',
+                                                     query, page_size):
+            response, last = page_limit.take(response)
+            yield response
+            if last:
+                return
+
+    def query_time_series(self, name, query, page_size=None):
+        """ Run an MQL query (timeSeries.query) and return it like list_time_series does
+        """
+        body = self._make_query_body(query, page_size)
+        collection = _get_resources(self.client)['timeSeries']
+        pages = []
+
+        while True:
+            response = self._execute('timeSeries.query', name, lambda: collection.query(name=name, body=body))
+            pages.append(self._to_query_page(response))
+
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+
+            body = {**body, 'pageToken': next_page_token}
+
+        return self._join_pages(pages)
+
+    async def query_time_series_async(self, name, query, page_size=None):
+        body = self._make_query_body(query, page_size)
+        collection = _get_resources(self.client)['timeSeries']
+        pages = []
+
+        while True:
+            response = await self._execute_async('timeSeries.query', name,
+                                                 lambda: collection.query(name=name, body=body))
+            pages.append(self._to_query_page(response))
+
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+
+            body = {**body, 'pageToken': next_page_token}
+
+        return self._join_pages(pages)
+
+    def _make_query_body(self, query, page_size=None):
+        page_size = page_size or self.pagination_conf.get('page_size')
+        body = {'query': query}
+        if page_size:
+            body['pageSize'] = page_size
+        return body
+
+    @staticmethod
+    def _to_query_page(response):
+        instrumentation.inc('api_pages', method='timeSeries.query')
+        page = to_time_series_response(response)
+        _count_time_series(page['timeSeries'])
+        return page
+
+    def _iter_pages(self, collection, method, query, page_size=None):
+        query = dict(query)
+        if page_size:
+            query['pageSize'] = page_size
+
+        while True:
+            response = self._execute(method, query['name'], lambda: collection.list(**query))
+            instrumentation.inc('api_pages', method=method)
+            yield response
+
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+
+            query['pageToken'] = next_page_token
+
+    async def _iter_pages_async(self, collection, method, query, page_size=None):
+        query = dict(query)
+        if page_size:
+            query['pageSize'] = page_size
+
+        while True:
+            response = await self._execute_async(method, query['name'], lambda: collection.list(**query))
+            instrumentation.inc('api_pages', method=method)
+            yield response
+
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+
+            query['pageToken'] = next_page_token
+
+    def _execute(self, method, name, request):
+        """ Every API call goes through the rate limiter of its project (name), which retries 429/503
+
+        request() builds the HttpRequest, again for every retry.
+        """
+        def _call():
+            status = 200
+            try:
+                with instrumentation.span('api_call', method=method):
+                    return request().execute()
+            except Exception as e:
+                status = get_status_code(e) or 'error'
+                raise
+            finally:
+                instrumentation.inc('api_calls', method=method, status=status)
+
+        rate_limiter = self._get_rate_limiter(name)
+        if rate_limiter is None:
+            return _call()
+
+        return rate_limiter.call(_call)
+
+    async def _execute_async(self, method, name, request):
+        """ _execute() with the round trip of the HttpRequest awaited on aio_http
+        """
+        async def _call():
+            status = 200
             try:
-                name = _query['name']
-                _filter = _query['filter']
-                _merge_filter = f"metric.type = \"{_filter['metric_type']}\""
+                with instrumentation.span('api_call', method=method):
+                    return await self.aio_http.execute(request())
+            except Exception as e:
+                status = get_status_code(e) or 'error'
+                raise
+            finally:
+                instrumentation.inc('api_calls', method=method, status=status)
+
+        rate_limiter = self._get_rate_limiter(name)
+        if rate_limiter is None:
+            return await _call()
+
+        return await rate_limiter.call_async(_call)
+
+    def _get_rate_limiter(self, name):
+        if not self.rate_limit_conf.get('enabled', True):
+            return None
+
+        conf = {key: value for key, value in self.rate_limit_conf.items() if key != 'enabled'}
+        conf.setdefault('max_concurrency', self.max_in_flight)
+        return get_rate_limiter(name, **conf)
+
+    @staticmethod
+    def _merge_split_time_series(time_series):
+        merged = {}
+        for series in time_series:
+            key = get_series_key(series)
+            if key in merged:
+                merged[key]['points'] = merged[key].get('points', []) + series.get('points', [])
+            else:
+                merged[key] = series
+
+        return list(merged.values())
+
+    def decode_metric_data(self, cloud_service_id, time_series, multiply, all_series=False):
+        """ [(cloud_service_id, series_key, timestamps, values)] of a resource: its first series (series_key None)
+
+        With all_series and more than one series, it is every series keyed by
+        the labels that tell them apart instead:
+        {'metric.labels.device_name=sda': [...], 'metric.labels.device_name=sdb': [...]}
+        """
+        if not time_series:
+            return []
+
+        with instrumentation.span('decode_points'):
+            if not all_series or len(time_series) == 1:
+                return [(cloud_service_id, None, *self._decode_series(time_series[0], multiply))]
+
+            return [(cloud_service_id, series_key, *self._decode_series(series, multiply))
+                    for series_key, series in zip(self._get_series_keys(time_series), time_series)]
+
+    @staticmethod
+    def _decode_series(time_series, multiply):
+        """ (timestamps, values) of a series of list_time_series, or of decode_time_series
+        """
+        decoded_points = time_series.get('decoded_points')
+        if decoded_points is None:
+            return decode_points(time_series.get('points', []), multiply)
+
+        timestamps, values = decoded_points
+        return timestamps, scale_values(values) if multiply else values
+
+    @staticmethod
+    def make_metric_data_frame(columns, period, fill=None):
+        """ MetricFrame of decoded columns, aligned on one grid of period unless fill is None
+        """
+        metric_data_frame = MetricFrame()
+
+        with instrumentation.span('align_points'):
+            grid = None
+            if fill is not None:
+                period = parse_period(period)
+                grid = make_grid([column[2] for column in columns], period)
+
+            for key, series_key, timestamps, values in columns:
+                if grid is not None:
+                    timestamps, values = grid, align_points(timestamps, values, grid, period, fill)
+
+                if series_key is None:
+                    metric_data_frame.add(key, timestamps, values)
+                else:
+                    metric_data_frame.add_series(key, series_key, timestamps, values)
+
+        return metric_data_frame
+
+    def list_metrics_time_series(self, metric_query, metric, start, end, period, stat, mql=None):
+        """ Fetch the time series of every resource in metric_query
+
+        Resources that differ only in one label value are collapsed into a single
+        one_of() request by the query planner (or one MQL query with mql), and the
+        requests run concurrently under the rate limiter of the project
+        (rate_limiter.RateLimiter).
+
+        Resources of different projects (name) are fetched as one job per project
+        (fan_out.fan_out), so a slow or failing project does not hold back the
+        others past fan_out.project_timeout.
+
+        metric_data keeps the order of metric_query. A resource whose request
+        fails is reported in errors and does not discard the other resources.
+        """
+        metric_query_by_project = self._group_by_project(metric_query)
+
+        if len(metric_query_by_project) <= 1:
+            results = {None: self._list_project_time_series(metric_query, metric, start, end, period, stat, mql)}
+            project_errors = {}
+        else:
+            results, project_errors = self._fan_out({
+                name: functools.partial(self._list_project_time_series, project_query, metric, start, end, period,
+                                        stat, mql)
+                for name, project_query in metric_query_by_project.items()
+            })
+
+        return self._collect_metric_data(metric_query, metric_query_by_project, results, project_errors)
+
+    async def list_metrics_time_series_async(self, metric_query, metric, start, end, period, stat, mql=None):
+        metric_query_by_project = self._group_by_project(metric_query)
+
+        if len(metric_query_by_project) <= 1:
+            results = {None: await self._list_project_time_series_async(metric_query, metric, start, end, period,
+                                                                        stat, mql)}
+            project_errors = {}
+        else:
+            results, project_errors = await self._fan_out_async({
+                name: functools.partial(self._list_project_time_series_async, project_query, metric, start, end,
+                                        period, stat, mql)
+                for name, project_query in metric_query_by_project.items()
+            })
+
+        return self._collect_metric_data(metric_query, metric_query_by_project, results, project_errors)
+
+    @staticmethod
+    def _group_by_project(metric_query):
+        metric_query_by_project = {}
+        for cloud_service_id, _query in metric_query.items():
+            metric_query_by_project.setdefault(_query.get('name'), {})[cloud_service_id] = _query
+        return metric_query_by_project
 
-                or_filter_list = []
-                for _label in _filter.get('labels', []):
-                    or_filter_list.append(f"{_label['key']} = \"{_label['value']}\"")
+    @staticmethod
+    def _collect_metric_data(metric_query, metric_query_by_project, results, project_errors):
+        """ {'unit', 'metric_data', 'errors'} of the results of _list_project_time_series by project
+        """
+        response_data = {}
+        metric_data = []
+        errors = []
 
-                or_merge_filter = ' OR '.join(or_filter_list)
-                _metric_filter = ' AND '.join([_merge_filter, or_merge_filter])
+        time_series_by_resource = {}
+        error_by_resource = {}
+        for name, (project_time_series, project_error_by_resource, unit) in results.items():
+            time_series_by_resource.update(project_time_series)
+            error_by_resource.update(project_error_by_resource)
+            if unit is not None:
+                response_data['unit'] = unit
 
-                query = self.get_metric_data_query(name, _metric_filter, metric, start, end, period, stat)
-                _LOGGER.debug(f'[list_metrics_time_series] query: {query}')
+        for name, error in project_errors.items():
+            error_by_resource.update({cloud_service_id: error for cloud_service_id in metric_query_by_project[name]})
 
-                response = self.client.projects().timeSeries().list(**query).execute()
-                response_data.update({'unit': response.get('unit')})
-                metric_data.append({
+        for cloud_service_id, _query in metric_query.items():
+            if cloud_service_id in error_by_resource:
+                errors.append({
                     'cloud_service_id': cloud_service_id,
-                    'resource_id': _query['resource_id'],
-                    'time_series': response.get('timeSeries', []),
+                    'name': _query.get('name'),
+                    'status': get_status_code(error_by_resource[cloud_service_id]),
+                    'message': get_error_message(error_by_resource[cloud_service_id])
                 })
+                continue
 
-            except Exception as e:
-                print(f'==== Error to get Metric =====')
-                print(e)
+            metric_data.append({
+                'cloud_service_id': cloud_service_id,
+                'resource_id': _query.get('resource_id'),
+                'time_series': time_series_by_resource.get(cloud_service_id, []),
+            })
 
-        response_data.update({'metric_data': metric_data})
+        response_data.update({'metric_data': metric_data, 'errors': errors})
         return response_data
 
+    def _list_project_time_series(self, metric_query, metric, start, end, period, stat, mql=None):
+        """ Returns ({cloud_service_id: time_series}, {cloud_service_id: error}, unit)
+        """
+        units = self._plan_queries(metric_query, period, stat, mql)
+        results = self._run_concurrently(self._list_unit_time_series,
+                                         [(unit, metric, start, end, period, stat) for unit in units])
+        return self._collect_unit_results(units, results)
+
+    async def _list_project_time_series_async(self, metric_query, metric, start, end, period, stat, mql=None):
+        if mql is None:
+            units = self._plan_queries(metric_query, period, stat)
+        else:
+            # Compiling MQL may read the metric descriptors, through the sync client
+            units = await asyncio.to_thread(self._plan_queries, metric_query, period, stat, mql)
+
+        results = await self._run_concurrently_async(self._list_unit_time_series_async,
+                                                     [(unit, metric, start, end, period, stat) for unit in units])
+        return self._collect_unit_results(units, results)
+
+    @staticmethod
+    def _collect_unit_results(units, results):
+        time_series_by_resource = {}
+        error_by_resource = {}
+        metric_unit = None
+        for unit, (response, error) in zip(units, results):
+            if error:
+                error_by_resource.update({cloud_service_id: error for cloud_service_id in unit.cloud_service_ids})
+                continue
+
+            metric_unit = response.get('unit')
+            time_series_by_resource.update(unit.demultiplex(response.get('timeSeries', [])))
+
+        return time_series_by_resource, error_by_resource, metric_unit
+
+    def _plan_queries(self, metric_query, period, stat, mql=None):
+        if mql is None:
+            return self._plan_time_series_queries(metric_query)
+
+        return self._plan_mql_queries(metric_query, period, stat, mql)
+
+    def _plan_mql_queries(self, metric_query, period, stat, mql):
+        def _get_resource_type(name, metric_type):
+            return mql.get('resource_type') or self._get_resource_type(name, metric_type)
+
+        with instrumentation.span('plan_queries'):
+            try:
+                return plan_mql_queries(metric_query, period, stat, _get_resource_type, mql.get('query'),
+                                        max_query_length=self.mql_conf.get('max_query_length',
+                                                                           DEFAULT_MAX_QUERY_LENGTH),
+                                        max_batch_size=self.mql_conf.get('max_batch_size', DEFAULT_MAX_BATCH_SIZE))
+            except ValueError as e:
+                raise ERROR_INVALID_MQL_QUERY(reason=str(e))
+
+    def _get_resource_type(self, name, metric_type):
+        """ The monitored resource type a compiled MQL query fetches, from the metric descriptor
+        """
+        if self.metric_catalog_conf.get('enabled', True):
+            descriptors = self._find_metric_descriptors(name, {'metric_type': metric_type})
+        else:
+            descriptors = self.list_metric_descriptors({'name': name, 'filter': f'metric.type = "{metric_type}"'})
+
+        resource_types = sorted({resource_type for descriptor in descriptors if descriptor.get('type') == metric_type
+                                 for resource_type in descriptor.get('monitoredResourceTypes', [])})
+
+        if len(resource_types) != 1:
+            raise ERROR_INVALID_MQL_QUERY(reason=f'resource type of {metric_type} is ambiguous ({resource_types}), '
+                                                 f'set options.mql.resource_type.')
+
+        return resource_types[0]
+
+    def _plan_time_series_queries(self, metric_query):
+        with instrumentation.span('plan_queries'):
+            if self.query_planner_conf.get('enabled', True):
+                return plan_time_series_queries(
+                    metric_query,
+                    max_filter_length=self.query_planner_conf.get('max_filter_length', DEFAULT_MAX_FILTER_LENGTH),
+                    max_batch_size=self.query_planner_conf.get('max_batch_size', DEFAULT_MAX_BATCH_SIZE))
+
+            return [QueryUnit(_query['name'], make_time_series_filter(_query['filter']),
+                              _query['filter'].get('metric_type'), members={None: [cloud_service_id]})
+                    for cloud_service_id, _query in metric_query.items()]
+
+    def _plan_aggregated_query(self, metric_query):
+        """ Every resource must fit in one request, otherwise Google cannot reduce them together
+        """
+        units = plan_time_series_queries(
+            metric_query,
+            max_filter_length=self.aggregation_conf.get('max_filter_length', DEFAULT_AGGREGATION_MAX_FILTER_LENGTH),
+            max_batch_size=max(len(metric_query), 1))
+
+        if len(units) != 1:
+            raise ERROR_INVALID_AGGREGATION(reason='resources of metric_query can not be queried in one request. '
+                                                   'They need the same name, metric_type and a single label filter.')
+
+        return units[0]
+
+    def _list_unit_time_series(self, unit, metric, start, end, period, stat, reducer='REDUCE_NONE', group_by=None):
+        if self.time_series_cache_conf.get('enabled', True):
+            _TIME_SERIES_CACHE.configure(**self.time_series_cache_conf)
+            return _TIME_SERIES_CACHE.fetch(
+                self._get_cache_key(unit, period, stat, reducer, group_by), start, end, period,
+                lambda _start, _end: self._fetch_unit_time_series(unit, metric, format_epoch(_start),
+                                                                  format_epoch(_end), period, stat,
+                                                                  reducer, group_by))
+
+        # Nothing to keep the points for, so they are decoded page by page
+        return self._fetch_unit_time_series(unit, metric, start, end, period, stat, reducer, group_by, decode=True)
+
+    async def _list_unit_time_series_async(self, unit, metric, start, end, period, stat, reducer='REDUCE_NONE',
+                                           group_by=None):
+        if self.time_series_cache_conf.get('enabled', True):
+            _TIME_SERIES_CACHE.configure(**self.time_series_cache_conf)
+            return await _TIME_SERIES_CACHE.fetch_async(
+                self._get_cache_key(unit, period, stat, reducer, group_by), start, end, period,
+                lambda _start, _end: self._fetch_unit_time_series_async(unit, metric, format_epoch(_start),
+                                                                        format_epoch(_end), period, stat,
+                                                                        reducer, group_by))
+
+        return await self._fetch_unit_time_series_async(unit, metric, start, end, period, stat, reducer, group_by,
+                                                        decode=True)
+
+    def _get_cache_key(self, unit, period, stat, reducer, group_by):
+        return self.cache_namespace, unit.name, unit.filter, stat, period, reducer, tuple(group_by or [])
+
+    def _fetch_unit_time_series(self, unit, metric, start, end, period, stat, reducer='REDUCE_NONE', group_by=None,
+                                decode=False):
+        if isinstance(unit, MQLQueryUnit):
+            query = unit.filter + make_mql_window(start, end)
+            _LOGGER.debug(f'[list_metrics_time_series] mql: {query}')
+            return self.query_time_series(unit.name, query)
+
+        query = self.get_metric_data_query(unit.name, unit.filter, metric, start, end, period, stat,
+                                           reducer, group_by)
+        _LOGGER.debug(f'[list_metrics_time_series] query: {query}')
+
+        if decode:
+            return self.decode_time_series(query)
+
+        return self.list_time_series(query)
+
+    async def _fetch_unit_time_series_async(self, unit, metric, start, end, period, stat, reducer='REDUCE_NONE',
+                                            group_by=None, decode=False):
+        if isinstance(unit, MQLQueryUnit):
+            query = unit.filter + make_mql_window(start, end)
+            _LOGGER.debug(f'[list_metrics_time_series_async] mql: {query}')
+            return await self.query_time_series_async(unit.name, query)
+
+        query = self.get_metric_data_query(unit.name, unit.filter, metric, start, end, period, stat,
+                                           reducer, group_by)
+        _LOGGER.debug(f'[list_metrics_time_series_async] query: {query}')
+
+        if decode:
+            return await self.decode_time_series_async(query)
+
+        return await self.list_time_series_async(query)
+
+    def _run_concurrently(self, func, args_list):
+        """ Returns [(result, error), ...] in the order of args_list
+        """
+        def _call(args):
+            try:
+                return func(*args), None
+            except Exception as e:
+                _LOGGER.debug(f'[_run_concurrently] {func.__name__} failed: {e}', exc_info=True)
+                return None, e
+
+        if len(args_list) <= 1:
+            return [_call(args) for args in args_list]
+
+        # Each task runs in a copy of the caller's context, so its spans join the trace of the request
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(args_list))) as executor:
+            contexts = [contextvars.copy_context() for _ in args_list]
+            return list(executor.map(lambda context, args: context.run(_call, args), contexts, args_list))
+
+    async def _run_concurrently_async(self, func, args_list):
+        """ _run_concurrently() of a coroutine function, at most max_in_flight calls at once
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def _call(args):
+            async with semaphore:
+                try:
+                    return await func(*args), None
+                except Exception as e:
+                    _LOGGER.debug(f'[_run_concurrently_async] {func.__name__} failed: {e}', exc_info=True)
+                    return None, e
+
+        return await asyncio.gather(*[_call(args) for args in args_list])
+
+    def _iter_concurrently(self, func, args_list):
+        """ Yields (args[0], result, error) in completion order
+
+        At most max_in_flight calls are pending and a finished call is only
+        replaced when the consumer asks for the next result, which bounds the
+        memory held by results nobody has read yet.
+        """
+        args_iter = iter(args_list)
+        pending = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            try:
+                for args in args_iter:
+                    pending[executor.submit(contextvars.copy_context().run, func, *args)] = args
+                    if len(pending) >= self.max_in_flight:
+                        break
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        args = pending.pop(future)
+                        error = future.exception()
+                        if error:
+                            _LOGGER.debug(f'[_iter_concurrently] {func.__name__} failed: {error}')
+                        yield args[0], None if error else future.result(), error
+
+                        for next_args in args_iter:
+                            pending[executor.submit(contextvars.copy_context().run, func, *next_args)] = next_args
+                            break
+            finally:
+                # The consumer stopped early (e.g. the client cancelled the stream)
+                for future in pending:
+                    future.cancel()
+
     def get_list_metric_query(self, resource, **query):
         '''
             name: projects/project_id
@@ -150,12 +989,14 @@ class GoogleCloudMonitoring(object):
         return query
 
     @staticmethod
-    def get_metric_data_query(name, metric_filter, metric, start, end, period, stat):
+    def get_metric_data_query(name, metric_filter, metric, start, end, period, stat, reducer='REDUCE_NONE',
+                              group_by=None):
         '''
             SAMPLE
             "name": 'projects/286919713412',
             "aggregation.alignmentPeriod": '362880s',
             "aggregation.crossSeriesReducer": 'REDUCE_NONE',
+            "aggregation.groupByFields": ['resource.labels.zone'],  (only with a reducer)
             "aggregation.perSeriesAligner": 'ALIGN_SUM',
             "filter": 'metric.type="compute.googleapis.com/instance/cpu/utilization" AND resource.type="gce_instance"',
             "interval.endTime" : 2020-08-09T04:48:00Z,
@@ -166,14 +1007,56 @@ class GoogleCloudMonitoring(object):
             'name': name,
             'filter': metric_filter,
             'aggregation_alignmentPeriod': period,
-            'aggregation_crossSeriesReducer': 'REDUCE_NONE',
+            'aggregation_crossSeriesReducer': reducer,
             'aggregation_perSeriesAligner': stat,
             'interval_endTime': end,
             'interval_startTime': start,
             'view': 'FULL'
         }
+
+        if group_by and reducer != 'REDUCE_NONE':
+            metric_query['aggregation_groupByFields'] = group_by
+
         return metric_query
 
+    @staticmethod
+    def _get_series_keys(time_series):
+        """ 'field=value,...' of each series, made of the labels whose values differ between the series
+        """
+        series_labels = []
+        for series in time_series:
+            labels = {}
+            for section in ['resource', 'metric']:
+                for key, value in series.get(section, {}).get('labels', {}).items():
+                    labels[f'{section}.labels.{key}'] = value
+            series_labels.append(labels)
+
+        fields = sorted({field for labels in series_labels for field in labels})
+        fields = [field for field in fields if len({labels.get(field) for labels in series_labels}) > 1]
+
+        series_keys = []
+        for index, labels in enumerate(series_labels):
+            series_key = ','.join(f'{field}={labels.get(field)}' for field in fields)
+            # Series with identical labels can only be told apart by their order
+            series_keys.append(f'{series_key}#{index}' if not series_key or series_key in series_keys else series_key)
+
+        return series_keys
+
+    @staticmethod
+    def _get_group_key(time_series, group_by):
+        if not group_by:
+            return AGGREGATED_VALUES_KEY
+
+        group_values = []
+        for field in group_by:
+            if field in ['resource.type', 'metric.type']:
+                value = time_series.get(field.split('.')[0], {}).get('type')
+            else:
+                value = get_series_label(time_series, field)
+            group_values.append(f'{field}={value}')
+
+        return ','.join(group_values)
+
     @staticmethod
     def set_metric_filter(metric_filter):
         _metric_filter = f"metric.type = starts_with(\"{metric_filter['metric_type']}\")"
@@ -187,10 +1070,6 @@ class GoogleCloudMonitoring(object):
 
         return _metric_filter
 
-    @staticmethod
-    def _convert_timestamp(metric_datetime):
-        return utils.datetime_to_iso8601(metric_datetime)
-
     @staticmethod
     def _get_name(project_id):
         return f'projects/{project_id}'
@@ -224,26 +1103,6 @@ class GoogleCloudMonitoring(object):
 
         return all_metrics_list
 
-    @staticmethod
-    def _get_time_stamps(intervals: dict):
-        time_stamp = None
-        try:
-            sd_string = intervals.get('startTime', '').upper()
-            ed_string = intervals.get('endTime', '').upper()
-            formatter = '%Y-%m-%dT%H:%M:%S.%fZ' if len(sd_string[sd_string.find('T'):sd_string.find('Z')]) > 9 \
-                else '%Y-%m-%dT%H:%M:%SZ'
-            start_time = datetime.strptime(sd_string, formatter)
-            end_time = datetime.strptime(ed_string, formatter)
-            sub_difference = (end_time.replace(tzinfo=timezone.utc) - start_time.replace(tzinfo=timezone.utc))/2
-            time_stamp = start_time + sub_difference
-            time_stamp.replace(tzinfo=timezone.utc)
-
-        except Exception as e:
-            print(e)
-            time_stamp = datetime.strptime(intervals.get('endTime', ''), '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
-
-        return time_stamp
-
     @staticmethod
     def date_time_to_iso(date_time):
         date_format = date_time.isoformat()
@@ -285,18 +1144,6 @@ class GoogleCloudMonitoring(object):
         except Exception as e:
             raise ERROR_NOT_SUPPORT_RESOURCE()
 
-    @staticmethod
-    def _get_value(value, multiply):
-        metric_value = 0
-        double = value.get('doubleValue', None)
-        int_64 = value.get('int64Value', None)
-        if double is not None:
-            metric_value = double
-        elif int_64 is not None:
-            metric_value = int_64
-
-        return metric_value * 100 if multiply else metric_value
-
     @staticmethod
     def _metric_filters(labels, key):
         is_proper_metric = False
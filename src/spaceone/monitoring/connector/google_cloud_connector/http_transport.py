@@ -0,0 +1,80 @@
+import logging
+import socket
+
+import httplib2
+import requests.adapters
+from google.auth.transport.requests import AuthorizedSession
+from urllib3.connection import HTTPConnection
+
+__all__ = ['PooledHttp']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = 60
+
+
+class PooledHttp(object):
+    """ httplib2-compatible transport backed by one pooled requests session
+
+    googleapiclient only calls http.request(uri, method, body, headers) and reads
+    an httplib2 style (response, content) pair back. Serving that from an
+    AuthorizedSession lets every thread share the same urllib3 connection pool,
+    so concurrent calls reuse warm TLS connections instead of opening their own.
+    """
+
+    def __init__(self, credentials, pool_size=DEFAULT_POOL_SIZE, pool_block=False, keep_alive=True,
+                 timeout=DEFAULT_TIMEOUT, https_proxy=None, verify_ssl=True):
+        self.timeout = timeout
+        self._keep_alive = keep_alive
+        self._session = AuthorizedSession(credentials)
+
+        adapter = _KeepAliveAdapter(keep_alive=keep_alive, pool_connections=pool_size,
+                                    pool_maxsize=pool_size, pool_block=pool_block)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+        if https_proxy:
+            _LOGGER.info(f'** Using proxy in environment variable HTTPS_PROXY/https_proxy: {https_proxy}')
+            self._session.proxies = {'https': https_proxy, 'http': https_proxy}
+
+        # Certificates are verified through a proxy too, unless the operator turns it off (e.g. TLS inspection)
+        if not verify_ssl:
+            _LOGGER.warning('** TLS certificate verification is disabled (transport.verify_ssl = False)')
+            self._session.verify = False
+
+    @property
+    def credentials(self):
+        return self._session.credentials
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=None, connection_type=None):
+        headers = dict(headers or {})
+        if not self._keep_alive:
+            headers['connection'] = 'close'
+
+        response = self._session.request(method, uri, data=body, headers=headers, timeout=self.timeout)
+
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info['status'] = str(response.status_code)
+        http_response = httplib2.Response(info)
+        http_response.reason = response.reason
+
+        return http_response, response.content
+
+    def close(self):
+        self._session.close()
+
+
+class _KeepAliveAdapter(requests.adapters.HTTPAdapter):
+    """ Turns on TCP keep-alive so idle pooled connections are not silently dropped
+    """
+
+    def __init__(self, keep_alive=True, **kwargs):
+        self._keep_alive = keep_alive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._keep_alive:
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        super().init_poolmanager(*args, **kwargs)
@@ -0,0 +1,206 @@
+""" Monitoring Query Language (MQL) backend for timeSeries.query
+
+Resources of metric_query are grouped like the query planner does (same
+name, metric_type and a single label filter) and each group becomes one MQL
+query filtering on all of its label values:
+
+    fetch gce_instance
+    | metric 'compute.googleapis.com/instance/cpu/utilization'
+    | filter resource.instance_id == '1' || resource.instance_id == '2'
+    | group_by 60s, [value: mean(val())]
+    | every 60s
+    | within d'2020/08/06 00:00:00', d'2020/08/06 01:00:00'
+
+A custom pipeline (options.mql.query, e.g. a ratio of two metrics) replaces
+the fetch / metric / group_by part and gets the same filter, every and within.
+Responses are converted to the timeSeries.list shape, so demultiplexing and
+point decoding are shared with the list backend.
+"""
+
+import logging
+
+from spaceone.monitoring.connector.google_cloud_connector.query_planner import QueryUnit
+
+__all__ = ['MQLQueryUnit', 'plan_mql_queries', 'make_mql_window', 'to_time_series_response',
+           'DEFAULT_MAX_QUERY_LENGTH', 'DEFAULT_MAX_BATCH_SIZE']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUERY_LENGTH = 8192
+DEFAULT_MAX_BATCH_SIZE = 500
+
+_MQL_REDUCERS = {
+    'ALIGN_MEAN': 'mean',
+    'ALIGN_MAX': 'max',
+    'ALIGN_MIN': 'min',
+    'ALIGN_SUM': 'sum'
+}
+
+# filter label prefix -> MQL column prefix
+_MQL_LABEL_PREFIXES = {
+    'resource.labels.': 'resource.',
+    'resource.label.': 'resource.',
+    'metric.labels.': 'metric.',
+    'metric.label.': 'metric.'
+}
+
+
+class MQLQueryUnit(QueryUnit):
+    """ QueryUnit whose filter is an MQL pipeline without its within clause
+    """
+
+    __slots__ = []
+
+
+def plan_mql_queries(metric_query, period, stat, get_resource_type, custom_query=None,
+                     max_query_length=DEFAULT_MAX_QUERY_LENGTH, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """ get_resource_type(name, metric_type) gives the monitored resource type to fetch from
+
+    It is only called for compiled queries whose labels have no resource.type.
+    Raises ValueError for a label that MQL can not filter on.
+    """
+    units = []
+    groups = {}
+    resource_types = {}
+
+    for cloud_service_id, _query in metric_query.items():
+        _filter = _query['filter']
+        labels = [label for label in _filter.get('labels') or [] if label.get('key') != 'resource.type']
+
+        if custom_query:
+            head = custom_query
+        else:
+            resource_type = _get_resource_type_label(_filter)
+            if resource_type is None:
+                type_key = (_query['name'], _filter['metric_type'])
+                if type_key not in resource_types:
+                    resource_types[type_key] = get_resource_type(*type_key)
+                resource_type = resource_types[type_key]
+            head = _make_fetch(resource_type, _filter['metric_type'])
+
+        if len(labels) == 1 and isinstance(labels[0].get('value'), str):
+            group_key = (_query['name'], _filter['metric_type'], head, labels[0]['key'])
+            groups.setdefault(group_key, {}).setdefault(labels[0]['value'], []).append(cloud_service_id)
+        else:
+            pipeline = _make_pipeline(head, _make_or_expression(labels), period, stat, custom_query is None)
+            units.append(MQLQueryUnit(_query['name'], pipeline, _filter['metric_type'],
+                                      members={None: [cloud_service_id]}))
+
+    for (name, metric_type, head, label_key), members in groups.items():
+        mql_key = to_mql_label(label_key)
+        for chunk in _chunk_values(head, mql_key, list(members.keys()), max_query_length, max_batch_size):
+            expression = _make_or_expression([{'key': label_key, 'value': value} for value in chunk])
+            units.append(MQLQueryUnit(name, _make_pipeline(head, expression, period, stat, custom_query is None),
+                                      metric_type, label_key, {value: members[value] for value in chunk}))
+
+    _LOGGER.debug(f'[plan_mql_queries] {len(metric_query)} resources -> {len(units)} queries')
+    return units
+
+
+def to_mql_label(label_key):
+    for prefix, mql_prefix in _MQL_LABEL_PREFIXES.items():
+        if label_key.startswith(prefix):
+            return mql_prefix + label_key[len(prefix):]
+    raise ValueError(f'{label_key} can not be used in an MQL filter.')
+
+
+def make_mql_window(start, end):
+    """ within clause from the ISO 8601 start / end of a request
+    """
+    return f"\n| within d'{_to_mql_date(start)}', d'{_to_mql_date(end)}'"
+
+
+def to_time_series_response(response):
+    """ timeSeries.query response -> {'unit': ..., 'timeSeries': [...]} as timeSeries.list returns it
+
+    Only the first point column is kept, as a chart has one value per point.
+    """
+    descriptor = response.get('timeSeriesDescriptor', {})
+    label_keys = [label.get('key', '') for label in descriptor.get('labelDescriptors', [])]
+    point_descriptors = descriptor.get('pointDescriptors', [])
+
+    time_series = []
+    for series_data in response.get('timeSeriesData', []):
+        series = {'metric': {'labels': {}}, 'resource': {'labels': {}}, 'points': []}
+
+        for key, label_value in zip(label_keys, series_data.get('labelValues', [])):
+            section, _, name = key.partition('.')
+            if section in ['metric', 'resource'] and name:
+                series[section]['labels'][name] = _get_label_value(label_value)
+
+        for point_data in series_data.get('pointData', []):
+            values = point_data.get('values', [])
+            series['points'].append({'interval': point_data.get('timeInterval', {}),
+                                     'value': values[0] if values else {}})
+
+        time_series.append(series)
+
+    response_data = {'timeSeries': time_series}
+    if point_descriptors and 'unit' in point_descriptors[0]:
+        response_data['unit'] = point_descriptors[0]['unit']
+
+    for partial_error in response.get('partialErrors', []):
+        _LOGGER.warning(f'[to_time_series_response] partial error: {partial_error}')
+
+    return response_data
+
+
+def _get_resource_type_label(_filter):
+    for label in _filter.get('labels') or []:
+        if label.get('key') == 'resource.type':
+            return label.get('value')
+    return None
+
+
+def _make_fetch(resource_type, metric_type):
+    return f"fetch {resource_type}\n| metric {_quote(metric_type)}"
+
+
+def _make_pipeline(head, expression, period, stat, aligned):
+    pipeline = head
+    if expression:
+        pipeline += f'\n| filter {expression}'
+    if aligned:
+        pipeline += f'\n| group_by {period}, [value: {_MQL_REDUCERS.get(stat, "mean")}(val())]'
+    return pipeline + f'\n| every {period}'
+
+
+def _make_or_expression(labels):
+    # Label conditions are OR-ed like in the timeSeries.list filter
+    return ' || '.join(f"{to_mql_label(label['key'])} == {_quote(str(label['value']))}" for label in labels)
+
+
+def _chunk_values(head, mql_key, values, max_query_length, max_batch_size):
+    # group_by, every and within clauses take less than 200 characters
+    base_length = len(head) + 200
+    chunk = []
+    length = base_length
+
+    for value in values:
+        # key == 'value' || -> key, operator, quotes and separator
+        value_length = len(mql_key) + len(value) + 10
+        if chunk and (len(chunk) >= max_batch_size or length + value_length > max_query_length):
+            yield chunk
+            chunk = []
+            length = base_length
+
+        chunk.append(value)
+        length += value_length
+
+    if chunk:
+        yield chunk
+
+
+def _quote(value):
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def _to_mql_date(iso_date):
+    # 2020-08-06T00:01:00.000Z -> 2020/08/06 00:01:00
+    return iso_date[:19].replace('-', '/').replace('T', ' ')
+
+
+def _get_label_value(label_value):
+    for key in ['stringValue', 'int64Value', 'boolValue']:
+        if key in label_value:
+            return str(label_value[key]).lower() if key == 'boolValue' else str(label_value[key])
+    return None
@@ -0,0 +1,87 @@
+""" Alignment of the decoded series of a response onto one bucket grid
+
+Series of different resources do not always have the same points: a VM
+created in the middle of the window, a bucket the agent missed or a page cut
+short. The grid runs every alignment period from the earliest to the latest
+point of all series, so the labels of the response fit every column; each
+series is placed on it in a single pass and its missing buckets are filled:
+
+    null:     NaN, encoded as null_value (a gap in the chart)
+    zero:     0.0
+    previous: the last known value of the series (NaN before the first one)
+
+A grid timestamp stands for the bucket ending there. A point off the grid,
+like the open bucket Google stamps with the requested end time, goes to the
+bucket it falls in (the next grid timestamp), never onto a closed one.
+"""
+
+import math
+from array import array
+
+__all__ = ['make_grid', 'align_points', 'FILL_POLICIES']
+
+FILL_POLICIES = ['null', 'zero', 'previous']
+_NAN = float('nan')
+# Seconds a point may be off a grid timestamp and still be on it
+_TOLERANCE = 0.001
+
+
+def _get_bucket_index(timestamp, origin, period):
+    offset = (timestamp - origin) / period
+    index = round(offset)
+    if abs(timestamp - (origin + index * period)) <= _TOLERANCE:
+        return index
+
+    return math.ceil(offset)
+
+
+def make_grid(timestamps_list, period):
+    """ timestamps_list: sorted epoch seconds (array('d')) of each series, period in seconds
+
+    Google aligns every series of a request to the same bucket ends, so the
+    earliest point gives the phase of the grid.
+    """
+    first = last = None
+    for timestamps in timestamps_list:
+        if timestamps:
+            first = timestamps[0] if first is None else min(first, timestamps[0])
+            last = timestamps[-1] if last is None else max(last, timestamps[-1])
+
+    if first is None:
+        return array('d')
+
+    count = _get_bucket_index(last, first, period) + 1
+    return array('d', [first + index * period for index in range(count)])
+
+
+def align_points(timestamps, values, grid, period, fill='null'):
+    """ values of the series at each timestamp of grid, missing buckets filled by fill
+
+    A point goes to the bucket it falls in. A series that already covers the
+    grid is returned as it is.
+    """
+    count = len(grid)
+    if not count:
+        return array('d')
+
+    origin = grid[0]
+    if len(timestamps) == count and _get_bucket_index(timestamps[0], origin, period) == 0 and \
+            _get_bucket_index(timestamps[-1], origin, period) == count - 1:
+        return values
+
+    aligned = array('d', [0.0 if fill == 'zero' else _NAN]) * count
+    for timestamp, value in zip(timestamps, values):
+        index = _get_bucket_index(timestamp, origin, period)
+        if 0 <= index < count:
+            aligned[index] = value
+
+    if fill == 'previous':
+        previous = _NAN
+        for index in range(count):
+            value = aligned[index]
+            if value != value:
+                aligned[index] = previous
+            else:
+                previous = value
+
+    return aligned
@@ -0,0 +1,119 @@
+import calendar
+import functools
+from array import array
+from datetime import datetime
+
+from spaceone.monitoring.model.metric_frame import format_epoch_ms
+
+__all__ = ['decode_points', 'join_points', 'scale_values', 'format_timestamps', 'to_epoch', 'format_epoch']
+
+
+@functools.lru_cache(maxsize=4096)
+def _date_to_epoch(date_string):
+    return calendar.timegm((int(date_string[0:4]), int(date_string[5:7]), int(date_string[8:10]), 0, 0, 0))
+
+
+def to_epoch(value):
+    """ RFC 3339 UTC timestamp ('2020-08-06T00:00:00[.fffffffff]Z') -> epoch seconds
+
+    Only the date part goes through the calendar (and is cached), the time of
+    day is plain integer arithmetic, so no datetime object is created.
+    """
+    if value[-1:] not in ('Z', 'z'):
+        return datetime.fromisoformat(value).timestamp()
+
+    seconds = _date_to_epoch(value[:10]) + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+
+    if value[19:20] == '.':
+        fraction = value[20:-1]
+        seconds += int(fraction) / 10 ** len(fraction)
+
+    return seconds
+
+
+def format_epoch(epoch):
+    """ epoch seconds -> '2020-08-06T00:00:00.000Z', formatted (and cached) by MetricFrame's format_epoch_ms
+    """
+    seconds = int(epoch // 1)
+    return format_epoch_ms(seconds * 1000 + int((epoch - seconds) * 1000 + 1e-6))
+
+
+def format_timestamps(timestamps):
+    return list(map(format_epoch, timestamps))
+
+
+def _get_value(value):
+    double = value.get('doubleValue')
+    if double is not None:
+        return double
+
+    int_64 = value.get('int64Value')
+    if int_64 is not None:
+        # int64 values are JSON strings
+        return float(int_64)
+
+    return 0.0
+
+
+def decode_points(points, multiply=False):
+    """ Decode the points of one time series in a single pass
+
+    Returns (timestamps, values) as array('d'), sorted by time. A timestamp is
+    the midpoint of the point interval in epoch seconds (the end time for
+    GAUGE points, whose interval has no width). Values are scaled by 100 when
+    multiply is set (ratio metrics shown as percentage).
+    """
+    if not points:
+        return array('d'), array('d')
+
+    intervals = [point['interval'] for point in points]
+    ends = array('d', [to_epoch(interval['endTime']) for interval in intervals])
+    starts = array('d', [to_epoch(interval['startTime']) if 'startTime' in interval else end
+                         for interval, end in zip(intervals, ends)])
+    timestamps = array('d', [(start + end) * 0.5 for start, end in zip(starts, ends)])
+    values = array('d', [_get_value(point.get('value', {})) for point in points])
+
+    if multiply:
+        values = scale_values(values)
+
+    # The API returns points newest first, so a reverse is usually enough
+    if len(starts) > 1 and starts[0] > starts[-1]:
+        starts.reverse()
+        timestamps.reverse()
+        values.reverse()
+
+    if any(starts[index] > starts[index + 1] for index in range(len(starts) - 1)):
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        timestamps = array('d', [timestamps[index] for index in order])
+        values = array('d', [values[index] for index in order])
+
+    return timestamps, values
+
+
+def scale_values(values):
+    """ Ratio values as percentage
+    """
+    return array('d', [value * 100 for value in values])
+
+
+def join_points(first, second):
+    """ (timestamps, values) of two decoded parts of one series (e.g. split across pages), sorted by time
+
+    Pages come newest first, so the second part usually goes before the first.
+    """
+    first_timestamps, first_values = first
+    second_timestamps, second_values = second
+    if not first_timestamps:
+        return second
+    if not second_timestamps:
+        return first
+
+    if second_timestamps[-1] < first_timestamps[0]:
+        return second_timestamps + first_timestamps, second_values + first_values
+    if first_timestamps[-1] < second_timestamps[0]:
+        return first_timestamps + second_timestamps, first_values + second_values
+
+    timestamps = first_timestamps + second_timestamps
+    values = first_values + second_values
+    order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+    return array('d', [timestamps[index] for index in order]), array('d', [values[index] for index in order])
@@ -0,0 +1,141 @@
+import logging
+
+__all__ = ['QueryUnit', 'plan_time_series_queries', 'make_time_series_filter',
+           'DEFAULT_MAX_FILTER_LENGTH', 'DEFAULT_MAX_BATCH_SIZE']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_FILTER_LENGTH = 2048
+DEFAULT_MAX_BATCH_SIZE = 100
+
+# filter label prefix -> path of the label dict in a returned TimeSeries
+_SERIES_LABEL_PATHS = {
+    'resource.labels.': ('resource', 'labels'),
+    'resource.label.': ('resource', 'labels'),
+    'metric.labels.': ('metric', 'labels'),
+    'metric.label.': ('metric', 'labels'),
+}
+
+
+def make_time_series_filter(_filter):
+    _merge_filter = f"metric.type = \"{_filter['metric_type']}\""
+
+    or_filter_list = []
+    for _label in _filter.get('labels', []):
+        or_filter_list.append(f"{_label['key']} = \"{_label['value']}\"")
+
+    or_merge_filter = ' OR '.join(or_filter_list)
+    return ' AND '.join([_merge_filter, or_merge_filter])
+
+
+class QueryUnit(object):
+    """ One timeSeries.list request and the resources it answers for
+
+    A batched unit filters on label_key = one_of(values) and routes every
+    returned series back to the resources by that label value. A single unit
+    answers for exactly one resource and keeps its original filter.
+    """
+
+    __slots__ = ['name', 'filter', 'metric_type', 'label_key', 'members']
+
+    def __init__(self, name, _filter, metric_type=None, label_key=None, members=None):
+        self.name = name
+        self.filter = _filter
+        self.metric_type = metric_type
+        self.label_key = label_key
+        # label value (None for single units) -> [cloud_service_id, ...]
+        self.members = members or {}
+
+    @property
+    def cloud_service_ids(self):
+        return [cloud_service_id for ids in self.members.values() for cloud_service_id in ids]
+
+    def demultiplex(self, time_series):
+        """ Returns {cloud_service_id: [time_series, ...]}
+        """
+        if self.label_key is None:
+            return {cloud_service_id: time_series for cloud_service_id in self.cloud_service_ids}
+
+        series_by_value = {}
+        for series in time_series:
+            value = get_series_label(series, self.label_key)
+            series_by_value.setdefault(value, []).append(series)
+
+        result = {}
+        for value, cloud_service_ids in self.members.items():
+            for cloud_service_id in cloud_service_ids:
+                result[cloud_service_id] = series_by_value.get(value, [])
+
+        return result
+
+
+def get_series_label(series, label_key):
+    for prefix, (section, labels) in _SERIES_LABEL_PATHS.items():
+        if label_key.startswith(prefix):
+            return series.get(section, {}).get(labels, {}).get(label_key[len(prefix):])
+    return None
+
+
+def plan_time_series_queries(metric_query, max_filter_length=DEFAULT_MAX_FILTER_LENGTH,
+                             max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """ Group metric_query entries that differ only in one label value into one_of() filters
+
+    Entries are batchable when they share name and metric_type and filter on
+    exactly one label whose value can be read back from the returned series
+    (resource.labels.* or metric.labels.*). Everything else gets its own unit.
+    """
+    units = []
+    groups = {}
+
+    for cloud_service_id, _query in metric_query.items():
+        _filter = _query['filter']
+        labels = _filter.get('labels') or []
+
+        if len(labels) == 1 and _is_batchable_label(labels[0]):
+            group_key = (_query['name'], _filter['metric_type'], labels[0]['key'])
+            groups.setdefault(group_key, {}).setdefault(labels[0]['value'], []).append(cloud_service_id)
+        else:
+            units.append(QueryUnit(_query['name'], make_time_series_filter(_filter), _filter.get('metric_type'),
+                                   members={None: [cloud_service_id]}))
+
+    for (name, metric_type, label_key), members in groups.items():
+        for chunk in _chunk_label_values(metric_type, label_key, list(members.keys()),
+                                         max_filter_length, max_batch_size):
+            units.append(QueryUnit(name, _make_one_of_filter(metric_type, label_key, chunk), metric_type, label_key,
+                                   {value: members[value] for value in chunk}))
+
+    _LOGGER.debug(f'[plan_time_series_queries] {len(metric_query)} resources -> {len(units)} requests')
+    return units
+
+
+def _is_batchable_label(label):
+    key = label.get('key')
+    return isinstance(key, str) and isinstance(label.get('value'), str) and \
+        any(key.startswith(prefix) for prefix in _SERIES_LABEL_PATHS)
+
+
+def _make_one_of_filter(metric_type, label_key, values):
+    if len(values) == 1:
+        return f"metric.type = \"{metric_type}\" AND {label_key} = \"{values[0]}\""
+
+    values_in_str = '","'.join(values)
+    return f"metric.type = \"{metric_type}\" AND {label_key} = one_of(\"{values_in_str}\")"
+
+
+def _chunk_label_values(metric_type, label_key, values, max_filter_length, max_batch_size):
+    base_length = len(f"metric.type = \"{metric_type}\" AND {label_key} = one_of()")
+    chunk = []
+    length = base_length
+
+    for value in values:
+        # "value", -> quotes plus separator
+        value_length = len(value) + 3
+        if chunk and (len(chunk) >= max_batch_size or length + value_length > max_filter_length):
+            yield chunk
+            chunk = []
+            length = base_length
+
+        chunk.append(value)
+        length += value_length
+
+    if chunk:
+        yield chunk
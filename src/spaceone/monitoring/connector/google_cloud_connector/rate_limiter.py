@@ -0,0 +1,317 @@
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+
+__all__ = ['RateLimiter', 'RateLimiterPool', 'get_rate_limiter', 'get_rate_limiter_pool_stats',
+           'get_rate_limiter_stats', 'get_status_code', 'get_error_message', 'RETRYABLE_STATUS']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_RATE = 100
+DEFAULT_BURST = 100
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 32
+DEFAULT_MAX_PROJECTS = 1024
+DEFAULT_IDLE_TTL = 3600
+ASYNC_POLL_INTERVAL = 0.005
+
+# Too Many Requests / Service Unavailable: Google asks to slow down
+RETRYABLE_STATUS = (429, 503)
+MAX_ERROR_MESSAGE_LENGTH = 200
+
+
+
+def get_status_code(error):
+    """ HTTP status of a googleapiclient HttpError, None for anything else
+    """
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def get_error_message(error):
+    """ Short message of an error for a partial result
+
+    str() of an HttpError includes the request URI with its whole filter, so
+    only the reason Google gave is kept.
+    """
+    message = getattr(error, 'reason', None)
+    if not isinstance(message, str) or not message:
+        message = str(error) or type(error).__name__
+
+    if len(message) > MAX_ERROR_MESSAGE_LENGTH:
+        message = message[:MAX_ERROR_MESSAGE_LENGTH - 3] + '...'
+
+    return message
+
+
+def _get_retry_after(error):
+    """ Seconds from the Retry-After header (delta-seconds or HTTP-date), None if absent
+    """
+    resp = getattr(error, 'resp', None)
+    value = resp.get('retry-after') if hasattr(resp, 'get') else None
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter(object):
+    """ Per-project token bucket plus AIMD concurrency limit around Cloud Monitoring calls
+
+    Every call takes a token (rate per second, up to burst saved) and a
+    concurrency slot. The concurrency limit grows by one per limit successful
+    calls and is halved when Google answers 429/503, so a project settles
+    just under its quota instead of failing. Throttled calls are retried with
+    full-jitter exponential backoff, or after Retry-After when Google sends it.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_concurrency=DEFAULT_MIN_CONCURRENCY,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX):
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.tokens = float(burst)
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+
+        self._updated_at = time.monotonic()
+        self._condition = threading.Condition()
+
+    def call(self, func):
+        """ Run func() under the limits and retry it while Google throttles
+        """
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                result = func()
+            except Exception as e:
+                delay = self._get_retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+            else:
+                self._release(throttled=False)
+                return result
+
+    async def call_async(self, func):
+        """ call() for the event loop: func() returns an awaitable, waits and backoffs do not block the loop
+        """
+        attempt = 0
+        while True:
+            await self._acquire_async()
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self._get_retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+            else:
+                self._release(throttled=False)
+                return result
+
+    def stats(self):
+        with self._condition:
+            self._refill()
+            return {
+                'rate': self.rate,
+                'tokens': self.tokens,
+                'concurrency_limit': self.limit,
+                'in_flight': self.in_flight,
+                'calls': self.calls,
+                'throttled': self.throttled,
+                'retries': self.retries,
+                'failures': self.failures,
+                'wait_seconds': self.wait_seconds
+            }
+
+    def _acquire(self):
+        started = time.monotonic()
+        with self._condition:
+            while not self._try_acquire(started):
+                self._condition.wait(self._get_token_wait())
+
+    async def _acquire_async(self):
+        started = time.monotonic()
+        while True:
+            with self._condition:
+                if self._try_acquire(started):
+                    return
+                timeout = self._get_token_wait()
+
+            # Releases only wake the threads waiting on the condition, so a coroutine waiting for a slot polls
+            await asyncio.sleep(ASYNC_POLL_INTERVAL if timeout is None else timeout)
+
+    def _try_acquire(self, started):
+        """ Take a token and a concurrency slot if both are free (condition held)
+        """
+        self._refill()
+        if self.in_flight < int(self.limit) and self.tokens >= 1:
+            self.tokens -= 1
+            self.in_flight += 1
+            self.calls += 1
+            self.wait_seconds += time.monotonic() - started
+            return True
+
+        return False
+
+    def _get_token_wait(self):
+        """ Seconds until the next token is due when only short of tokens, None when short of slots
+        """
+        if self.in_flight < int(self.limit):
+            return (1 - self.tokens) / self.rate
+        return None
+
+    def _get_retry_delay(self, error, attempt):
+        """ Releases the slot of a failed call; seconds to wait before retrying it, None to raise the error
+        """
+        status = get_status_code(error)
+        self._release(throttled=status in RETRYABLE_STATUS)
+
+        if status not in RETRYABLE_STATUS:
+            return None
+
+        if attempt >= self.max_retries:
+            with self._condition:
+                self.failures += 1
+            return None
+
+        delay = self._get_backoff(attempt, _get_retry_after(error))
+        _LOGGER.debug(f'[call] throttled ({status}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s')
+        with self._condition:
+            self.retries += 1
+            self.wait_seconds += delay
+        return delay
+
+    def _release(self, throttled):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / max(self.limit, 1))
+            self._condition.notify_all()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _get_backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class RateLimiterPool(object):
+    """ Process-wide LRU of the limiters of each project, with idle expiry
+
+    A limiter is built with its settings when its project is first seen and
+    is not reconfigured afterwards, so a call only takes the pool lock. A
+    limiter not used for ttl seconds, or pushed out by more than max_size
+    projects, is dropped; the next call of its project starts a fresh one.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_PROJECTS, ttl=DEFAULT_IDLE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, **conf):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry['used_at'] >= self.ttl:
+                if entry is not None:
+                    self.evictions += 1
+                entry = self._entries[key] = {'rate_limiter': RateLimiter(**conf)}
+
+            entry['used_at'] = now
+            self._entries.move_to_end(key)
+            self._evict(now)
+            return entry['rate_limiter']
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'evictions': self.evictions
+            }
+
+    def get_rate_limiter_stats(self):
+        with self._lock:
+            rate_limiters = {key: entry['rate_limiter'] for key, entry in self._entries.items()}
+        return {key: rate_limiter.stats() for key, rate_limiter in rate_limiters.items()}
+
+    def _evict(self, now):
+        # Least recently used first, so the idle ones are at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and now - entry['used_at'] < self.ttl:
+                break
+            del self._entries[key]
+            self.evictions += 1
+
+
+_RATE_LIMITERS = RateLimiterPool()
+
+
+def get_rate_limiter(project_name, max_projects=None, idle_ttl=None, **conf):
+    """ Limiter shared by every request in this process that reads the same project
+
+    conf (rate, burst, ...) only applies when the limiter of the project is created.
+    """
+    if max_projects is not None:
+        _RATE_LIMITERS.max_size = max_projects
+    if idle_ttl is not None:
+        _RATE_LIMITERS.ttl = idle_ttl
+
+    return _RATE_LIMITERS.get(project_name, **conf)
+
+
+def get_rate_limiter_stats():
+    return _RATE_LIMITERS.get_rate_limiter_stats()
+
+
+def get_rate_limiter_pool_stats():
+    return _RATE_LIMITERS.stats()
@@ -0,0 +1,379 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from spaceone.monitoring.connector.google_cloud_connector.point_decoder import format_epoch, to_epoch
+from spaceone.monitoring.connector.google_cloud_connector.time_series_store import TimeSeriesStore, make_store_key
+
+__all__ = ['TimeSeriesCache', 'get_series_key', 'parse_period']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_POINTS = 200000
+DEFAULT_SETTLE_SECONDS = 300
+
+
+def parse_period(period):
+    """ '60s' -> 60
+    """
+    return int(str(period).rstrip('s'))
+
+
+def get_series_key(series):
+    metric = series.get('metric', {})
+    resource = series.get('resource', {})
+    return (metric.get('type'), tuple(sorted(metric.get('labels', {}).items())),
+            resource.get('type'), tuple(sorted(resource.get('labels', {}).items())))
+
+
+class _CacheEntry(object):
+
+    __slots__ = ['lo', 'hi', 'unit', 'series', 'point_count']
+
+    def __init__(self):
+        # Buckets ending in (lo, hi] are cached and closed
+        self.lo = None
+        self.hi = None
+        self.unit = None
+        # series key -> {'header': series without points, 'points': {bucket end: point}}
+        self.series = {}
+        self.point_count = 0
+
+    def merge(self, response):
+        if 'unit' in response:
+            self.unit = response['unit']
+
+        for time_series in response.get('timeSeries', []):
+            series_key = get_series_key(time_series)
+            if series_key not in self.series:
+                self.series[series_key] = {
+                    'header': {key: value for key, value in time_series.items() if key != 'points'},
+                    'points': {}
+                }
+
+            points = self.series[series_key]['points']
+            for point in time_series.get('points', []):
+                bucket_end = to_epoch(point['interval']['endTime'])
+                if bucket_end not in points:
+                    self.point_count += 1
+                points[bucket_end] = point
+
+    def trim(self, lo):
+        """ Drop buckets ending at or before lo, the window only slides forward
+        """
+        for series in self.series.values():
+            points = series['points']
+            for bucket_end in [bucket_end for bucket_end in points if bucket_end <= lo]:
+                del points[bucket_end]
+                self.point_count -= 1
+
+        self.lo = lo
+
+    def make_response(self, lo, hi):
+        time_series = []
+        for series in self.series.values():
+            points = [point for bucket_end, point in sorted(series['points'].items(), reverse=True)
+                      if lo < bucket_end <= hi]
+            if points:
+                time_series.append(dict(series['header'], points=points))
+
+        response = {'timeSeries': time_series}
+        if self.unit is not None:
+            response['unit'] = self.unit
+
+        return response
+
+
+class _FetchPlan(object):
+
+    __slots__ = ['key', 'entry', 'ranges', 'period', 'start_epoch', 'end_epoch', 'start', 'end', 'closed_until']
+
+    def __init__(self):
+        self.key = None
+        self.entry = None
+        self.ranges = []
+
+
+class TimeSeriesCache(object):
+    """ Keeps aligned points per query so a sliding window only fetches its new buckets
+
+    The requested window is snapped to multiples of the alignment period, which
+    keeps the bucket grid identical between refreshes. Buckets that ended more
+    than settle_seconds ago are considered closed and are served from the
+    cache; the head and tail that are not cached are fetched and merged in.
+
+    The open bucket after the last boundary (up to the requested end) is
+    fetched on every call, in the same request as the tail, and never cached.
+    Its point is put in its own bucket, the one ending at the next boundary,
+    whatever the metric kind (see _merge_open_bucket).
+
+    With a store (time_series_store.TimeSeriesStore), ranges missing in memory
+    are read from disk first, and closed buckets fetched from Google are
+    written through to it.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_points=DEFAULT_MAX_POINTS,
+                 settle_seconds=DEFAULT_SETTLE_SECONDS):
+        self.max_entries = max_entries
+        self.max_points = max_points
+        self.settle_seconds = settle_seconds
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.store = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries=None, max_points=None, settle_seconds=None, store=None, **kwargs):
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_points is not None:
+            self.max_points = max_points
+        if settle_seconds is not None:
+            self.settle_seconds = settle_seconds
+        if store is not None:
+            self._configure_store(**store)
+
+    def _configure_store(self, enabled=False, path=None, **conf):
+        with self._lock:
+            if not enabled or not path:
+                store, self.store = self.store, None
+            elif self.store is None or self.store.path != path:
+                store, self.store = self.store, TimeSeriesStore(path, **conf)
+            else:
+                self.store.configure(**conf)
+                return
+
+        if store is not None:
+            store.close()
+
+    def fetch(self, key, start, end, period, fetch_range):
+        """ fetch_range(start_epoch, end_epoch) must return a timeSeries.list response
+        """
+        plan = self._plan_fetch(key, start, end, period)
+        if plan.entry is None:
+            return fetch_range(plan.start_epoch, plan.end_epoch)
+
+        responses = [(_end, response) for _start, _end in plan.ranges
+                     for response in self._fetch_range(key, _start, _end, plan.closed_until, fetch_range)]
+        return self._complete_fetch(plan, responses)
+
+    async def fetch_async(self, key, start, end, period, fetch_range):
+        """ fetch() for the event loop: fetch_range returns an awaitable, the store is used from a worker thread
+        """
+        plan = self._plan_fetch(key, start, end, period)
+        if plan.entry is None:
+            return await fetch_range(plan.start_epoch, plan.end_epoch)
+
+        responses = []
+        for _start, _end in plan.ranges:
+            for response in await self._fetch_range_async(key, _start, _end, plan.closed_until, fetch_range):
+                responses.append((_end, response))
+        return self._complete_fetch(plan, responses)
+
+    def _plan_fetch(self, key, start, end, period):
+        """ The ranges to fetch for the window; entry is None when the window is too short to reuse anything
+        """
+        plan = _FetchPlan()
+        plan.period = parse_period(period)
+        plan.start_epoch = to_epoch(start)
+        plan.end_epoch = to_epoch(end)
+        plan.start = start = int(plan.start_epoch // plan.period) * plan.period
+        plan.end = end = int(plan.end_epoch // plan.period) * plan.period
+        plan.closed_until = int((time.time() - self.settle_seconds) // plan.period) * plan.period
+
+        if end <= start:
+            # Window shorter than one bucket, nothing to reuse
+            return plan
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry.hi is None or end < entry.lo or start > entry.hi:
+                self.misses += 1
+                entry = _CacheEntry()
+                ranges = [(start, end)]
+            else:
+                self._entries.move_to_end(key)
+                ranges = []
+                if start < entry.lo:
+                    ranges.append((start, entry.lo))
+                if end > entry.hi:
+                    ranges.append((entry.hi, end))
+
+                if ranges:
+                    self.partial_hits += 1
+                else:
+                    self.hits += 1
+
+        if plan.end_epoch > end:
+            # One request for the new closed buckets and the open one
+            if ranges and ranges[-1][1] == end:
+                ranges[-1] = (ranges[-1][0], plan.end_epoch)
+            else:
+                ranges.append((end, plan.end_epoch))
+
+        plan.key = key
+        plan.entry = entry
+        plan.ranges = ranges
+        return plan
+
+    def _complete_fetch(self, plan, responses):
+        """ Merge the closed buckets of responses ([(range end, response)]) and answer the window
+        """
+        start, end = plan.start, plan.end
+        entry = plan.entry
+
+        closed_responses = []
+        open_responses = []
+        for _end, response in responses:
+            if _end > end:
+                response, open_response = self._split_open_bucket(response, end)
+                open_responses.append(open_response)
+            closed_responses.append(response)
+
+        with self._lock:
+            for response in closed_responses:
+                entry.merge(response)
+
+            entry.hi = min(max(entry.hi or end, end), plan.closed_until)
+            if entry.hi <= start:
+                # Nothing in the window is closed yet
+                entry.hi = None
+
+            entry.trim(start)
+            response = entry.make_response(start, end)
+
+            self._entries[plan.key] = entry
+            self._entries.move_to_end(plan.key)
+            self._evict()
+
+        for open_response in open_responses:
+            self._merge_open_bucket(response, open_response, end, plan.period)
+
+        return response
+
+    @staticmethod
+    def _split_open_bucket(response, end):
+        """ (response with the buckets ending at or before end, response with the points after end)
+        """
+        closed_series = []
+        open_series = []
+        for time_series in response.get('timeSeries', []):
+            points = time_series.get('points', [])
+            open_points = [point for point in points if to_epoch(point['interval']['endTime']) > end]
+            if open_points:
+                open_series.append(dict(time_series, points=open_points))
+                time_series = dict(time_series, points=[point for point in points
+                                                        if to_epoch(point['interval']['endTime']) <= end])
+            closed_series.append(time_series)
+
+        header = {key: value for key, value in response.items() if key not in ['timeSeries', 'nextPageToken']}
+        return dict(header, timeSeries=closed_series), dict(header, timeSeries=open_series)
+
+    @staticmethod
+    def _merge_open_bucket(response, open_response, end, period):
+        """ Add the point of the open bucket to the series of response (built by make_response, so not shared)
+
+        Google stamps it with the requested end, which is off the grid. It is
+        moved to the bucket ending at the next boundary: an interval (end,
+        end + period] for DELTA / CUMULATIVE points, the instant end + period
+        for GAUGE points (no width), so it decodes right after the last
+        closed bucket whatever the metric kind.
+        """
+        series_by_key = {get_series_key(series): series for series in response['timeSeries']}
+        if 'unit' in open_response:
+            response.setdefault('unit', open_response['unit'])
+
+        bucket_end = format_epoch(end + period)
+        for time_series in open_response.get('timeSeries', []):
+            # Newest first, only the last partial bucket is kept
+            point = time_series['points'][0]
+            interval = point['interval']
+            if interval.get('startTime', interval['endTime']) == interval['endTime']:
+                start_time = bucket_end
+            else:
+                start_time = format_epoch(end)
+            points = [dict(point, interval={'startTime': start_time, 'endTime': bucket_end})]
+
+            series = series_by_key.get(get_series_key(time_series))
+            if series is not None:
+                series['points'] = points + series['points']
+            else:
+                response['timeSeries'].append(dict(time_series, points=points))
+
+    def _fetch_range(self, key, start, end, closed_until, fetch_range):
+        """ Buckets ending in (start, end]: the stored part from the store, the rest from Google
+        """
+        store = self.store
+        if store is None:
+            return [fetch_range(start, end)]
+
+        ranges, responses = self._read_store(store, key, start, end)
+        for _start, _end in ranges:
+            response = fetch_range(_start, _end)
+            self._write_store(store, key, _start, min(_end, closed_until), response)
+            responses.append(response)
+
+        return responses
+
+    async def _fetch_range_async(self, key, start, end, closed_until, fetch_range):
+        store = self.store
+        if store is None:
+            return [await fetch_range(start, end)]
+
+        ranges, responses = await asyncio.to_thread(self._read_store, store, key, start, end)
+        for _start, _end in ranges:
+            response = await fetch_range(_start, _end)
+            await asyncio.to_thread(self._write_store, store, key, _start, min(_end, closed_until), response)
+            responses.append(response)
+
+        return responses
+
+    @staticmethod
+    def _read_store(store, key, start, end):
+        """ ([ranges still to fetch], [stored response]) of the buckets ending in (start, end]
+        """
+        query_id = make_store_key(key)
+        stored = store.get_range(query_id)
+        if stored is None or stored[1] <= start or stored[0] >= end:
+            return [(start, end)], []
+
+        lo, hi = max(start, stored[0]), min(end, stored[1])
+        ranges = [(_start, _end) for _start, _end in [(start, lo), (hi, end)] if _end > _start]
+        return ranges, [store.read(query_id, lo, hi)]
+
+    @staticmethod
+    def _write_store(store, key, start, end, response):
+        try:
+            store.write(make_store_key(key), key[1] if len(key) > 1 else None, start, end, response)
+        except Exception as e:
+            _LOGGER.warning(f'[TimeSeriesCache] failed to write to {store.path}: {e}')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'entries': len(self._entries),
+                'points': sum(entry.point_count for entry in self._entries.values()),
+                'hits': self.hits,
+                'partial_hits': self.partial_hits,
+                'misses': self.misses
+            }
+            store = self.store
+
+        if store is not None:
+            stats.update({f'store_{key}': value for key, value in store.stats().items()})
+
+        return stats
+
+    def _evict(self):
+        point_count = sum(entry.point_count for entry in self._entries.values())
+        while self._entries and (len(self._entries) > self.max_entries or point_count > self.max_points):
+            _, entry = self._entries.popitem(last=False)
+            point_count -= entry.point_count
@@ -0,0 +1,280 @@
+""" SQLite tier under TimeSeriesCache for closed buckets
+
+Points of buckets that ended more than settle_seconds ago never change, so
+they are written through to a local SQLite file on fetch and read back from
+it instead of from Google, also after a restart. Each query (the cache key of
+TimeSeriesCache: credentials, project, filter, aligner, period, reducer) keeps
+one contiguous range of closed buckets; the series of the query are kept by
+their metric and resource labels.
+
+The file is bounded by max_points (least recently read queries go first) and
+a background compaction drops buckets older than max_age and vacuums it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from spaceone.monitoring.connector.google_cloud_connector.point_decoder import format_epoch, to_epoch
+
+__all__ = ['TimeSeriesStore', 'make_store_key']
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_POINTS = 10000000
+DEFAULT_MAX_AGE = 90 * 86400
+DEFAULT_COMPACT_INTERVAL = 3600
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS queries (query_id TEXT PRIMARY KEY, name TEXT, lo INTEGER, hi INTEGER, '
+    'unit TEXT, point_count INTEGER NOT NULL DEFAULT 0, accessed_at REAL)',
+    'CREATE TABLE IF NOT EXISTS series (query_id TEXT, series_id TEXT, header TEXT, '
+    'PRIMARY KEY (query_id, series_id)) WITHOUT ROWID',
+    # value has no type affinity: REAL for doubleValue, INTEGER for int64Value / boolValue, TEXT (JSON) otherwise
+    'CREATE TABLE IF NOT EXISTS points (query_id TEXT, series_id TEXT, bucket_end INTEGER, start_time REAL, '
+    'value_type TEXT, value, PRIMARY KEY (query_id, series_id, bucket_end)) WITHOUT ROWID'
+]
+
+_NUMBER_VALUE_TYPES = ['doubleValue', 'int64Value', 'boolValue']
+
+
+def make_store_key(key):
+    """ Stable id of a TimeSeriesCache key (a tuple of str, None and tuples)
+    """
+    return hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+
+
+def _make_series_id(series_header):
+    metric = series_header.get('metric', {})
+    resource = series_header.get('resource', {})
+    payload = [metric.get('type'), sorted(metric.get('labels', {}).items()),
+               resource.get('type'), sorted(resource.get('labels', {}).items())]
+    return hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest()
+
+
+def _encode_point(point):
+    value = point.get('value', {})
+    interval = point.get('interval', {})
+    start_time = to_epoch(interval['startTime']) if 'startTime' in interval else None
+
+    for value_type in _NUMBER_VALUE_TYPES:
+        if value_type in value:
+            number = value[value_type]
+            if value_type == 'int64Value':
+                number = int(number)
+            elif value_type == 'boolValue':
+                number = int(bool(number))
+            return start_time, value_type, number
+
+    return start_time, 'json', json.dumps(value)
+
+
+def _decode_point(bucket_end, start_time, value_type, value):
+    if value_type == 'json':
+        value = json.loads(value)
+    elif value_type == 'int64Value':
+        value = {value_type: str(value)}
+    elif value_type == 'boolValue':
+        value = {value_type: bool(value)}
+    else:
+        value = {value_type: value}
+
+    interval = {'endTime': format_epoch(bucket_end)}
+    if start_time is not None:
+        interval['startTime'] = format_epoch(start_time)
+
+    return {'interval': interval, 'value': value}
+
+
+class TimeSeriesStore(object):
+
+    def __init__(self, path, max_points=DEFAULT_MAX_POINTS, max_age=DEFAULT_MAX_AGE,
+                 compact_interval=DEFAULT_COMPACT_INTERVAL):
+        self.path = path
+        self.max_points = max_points
+        self.max_age = max_age
+        self.compact_interval = compact_interval
+        self.hits = 0
+        self.points_read = 0
+        self.points_written = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode = WAL')
+        self._connection.execute('PRAGMA synchronous = NORMAL')
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+
+        self._closed = threading.Event()
+        if compact_interval:
+            threading.Thread(target=self._compact_periodically, name='time-series-store-compaction',
+                             daemon=True).start()
+
+    def configure(self, max_points=None, max_age=None, compact_interval=None, **kwargs):
+        if max_points is not None:
+            self.max_points = max_points
+        if max_age is not None:
+            self.max_age = max_age
+        if compact_interval is not None:
+            self.compact_interval = compact_interval
+
+    def get_range(self, query_id):
+        """ (lo, hi) of the closed buckets stored for the query, None if there is none
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT lo, hi FROM queries WHERE query_id = ?', (query_id,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def read(self, query_id, lo, hi):
+        """ timeSeries.list-like response of the buckets ending in (lo, hi]
+        """
+        with self._lock:
+            connection = self._connection
+            unit_row = connection.execute('SELECT unit FROM queries WHERE query_id = ?', (query_id,)).fetchone()
+            headers = dict(connection.execute('SELECT series_id, header FROM series WHERE query_id = ?',
+                                              (query_id,)).fetchall())
+            rows = connection.execute('SELECT series_id, bucket_end, start_time, value_type, value FROM points '
+                                      'WHERE query_id = ? AND bucket_end > ? AND bucket_end <= ? '
+                                      'ORDER BY series_id, bucket_end DESC', (query_id, lo, hi)).fetchall()
+            connection.execute('UPDATE queries SET accessed_at = ? WHERE query_id = ?', (time.time(), query_id))
+            self.hits += 1
+            self.points_read += len(rows)
+
+        points_by_series = {}
+        for series_id, bucket_end, start_time, value_type, value in rows:
+            points_by_series.setdefault(series_id, []).append(_decode_point(bucket_end, start_time, value_type, value))
+
+        response = {'timeSeries': [dict(json.loads(headers[series_id]), points=points)
+                                   for series_id, points in points_by_series.items() if series_id in headers]}
+        if unit_row and unit_row[0] is not None:
+            response['unit'] = unit_row[0]
+
+        return response
+
+    def write(self, query_id, name, lo, hi, response):
+        """ Store the buckets of response ending in (lo, hi], which must all be closed
+
+        The range joins the stored one when they touch. A range apart from the
+        stored one replaces it, so a query always keeps one contiguous range.
+        """
+        if hi <= lo:
+            return
+
+        series_rows = []
+        point_rows = []
+        for time_series in response.get('timeSeries', []):
+            header = {key: value for key, value in time_series.items() if key != 'points'}
+            series_id = _make_series_id(header)
+            series_rows.append((query_id, series_id, json.dumps(header)))
+
+            for point in time_series.get('points', []):
+                bucket_end = int(to_epoch(point['interval']['endTime']))
+                if lo < bucket_end <= hi:
+                    point_rows.append((query_id, series_id, bucket_end, *_encode_point(point)))
+
+        with self._lock:
+            connection = self._connection
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                row = connection.execute('SELECT lo, hi FROM queries WHERE query_id = ?', (query_id,)).fetchone()
+                if row and (lo > row[1] or hi < row[0]):
+                    self._delete_query(query_id)
+                    row = None
+
+                if row:
+                    lo, hi = min(lo, row[0]), max(hi, row[1])
+
+                connection.execute('INSERT OR IGNORE INTO queries (query_id, name, point_count) VALUES (?, ?, 0)',
+                                   (query_id, name))
+                connection.executemany('INSERT OR IGNORE INTO series VALUES (?, ?, ?)', series_rows)
+
+                changes = connection.total_changes
+                connection.executemany('INSERT OR IGNORE INTO points VALUES (?, ?, ?, ?, ?, ?)', point_rows)
+                inserted = connection.total_changes - changes
+
+                connection.execute('UPDATE queries SET lo = ?, hi = ?, unit = COALESCE(?, unit), '
+                                   'point_count = point_count + ?, accessed_at = ? WHERE query_id = ?',
+                                   (lo, hi, response.get('unit'), inserted, time.time(), query_id))
+                self._evict()
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+            self.points_written += inserted
+
+    def compact(self):
+        """ Drop buckets older than max_age and give the free pages back to the file system
+        """
+        cutoff = int(time.time() - self.max_age)
+
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('DELETE FROM points WHERE bucket_end <= ?', (cutoff,))
+                connection.execute('UPDATE queries SET lo = ?, point_count = (SELECT COUNT(*) FROM points '
+                                   'WHERE points.query_id = queries.query_id) WHERE lo < ?', (cutoff, cutoff))
+                for (query_id,) in connection.execute('SELECT query_id FROM queries WHERE hi <= lo').fetchall():
+                    self._delete_query(query_id)
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+
+            connection.execute('VACUUM')
+
+        _LOGGER.debug(f'[TimeSeriesStore] compacted {self.path} (cutoff: {cutoff})')
+
+    def stats(self):
+        with self._lock:
+            queries, points = self._connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(point_count), 0) FROM queries').fetchone()
+            page_count = self._connection.execute('PRAGMA page_count').fetchone()[0]
+            page_size = self._connection.execute('PRAGMA page_size').fetchone()[0]
+
+        return {
+            'queries': queries,
+            'points': points,
+            'bytes': page_count * page_size,
+            'hits': self.hits,
+            'points_read': self.points_read,
+            'points_written': self.points_written
+        }
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self):
+        """ Least recently read queries go first, until max_points is met (called in a transaction)
+        """
+        connection = self._connection
+        total = connection.execute('SELECT COALESCE(SUM(point_count), 0) FROM queries').fetchone()[0]
+        if total <= self.max_points:
+            return
+
+        for query_id, point_count in connection.execute(
+                'SELECT query_id, point_count FROM queries ORDER BY accessed_at').fetchall():
+            self._delete_query(query_id)
+            total -= point_count
+            if total <= self.max_points:
+                break
+
+    def _delete_query(self, query_id):
+        for table in ['points', 'series', 'queries']:
+            self._connection.execute(f'DELETE FROM {table} WHERE query_id = ?', (query_id,))
+
+    def _compact_periodically(self):
+        while not self._closed.wait(self.compact_interval):
+            try:
+                self.compact()
+            except Exception as e:
+                _LOGGER.warning(f'[TimeSeriesStore] compaction of {self.path} failed: {e}')
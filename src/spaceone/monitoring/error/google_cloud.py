@@ -19,3 +19,19 @@ class ERROR_NOT_SUPPORT_ALIGN(ERROR_INVALID_ARGUMENT):
 class ERROR_NOT_SUPPORT_STAT(ERROR_INVALID_ARGUMENT):
     _message = 'Statistics option is invalid. (supported_stat = {supported_stat})'
 
+
+class ERROR_NOT_SUPPORT_REDUCER(ERROR_INVALID_ARGUMENT):
+    _message = 'Aggregation reducer is invalid. (supported_reducer = {supported_reducer})'
+
+
+class ERROR_INVALID_AGGREGATION(ERROR_INVALID_ARGUMENT):
+    _message = 'Aggregation option is invalid. (reason = {reason})'
+
+
+class ERROR_INVALID_MQL_QUERY(ERROR_INVALID_ARGUMENT):
+    _message = 'MQL query can not be made. (reason = {reason})'
+
+
+class ERROR_QUOTA_EXCEEDED(ERROR_BASE):
+    _status_code = 'RESOURCE_EXHAUSTED'
+    _message = 'Google Cloud Monitoring quota is exceeded, retry later. (project = {project})'
@@ -1,5 +1,8 @@
 from spaceone.api.monitoring.plugin import metric_pb2
 from spaceone.core.pygrpc.message_type import *
+from spaceone.monitoring import instrumentation
+from spaceone.monitoring.info.struct_encoder import encode_field, encode_list_value, encode_struct
+from spaceone.monitoring.model.metric_frame import MetricFrame
 
 __all__ = ['MetricsInfo', 'MetricDataInfo']
 
@@ -29,8 +32,13 @@ def MetricsInfo(result):
 
 
 def MetricDataInfo(metric_data):
-    info = {
-        'labels': change_list_value_type(metric_data.get('labels', [])),
-        'values': change_struct_type(metric_data['values'])
-    }
-    return metric_pb2.MetricDataInfo(**info)
+    # labels = 1 (ListValue), values = 2 (Struct), encoded without building a Value per point
+    with instrumentation.span('encode_response'):
+        if isinstance(metric_data, MetricFrame):
+            # The array('d') columns are encoded as they are, labels are formatted only here
+            labels, values = metric_data.labels, metric_data.columns
+        else:
+            labels, values = metric_data.get('labels', []), metric_data['values']
+
+        message = encode_field(b'\x0a', encode_list_value(labels)) + encode_field(b'\x12', encode_struct(values))
+        return metric_pb2.MetricDataInfo.FromString(message)
@@ -0,0 +1,303 @@
+""" Timing spans, counters and an OpenMetrics endpoint for the get_data hot path
+
+Every stage of a request runs in a span: the duration goes to the
+plugin_stage_duration_seconds histogram, and to the trace of the request when
+one is open (trace() in GoogleCloudManager), which is logged as one line at
+the end. Counters count API calls, pages, series and points. stats() of the
+caches and limiters are exposed as gauges through collectors.
+
+    INSTRUMENTATION = {'metrics_port': 9090}     # GET http://<plugin>:9090/metrics
+    INSTRUMENTATION = {'profile_enabled': True}  # allow options.profile
+    options = {'profile': True}                  # cProfile one get_data, top functions are logged
+"""
+
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+__all__ = ['span', 'trace', 'inc', 'observe', 'register_collector', 'render_metrics', 'start_metrics_server',
+           'profile', 'reset']
+_LOGGER = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'plugin'
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DEFAULT_PROFILE_LINES = 30
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+_CURRENT_TRACE = contextvars.ContextVar('plugin_trace', default=None)
+
+
+class _Histogram(object):
+
+    __slots__ = ['buckets', 'bucket_counts', 'sum', 'count']
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class _Registry(object):
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.collectors = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, labels=()):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(DURATION_BUCKETS)
+            histogram.observe(value)
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = [(key, list(histogram.bucket_counts), histogram.sum, histogram.count)
+                          for key, histogram in sorted(self.histograms.items())]
+            collectors = sorted(self.collectors.items())
+
+        lines = []
+        for name, samples in _group_by_name(counters):
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} counter')
+            for labels, value in samples:
+                lines.append(f'{METRIC_PREFIX}_{name}_total{_format_labels(labels)} {value}')
+
+        for name, samples in _group_by_name([(key, rest) for key, *rest in histograms]):
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} histogram')
+            lines.append(f'# UNIT {METRIC_PREFIX}_{name} seconds')
+            for labels, (bucket_counts, total, count) in samples:
+                cumulative = 0
+                for bound, bucket_count in zip(DURATION_BUCKETS, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f'{METRIC_PREFIX}_{name}_bucket{_format_labels(labels + (("le", bound),))} '
+                                 f'{cumulative}')
+                lines.append(f'{METRIC_PREFIX}_{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{METRIC_PREFIX}_{name}_sum{_format_labels(labels)} {total}')
+                lines.append(f'{METRIC_PREFIX}_{name}_count{_format_labels(labels)} {count}')
+
+        for name, (func, label) in collectors:
+            try:
+                stats = func()
+            except Exception as e:
+                _LOGGER.debug(f'[render] collector {name} failed: {e}')
+                continue
+            lines.extend(_render_stats(name, stats, label))
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+_REGISTRY = _Registry()
+
+
+def _group_by_name(items):
+    grouped = {}
+    for (name, labels), value in items:
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped.items()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _render_stats(name, stats, label):
+    """ A flat stats() dict becomes one gauge per number, {label value: stats} one gauge per number and label
+    """
+    samples = {}
+    if label:
+        for label_value, values in stats.items():
+            for key, value in values.items():
+                samples.setdefault(key, []).append((((label, label_value),), value))
+    else:
+        for key, value in stats.items():
+            samples.setdefault(key, []).append(((), value))
+
+    lines = []
+    for key, values in sorted(samples.items()):
+        values = [(labels, value) for labels, value in values
+                  if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        if not values:
+            continue
+        lines.append(f'# TYPE {METRIC_PREFIX}_{name}_{key} gauge')
+        for labels, value in values:
+            lines.append(f'{METRIC_PREFIX}_{name}_{key}{_format_labels(labels)} {value}')
+    return lines
+
+
+def inc(name, value=1, **labels):
+    """ Add value to the counter name (exposed as <name>_total)
+    """
+    _REGISTRY.inc(name, value, tuple(sorted(labels.items())))
+
+
+def observe(name, value, **labels):
+    _REGISTRY.observe(name, value, tuple(sorted(labels.items())))
+
+
+def register_collector(name, func, label=None):
+    """ Expose func() (a stats() dict) as gauges; label names the outer key of a {key: stats} dict
+    """
+    with _REGISTRY._lock:
+        _REGISTRY.collectors[name] = (func, label)
+
+
+def render_metrics():
+    return _REGISTRY.render()
+
+
+def reset():
+    """ Clear counters and histograms (tests and benchmarks)
+    """
+    with _REGISTRY._lock:
+        _REGISTRY.counters.clear()
+        _REGISTRY.histograms.clear()
+
+
+@contextmanager
+def span(stage, **labels):
+    """ Time a stage into stage_duration_seconds and the current trace
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        observe('stage_duration_seconds', seconds, stage=stage, **labels)
+        if error is not None:
+            inc('stage_errors', stage=stage, error=type(error).__name__)
+
+        spans = _CURRENT_TRACE.get()
+        if spans is not None:
+            spans.append((stage, seconds, error is not None))
+
+
+@contextmanager
+def trace(name, **fields):
+    """ Collect the spans of one request and log them as a single structured line
+
+    Worker threads see the trace when their task runs in a copy of the
+    caller's context (contextvars.copy_context().run).
+    """
+    spans = []
+    token = _CURRENT_TRACE.set(spans)
+    started = time.perf_counter()
+    try:
+        with span(name):
+            yield spans
+    finally:
+        _CURRENT_TRACE.reset(token)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f'[{name}] trace: {json.dumps(_summarize(spans, time.perf_counter() - started, fields))}')
+
+
+def _summarize(spans, seconds, fields):
+    stages = {}
+    for stage, stage_seconds, failed in spans:
+        summary = stages.setdefault(stage, {'count': 0, 'seconds': 0.0, 'errors': 0})
+        summary['count'] += 1
+        summary['seconds'] = round(summary['seconds'] + stage_seconds, 6)
+        summary['errors'] += int(failed)
+
+    return {**fields, 'seconds': round(seconds, 6), 'stages': stages}
+
+
+_METRICS_SERVER = None
+_METRICS_SERVER_LOCK = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ['/metrics', '/']:
+            self.send_error(404)
+            return
+
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        _LOGGER.debug(f'[metrics] {self.address_string()} {format % args}')
+
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """ Serve /metrics from a daemon thread, once per process; returns the server
+    """
+    global _METRICS_SERVER
+
+    with _METRICS_SERVER_LOCK:
+        if _METRICS_SERVER is None:
+            _METRICS_SERVER = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _METRICS_SERVER.daemon_threads = True
+            threading.Thread(target=_METRICS_SERVER.serve_forever, name='metrics-server', daemon=True).start()
+            _LOGGER.info(f'[start_metrics_server] OpenMetrics endpoint is listening on {host}:{port}/metrics')
+
+    return _METRICS_SERVER
+
+
+@contextmanager
+def profile(name, enabled=True, profile_dir=None, lines=DEFAULT_PROFILE_LINES):
+    """ cProfile the block: the top functions by cumulative time are logged,
+    and the raw stats are written to <profile_dir>/<name>-<pid>-<time>.prof for snakeviz / pstats
+
+    Only the calling thread is profiled. The API calls the connector runs in its
+    worker threads show up as the time spent waiting for them, see the spans of
+    the trace for their breakdown.
+    """
+    if not enabled:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(lines)
+        _LOGGER.info(f'[profile] {name} (pid = {os.getpid()})\n{output.getvalue()}')
+
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            path = os.path.join(profile_dir, f'{name}-{os.getpid()}-{int(time.time() * 1000)}.prof')
+            profiler.dump_stats(path)
+            _LOGGER.info(f'[profile] stats are written to {path}')
@@ -1,9 +1,16 @@
+import asyncio
+import hashlib
+import json
 import logging
-import time
+import math
+import threading
 
+from spaceone.core import config
 from spaceone.core.manager import BaseManager
+from spaceone.monitoring import instrumentation
 from spaceone.monitoring.error import *
 from spaceone.monitoring.connector.google_cloud_connector import GoogleCloudConnector
+from spaceone.monitoring.connector.google_cloud_connector.point_aligner import FILL_POLICIES
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,6 +21,144 @@ _STAT_MAP = {
     'SUM': 'ALIGN_SUM'
 }
 
+# Alignment periods the planner picks from (seconds). 60s is the minimum of Cloud Monitoring,
+# ranges beyond the last step use whole days.
+_PERIOD_LADDER = [60, 120, 300, 600, 900, 1200, 1800, 3600, 7200, 10800, 21600, 43200, 86400]
+DEFAULT_MAX_POINTS = 60
+
+_REDUCER_MAP = {
+    'MEAN': 'REDUCE_MEAN',
+    'MAX': 'REDUCE_MAX',
+    'MIN': 'REDUCE_MIN',
+    'SUM': 'REDUCE_SUM',
+    'COUNT': 'REDUCE_COUNT',
+    'PERCENTILE_50': 'REDUCE_PERCENTILE_50',
+    'PERCENTILE_95': 'REDUCE_PERCENTILE_95',
+    'PERCENTILE_99': 'REDUCE_PERCENTILE_99'
+}
+
+# 'list': timeSeries.list per filter, 'mql': timeSeries.query (Monitoring Query Language)
+_QUERY_BACKENDS = ['list', 'mql']
+
+
+class _Call(object):
+
+    __slots__ = ['event', 'result', 'error']
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _SingleFlight(object):
+    """ Runs identical concurrent calls only once
+
+    The first caller of a key (leader) runs the function, callers arriving
+    while it is in flight (followers) wait and receive the same result or
+    exception. Results are shared, so callers must not modify them.
+
+    A follower waits at most timeout seconds, then runs the function itself
+    instead of hanging on a stuck leader.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self.timeouts = 0
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not is_leader:
+            if not call.event.wait(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                _LOGGER.warning(f'[_SingleFlight.do] no result of the leader after {timeout}s, call it directly')
+                return func()
+
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key, func, timeout=None):
+        """ do() for a coroutine function, on one event loop: followers await the future of the leader
+
+        Followers of a leader that is cancelled (its client went away) call the function themselves.
+        """
+        with self._lock:
+            future = self._async_calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._async_calls[key] = asyncio.get_running_loop().create_future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not is_leader:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                _LOGGER.warning(f'[_SingleFlight.do_async] no result of the leader after {timeout}s, call it directly')
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            return await func()
+
+        try:
+            result = await func()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here, asyncio would log it when the leader had no follower
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[key]
+            if not future.done():
+                future.cancel()
+
+    def stats(self):
+        with self._lock:
+            total = self.leaders + self.followers
+            return {
+                'in_flight': len(self._calls) + len(self._async_calls),
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'timeouts': self.timeouts,
+                'coalescing_ratio': self.followers / total if total else 0.0
+            }
+
+
+_GET_DATA_FLIGHT = _SingleFlight()
+
+instrumentation.register_collector('single_flight', _GET_DATA_FLIGHT.stats)
+
 
 class GoogleCloudManager(BaseManager):
 
@@ -21,6 +166,10 @@ class GoogleCloudManager(BaseManager):
         super().__init__(*args, **kwargs)
         self.google_cloud_connector: GoogleCloudConnector = self.locator.get_connector('GoogleCloudConnector')
 
+        metrics_port = config.get_global('INSTRUMENTATION', {}).get('metrics_port')
+        if metrics_port:
+            instrumentation.start_metrics_server(metrics_port)
+
     def verify(self, schema, options, secret_data):
         """ Check connection
         """
@@ -30,14 +179,118 @@ class GoogleCloudManager(BaseManager):
         self.google_cloud_connector.set_connect(schema, {}, secret_data)
 
     def list_metrics(self, schema, options, secret_data, query):
+        """ options.projects: ['project-1', ...] lists the metrics of all of them with the same credentials
+        """
+        projects = self._get_projects(options)
         self.google_cloud_connector.set_connect(schema, options, secret_data)
-        return self.google_cloud_connector.list_metrics(query)
+        return self.google_cloud_connector.list_metrics(query, projects=projects)
 
     def get_metric_data(self, schema, options, secret_data, metric_query, metric, start, end, period, stat):
-        interval = self._make_period_from_time_range(start, end) if period is None else str(period) + 's'
-        stat = self._convert_stat(stat)
+        """ options.profile: True runs the call under cProfile (see instrumentation.profile)
+                         when INSTRUMENTATION.profile_enabled is set, it is ignored otherwise
+        """
+        profile_dir = config.get_global('INSTRUMENTATION', {}).get('profile_dir')
+
+        with instrumentation.profile('get_data', self._is_profile_enabled(options), profile_dir), \
+                instrumentation.trace('get_data', metric=metric, resources=len(metric_query)):
+            return self._get_metric_data(schema, options, secret_data, metric_query, metric, start, end, period,
+                                         stat)
+
+    def _get_metric_data(self, schema, options, secret_data, metric_query, metric, start, end, period, stat):
+        interval, stat, aggregation, all_series, mql, fill = self._convert_options(options, start, end, period, stat)
+
+        def _get_metric_data():
+            self.google_cloud_connector.set_connect(schema, options, secret_data)
+            return self.google_cloud_connector.get_metric_data(metric_query, metric, start, end, interval, stat,
+                                                               aggregation=aggregation, all_series=all_series,
+                                                               mql=mql, fill=fill)
+
+        single_flight_conf = config.get_global('SINGLE_FLIGHT', {})
+        if not single_flight_conf.get('enabled', True):
+            return _get_metric_data()
+
+        request_key = self._make_request_key(secret_data, self._get_request_options(options), metric_query, metric,
+                                             start, end, interval, stat)
+        return _GET_DATA_FLIGHT.do(request_key, _get_metric_data, single_flight_conf.get('wait_timeout'))
+
+    async def get_metric_data_async(self, schema, options, secret_data, metric_query, metric, start, end, period,
+                                    stat):
+        """ get_metric_data() with the Google calls awaited on the event loop (aio serving mode)
+
+        options.profile is ignored: cProfile would also measure every other
+        request the loop runs in the meantime.
+        """
+        interval, stat, aggregation, all_series, mql, fill = self._convert_options(options, start, end, period, stat)
+
+        async def _get_metric_data():
+            await self.google_cloud_connector.set_connect_async(schema, options, secret_data)
+            return await self.google_cloud_connector.get_metric_data_async(metric_query, metric, start, end,
+                                                                           interval, stat, aggregation=aggregation,
+                                                                           all_series=all_series, mql=mql,
+                                                                           fill=fill)
+
+        with instrumentation.trace('get_data', metric=metric, resources=len(metric_query)):
+            single_flight_conf = config.get_global('SINGLE_FLIGHT', {})
+            if not single_flight_conf.get('enabled', True):
+                return await _get_metric_data()
+
+            request_key = self._make_request_key(secret_data, self._get_request_options(options), metric_query,
+                                                 metric, start, end, interval, stat)
+            return await _GET_DATA_FLIGHT.do_async(request_key, _get_metric_data,
+                                                   single_flight_conf.get('wait_timeout'))
+
+    def stream_metric_data(self, schema, options, secret_data, metric_query, metric, start, end, period, stat):
+        """ Returns an iterator of the metric data of each resource, yielded as soon as it is fetched
+
+        Options and credentials are checked before returning, so those errors are
+        raised here instead of in the middle of the stream. An aggregated request
+        returns a few reduced series, so it comes as a single chunk.
+        """
+        interval, stat, aggregation, all_series, mql, fill = self._convert_options(options, start, end, period, stat)
+
         self.google_cloud_connector.set_connect(schema, options, secret_data)
-        return self.google_cloud_connector.get_metric_data(metric_query, metric, start, end, interval, stat)
+
+        if aggregation:
+            return iter([self.google_cloud_connector.get_metric_data(metric_query, metric, start, end, interval,
+                                                                     stat, aggregation=aggregation, fill=fill)])
+
+        return self.google_cloud_connector.iter_metric_data(metric_query, metric, start, end, interval, stat,
+                                                            all_series=all_series, mql=mql, fill=fill)
+
+    def _convert_options(self, options, start, end, period, stat):
+        """ (interval, stat, aggregation, all_series, mql, fill) of a get_data request, as the connector takes them
+        """
+        interval = self._make_period_from_time_range(start, end, self._get_max_points(options)) \
+            if period is None else str(period) + 's'
+        aggregation = self._convert_aggregation(options.get('aggregation'))
+
+        return (interval, self._convert_stat(stat), aggregation, options.get('all_series', False) is True,
+                self._convert_mql(options, aggregation), self._get_fill(options))
+
+    @staticmethod
+    def get_single_flight_stats():
+        return _GET_DATA_FLIGHT.stats()
+
+    @staticmethod
+    def _is_profile_enabled(options):
+        if options.get('profile') is not True:
+            return False
+
+        if not config.get_global('INSTRUMENTATION', {}).get('profile_enabled', False):
+            _LOGGER.debug('[_is_profile_enabled] options.profile is ignored (INSTRUMENTATION.profile_enabled = False)')
+            return False
+
+        return True
+
+    @staticmethod
+    def _get_request_options(options):
+        # profile does not change the result, a profiled call still shares it
+        return {key: value for key, value in options.items() if key != 'profile'}
+
+    @staticmethod
+    def _make_request_key(*args):
+        payload = json.dumps(args, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
 
     @staticmethod
     def _get_metric_filters(resource):
@@ -54,32 +307,105 @@ class GoogleCloudManager(BaseManager):
         return _STAT_MAP[stat]
 
     @staticmethod
-    def _make_period_from_time_range(start, end):
-        start_time = int(time.mktime(start.timetuple()))
-        end_time = int(time.mktime(end.timetuple()))
-        time_delta = end_time - start_time
-        interval = 0
-        # Max 60 point in start and end time range
-        if time_delta <= 60*60:         # ~ 1h
-            interval = 60
-        elif time_delta <= 60*60*6:     # 1h ~ 6h
-            interval = 60*10
-        elif time_delta <= 60*60*12:    # 6h ~ 12h
-            interval = 60*20
-        elif time_delta <= 60*60*24:    # 12h ~ 24h
-            interval = 60*30
-        elif time_delta <= 60*60*24*3:  # 1d ~ 2d
-            interval = 60*60
-        elif time_delta <= 60*60*24*7:  # 3d ~ 7d
-            interval = 60*60*3
-        elif time_delta <= 60*60*24*14:  # 1w ~ 2w
-            interval = 60*60*6
-        elif time_delta <= 60*60*24*14:  # 2w ~ 4w
-            interval = 60*60*12
-        else:                            # 4w ~
-            interval = 60*60*24
-
-        return str(interval)+'s'
+    def _convert_aggregation(aggregation):
+        """ options.aggregation: {'reducer': 'MEAN', 'group_by': ['resource.labels.zone']}
+
+        Returns None when the series of each resource are returned as they are.
+        """
+        if not aggregation:
+            return None
+
+        if not isinstance(aggregation, dict):
+            raise ERROR_INVALID_AGGREGATION(reason='aggregation must be a dict.')
+
+        reducer = aggregation.get('reducer', 'MEAN')
+        if reducer not in _REDUCER_MAP.keys():
+            raise ERROR_NOT_SUPPORT_REDUCER(supported_reducer=' | '.join(_REDUCER_MAP.keys()))
+
+        group_by = aggregation.get('group_by') or []
+        if not isinstance(group_by, list) or not all(isinstance(field, str) for field in group_by):
+            raise ERROR_INVALID_AGGREGATION(reason='group_by must be a list of label keys.')
+
+        return {
+            'reducer': _REDUCER_MAP[reducer],
+            'group_by': group_by
+        }
+
+    @staticmethod
+    def _convert_mql(options, aggregation=None):
+        """ options.query_backend: 'mql' (or options.mql) reads with one MQL query per group of resources
+
+        options.mql: {'query': "fetch gce_instance | {...} | ratio", 'resource_type': 'gce_instance'}, both optional.
+        Returns None for the list backend.
+        """
+        query_backend = options.get('query_backend') or ('mql' if options.get('mql') else 'list')
+        if query_backend not in _QUERY_BACKENDS:
+            raise ERROR_INVALID_PARAMETER(key='options.query_backend', reason=f'must be one of {_QUERY_BACKENDS}.')
+
+        if query_backend == 'list':
+            return None
+
+        mql = options.get('mql') or {}
+        if not isinstance(mql, dict):
+            raise ERROR_INVALID_PARAMETER(key='options.mql', reason='must be a dict.')
+
+        for key in ['query', 'resource_type']:
+            if mql.get(key) is not None and not isinstance(mql[key], str):
+                raise ERROR_INVALID_PARAMETER(key=f'options.mql.{key}', reason='must be a string.')
+
+        if aggregation:
+            raise ERROR_INVALID_PARAMETER(key='options.aggregation',
+                                          reason='is not supported by the mql backend, reduce in options.mql.query.')
+
+        return {'query': mql.get('query'), 'resource_type': mql.get('resource_type')}
+
+    @staticmethod
+    def _get_fill(options):
+        """ options.fill: how buckets without a point are filled once the series are aligned, or ALIGNMENT.fill
+
+        'null' | 'zero' | 'previous'; a None ALIGNMENT.fill turns the alignment off.
+        """
+        fill = options.get('fill') or config.get_global('ALIGNMENT', {}).get('fill')
+        if fill is not None and fill not in FILL_POLICIES:
+            raise ERROR_INVALID_PARAMETER(key='options.fill', reason=f'must be one of {FILL_POLICIES}.')
+
+        return fill
+
+    @staticmethod
+    def _get_projects(options):
+        projects = options.get('projects')
+        if projects is None:
+            return None
+
+        if not isinstance(projects, list) or not all(isinstance(project, str) and project for project in projects):
+            raise ERROR_INVALID_PARAMETER(key='options.projects', reason='must be a list of project ids.')
+
+        return projects
+
+    @staticmethod
+    def _get_max_points(options):
+        """ Point budget per series: options.max_points (e.g. the chart width) or PERIOD_PLANNER.max_points
+        """
+        max_points = options.get('max_points') or \
+            config.get_global('PERIOD_PLANNER', {}).get('max_points', DEFAULT_MAX_POINTS)
+
+        if isinstance(max_points, bool) or not isinstance(max_points, int) or max_points < 1:
+            raise ERROR_INVALID_PARAMETER(key='options.max_points', reason='must be a positive integer.')
+
+        return max_points
+
+    @staticmethod
+    def _make_period_from_time_range(start, end, max_points=DEFAULT_MAX_POINTS):
+        """ Finest alignment period that keeps a series of the time range within max_points
+        """
+        time_delta = max((end - start).total_seconds(), 0)
+        min_period = time_delta / max_points
+
+        for interval in _PERIOD_LADDER:
+            if interval >= min_period:
+                return str(interval) + 's'
+
+        return str(math.ceil(min_period / 86400) * 86400) + 's'
 
     @staticmethod
     def _get_chart_info(namespace, dimensions, metric_name):
@@ -1,7 +1,8 @@
 import logging
 
+from spaceone.core import config
 from spaceone.core.manager import BaseManager
-from spaceone.monitoring.model.metric_response_model import MetricsModel
+from spaceone.monitoring.model.metric_response_model import MetricsModel, build_metrics_response
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -13,9 +14,25 @@ class MetricManager(BaseManager):
 
     @staticmethod
     def make_metrics_response(metrics_info):
-        response_model = MetricsModel(metrics_info)
-        response_model.validate()
-        return response_model.to_primitive()
+        """ Validated with schematics in strict mode (RESPONSE_MODEL.strict), inline checks otherwise
+
+        errors of a partial result (options.projects) are passed through as they are.
+        """
+        errors = metrics_info.get('errors')
+        if errors is not None:
+            metrics_info = {key: value for key, value in metrics_info.items() if key != 'errors'}
+
+        if config.get_global('RESPONSE_MODEL', {}).get('strict', False):
+            response_model = MetricsModel(metrics_info)
+            response_model.validate()
+            response = response_model.to_primitive()
+        else:
+            response = build_metrics_response(metrics_info)
+
+        if errors:
+            response['errors'] = errors
+
+        return response
 
     @staticmethod
     def make_metric_data_response(metric_data_info):
@@ -1,2 +1,3 @@
 from spaceone.monitoring.model.data_source_response_model import *
-from spaceone.monitoring.model.metric_response_model import *
\ No newline at end of file
+from spaceone.monitoring.model.metric_response_model import *
+from spaceone.monitoring.model.metric_frame import *
@@ -2,7 +2,12 @@ from schematics.models import Model
 from schematics.types import BaseType, ListType, DictType, StringType, UnionType, IntType, FloatType
 from schematics.types.compound import ModelType
 
-__all__ = ['MetricsModel']
+from spaceone.core.error import ERROR_INVALID_PARAMETER_TYPE, ERROR_REQUIRED_PARAMETER
+
+__all__ = ['MetricsModel', 'build_metrics_response']
+
+_METRIC_REQUIRED_FIELDS = ('key', 'name', 'unit')
+_METRIC_FIELDS = frozenset(['key', 'name', 'unit', 'group', 'metric_query'])
 
 
 class MetricModel(Model):
@@ -16,3 +21,58 @@ class MetricModel(Model):
 class MetricsModel(Model):
     metrics = ListType(ModelType(MetricModel), required=True)
 
+
+def build_metrics_response(metrics_info):
+    """ Same output as MetricsModel(metrics_info).to_primitive() after validate(), without schematics
+
+    The checks of MetricModel are done inline per metric: required fields,
+    str key/name/group, dict unit of str values (a None value is a missing
+    required field, as in DictType(StringType)), dict metric_query, and no
+    unknown fields. Values are not coerced (schematics turns 1 into '1'),
+    they are rejected instead.
+    """
+    metrics = metrics_info.get('metrics')
+    if metrics is None:
+        raise ERROR_REQUIRED_PARAMETER(key='metrics')
+    if not isinstance(metrics, list):
+        raise ERROR_INVALID_PARAMETER_TYPE(key='metrics', type='list')
+
+    return {'metrics': [_build_metric(metric) for metric in metrics]}
+
+
+def _build_metric(metric):
+    for field in _METRIC_REQUIRED_FIELDS:
+        if metric.get(field) is None:
+            raise ERROR_REQUIRED_PARAMETER(key=f'metrics.{field}')
+
+    if not _METRIC_FIELDS.issuperset(metric):
+        rogue_fields = ', '.join(sorted(set(metric) - _METRIC_FIELDS))
+        raise ERROR_INVALID_PARAMETER_TYPE(key=f'metrics.{rogue_fields}', type='unknown field')
+
+    key = metric['key']
+    name = metric['name']
+    unit = metric['unit']
+    group = metric.get('group')
+    metric_query = metric.get('metric_query', {})
+
+    if type(key) is not str:
+        raise ERROR_INVALID_PARAMETER_TYPE(key='metrics.key', type='str')
+    if type(name) is not str:
+        raise ERROR_INVALID_PARAMETER_TYPE(key='metrics.name', type='str')
+    if not isinstance(unit, dict):
+        raise ERROR_INVALID_PARAMETER_TYPE(key='metrics.unit', type='dict of str')
+    for unit_key, value in unit.items():
+        if value is None:
+            raise ERROR_REQUIRED_PARAMETER(key=f'metrics.unit.{unit_key}')
+        if type(value) is not str:
+            raise ERROR_INVALID_PARAMETER_TYPE(key='metrics.unit', type='dict of str')
+    if metric_query is not None and not isinstance(metric_query, dict):
+        raise ERROR_INVALID_PARAMETER_TYPE(key='metrics.metric_query', type='dict')
+
+    response = {'key': key, 'name': name, 'unit': unit, 'metric_query': metric_query}
+    if group is not None:
+        if type(group) is not str:
+            raise ERROR_INVALID_PARAMETER_TYPE(key='metrics.group', type='str')
+        response['group'] = group
+
+    return response
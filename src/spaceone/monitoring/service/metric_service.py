@@ -58,7 +58,7 @@ class MetricService(BaseService):
             }
 
         Returns:
-            plugin_metric_data_response (dict)
+            plugin_metric_data_response (MetricFrame)
         """
         metric_data_info = self.google_mgr.get_metric_data(params.get('schema', DEFAULT_SCHEMA), params['options'],
                                                            params['secret_data'],
@@ -67,3 +67,44 @@ class MetricService(BaseService):
                                                            params.get('stat'))
 
         return self.metric_mgr.make_metric_data_response(metric_data_info)
+
+    @transaction(verb='get_data')
+    @check_required(['options', 'secret_data', 'metric_query', 'start', 'end'])
+    @change_timestamp_value(['start', 'end'], timestamp_format='iso8601')
+    async def get_data_async(self, params):
+        """Get Google StackDriver metric data, awaiting Google on the event loop (aio serving mode)
+
+        Args:
+            params (dict): same as get_data
+
+        Returns:
+            coroutine of plugin_metric_data_response (MetricFrame)
+        """
+        metric_data_info = await self.google_mgr.get_metric_data_async(params.get('schema', DEFAULT_SCHEMA),
+                                                                       params['options'], params['secret_data'],
+                                                                       params['metric_query'], params['metric'],
+                                                                       params['start'], params['end'],
+                                                                       params.get('period'), params.get('stat'))
+
+        return self.metric_mgr.make_metric_data_response(metric_data_info)
+
+    @transaction
+    @check_required(['options', 'secret_data', 'metric_query', 'start', 'end'])
+    @change_timestamp_value(['start', 'end'], timestamp_format='iso8601')
+    def stream_data(self, params):
+        """Get Google StackDriver metric data resource by resource
+
+        Args:
+            params (dict): same as get_data
+
+        Returns:
+            generator of plugin_metric_data_response (MetricFrame), one per resource
+        """
+        metric_data_stream = self.google_mgr.stream_metric_data(params.get('schema', DEFAULT_SCHEMA),
+                                                                params['options'], params['secret_data'],
+                                                                params['metric_query'], params['metric'],
+                                                                params['start'], params['end'],
+                                                                params.get('period'), params.get('stat'))
+
+        return (self.metric_mgr.make_metric_data_response(metric_data_info)
+                for metric_data_info in metric_data_stream)
@@ -0,0 +1,92 @@
+""" Server-streaming RPCs that are not part of the spaceone-api proto yet
+
+A servicer declares them in stream_methods ({method: RPC whose messages it
+reuses}) and extends StreamingAPI. They are wrapped like the proto RPCs
+(api_info, spaceone error codes) and registered on the server together with
+the servicer, by `spaceone grpc` (through pb2_grpc_module) as well as by
+aio_server.
+"""
+
+import logging
+
+import grpc
+
+from spaceone.core import config
+from spaceone.core.pygrpc import BaseAPI
+
+__all__ = ['StreamingAPI', 'add_stream_handlers', 'get_servicer_base']
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_servicer_base(api_class):
+    for base in api_class.__mro__:
+        if base.__module__ == api_class.pb2_grpc.__name__:
+            return base
+    raise ValueError(f'{api_class.__name__} does not implement a servicer of {api_class.pb2_grpc.__name__}')
+
+
+def add_stream_handlers(server, api_class, servicer, behavior_factory=None):
+    """ Register the stream_methods of api_class, reusing the messages of an existing RPC
+
+    behavior_factory(name) returns the handler of a method, the bound servicer
+    method by default (for a grpc.server).
+    """
+    stream_methods = getattr(api_class, 'stream_methods', {})
+    if not stream_methods:
+        return
+
+    behavior_factory = behavior_factory or (lambda name: getattr(servicer, name))
+    service_name = get_servicer_base(api_class).__name__[:-len('Servicer')]
+    service = api_class.pb2.DESCRIPTOR.services_by_name[service_name]
+
+    method_handlers = {}
+    for name, reused_method_name in stream_methods.items():
+        reused_method = service.methods_by_name[reused_method_name]
+        request_class = getattr(api_class.pb2, reused_method.input_type.name)
+        response_class = getattr(api_class.pb2, reused_method.output_type.name)
+        method_handlers[name] = grpc.unary_stream_rpc_method_handler(
+            behavior_factory(name),
+            request_deserializer=request_class.FromString,
+            response_serializer=response_class.SerializeToString)
+
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(service.full_name, method_handlers),))
+    _LOGGER.debug(f'[add_stream_handlers] {service.full_name}: {list(method_handlers.keys())}')
+
+
+class _StreamingGrpcModule(object):
+    """ pb2_grpc module whose add_<Name>Servicer_to_server also registers the stream_methods
+    """
+
+    def __init__(self, pb2_grpc, api_class):
+        self._pb2_grpc = pb2_grpc
+        self._api_class = api_class
+
+    def __getattr__(self, name):
+        attr = getattr(self._pb2_grpc, name)
+        if not (name.startswith('add_') and name.endswith('Servicer_to_server')):
+            return attr
+
+        def _add_servicer_to_server(servicer, server):
+            attr(servicer, server)
+            add_stream_handlers(server, self._api_class, servicer)
+
+        return _add_servicer_to_server
+
+
+class StreamingAPI(BaseAPI):
+    """ BaseAPI that also serves the stream_methods of the servicer
+    """
+
+    stream_methods = {}
+
+    @property
+    def pb2_grpc_module(self):
+        # spaceone.core.pygrpc.server registers servicers with pb2_grpc_module.add_<Name>Servicer_to_server
+        return _StreamingGrpcModule(self.pb2_grpc, self.__class__)
+
+    def _set_grpc_method(self):
+        super()._set_grpc_method()
+
+        # Not in the servicer base class, so BaseAPI does not wrap them
+        for name in self.stream_methods:
+            setattr(self, name, self._grpc_method(getattr(self.__class__, name), config.get_service()))
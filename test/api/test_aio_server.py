@@ -0,0 +1,115 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+import unittest
+from array import array
+from unittest.mock import patch
+
+import grpc
+from google.protobuf import json_format
+
+from spaceone.core import config
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.api.monitoring.plugin import metric_pb2, metric_pb2_grpc
+from spaceone.monitoring import aio_server
+from spaceone.monitoring.api.plugin.metric import PARTIAL_ERRORS_KEY
+from spaceone.monitoring.error import ERROR_INVALID_PARAMETER
+from spaceone.monitoring.manager.google_cloud_manager import GoogleCloudManager
+from spaceone.monitoring.model.metric_frame import MetricFrame
+
+
+def _get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def _make_request():
+    method = metric_pb2.DESCRIPTOR.services_by_name['Metric'].methods_by_name['get_data']
+    return json_format.ParseDict({
+        'options': {},
+        'secret_data': {'project_id': 'project-1'},
+        'metric_query': {'cloud-svc-1': {'name': 'projects/project-1'}},
+        'metric': 'compute.googleapis.com/instance/cpu/utilization',
+        'start': '2020-08-06T00:00:00Z',
+        'end': '2020-08-06T01:00:00Z'
+    }, getattr(metric_pb2, method.input_type.name)(), ignore_unknown_fields=True)
+
+
+class TestAioServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package='spaceone.monitoring')
+        config.set_service_config()
+        super().setUpClass()
+
+    def _call_get_data(self, count=1):
+        port = _get_free_port()
+
+        def _call():
+            with grpc.insecure_channel(f'localhost:{port}') as channel:
+                get_data = metric_pb2_grpc.MetricStub(channel).get_data
+                futures = [get_data.future(_make_request(), timeout=10) for _ in range(count)]
+                return [(future.result(), dict(future.trailing_metadata())) for future in futures]
+
+        async def _run():
+            server = aio_server.create_server(port, max_workers=1)
+            await server.start()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, _call)
+            finally:
+                await server.stop(None)
+
+        return asyncio.run(_run())
+
+    def test_await_get_data_on_event_loop(self):
+        threads = []
+
+        async def _get_metric_data_async(*args):
+            threads.append(threading.current_thread())
+            # Every call is in flight at once although the executor has a single worker
+            await asyncio.sleep(0.2)
+            metric_data_frame = MetricFrame(errors=[{'cloud_service_id': 'cloud-svc-2', 'name': 'projects/project-2',
+                                                     'status': 403, 'message': 'Permission denied'}])
+            metric_data_frame.add('cloud-svc-1', array('d', [1596672060.0]), array('d', [1.0]))
+            return metric_data_frame
+
+        with patch.object(GoogleCloudManager, 'get_metric_data_async', side_effect=_get_metric_data_async), \
+                patch.object(GoogleCloudManager, 'get_metric_data') as get_metric_data:
+            started = time.monotonic()
+            results = self._call_get_data(count=8)
+            elapsed = time.monotonic() - started
+
+        get_metric_data.assert_not_called()
+        self.assertEqual(len(set(threads)), 1)
+        self.assertLess(elapsed, 8 * 0.2)
+        for response, trailing_metadata in results:
+            self.assertEqual(json_format.MessageToDict(response)['values'], {'cloud-svc-1': [1.0]})
+            self.assertEqual(json.loads(trailing_metadata[PARTIAL_ERRORS_KEY])[0]['cloud_service_ids'],
+                             ['cloud-svc-2'])
+
+    def test_map_errors_to_status_code(self):
+        async def _fail(*args):
+            raise ERROR_INVALID_PARAMETER(key='options.fill', reason='must be one of the fill policies.')
+
+        with patch.object(GoogleCloudManager, 'get_metric_data_async', side_effect=_fail):
+            with self.assertRaises(grpc.RpcError) as context:
+                self._call_get_data()
+
+        self.assertEqual(context.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+        self.assertIn('ERROR_INVALID_PARAMETER', context.exception.details())
+
+    def test_map_unknown_errors_to_status_code(self):
+        with patch.object(GoogleCloudManager, 'get_metric_data_async', side_effect=RuntimeError('loop closed')):
+            with self.assertRaises(grpc.RpcError) as context:
+                self._call_get_data()
+
+        self.assertEqual(context.exception.code(), grpc.StatusCode.INTERNAL)
+        self.assertIn('ERROR_UNKNOWN', context.exception.details())
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
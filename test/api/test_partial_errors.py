@@ -0,0 +1,90 @@
+import json
+import socket
+import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import grpc
+from google.protobuf import json_format
+
+from spaceone.core import config
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.api.monitoring.plugin import metric_pb2, metric_pb2_grpc
+from spaceone.monitoring.api.plugin.metric import (MAX_PARTIAL_ERRORS_BYTES, PARTIAL_ERRORS_KEY, Metric,
+                                                   _make_partial_errors)
+from spaceone.monitoring.manager.google_cloud_manager import GoogleCloudManager
+from spaceone.monitoring.model.metric_frame import MetricFrame
+
+# str() of an HttpError of a batched unit: the request URI carries the whole one_of() filter
+_LONG_MESSAGE = '<HttpError 403 when requesting https://monitoring.googleapis.com/v3/projects/project-2/timeSeries' \
+                '?filter=' + 'x' * 1800 + ' returned "Permission denied">'
+
+
+def _make_errors(count, message=_LONG_MESSAGE):
+    return [{'cloud_service_id': f'cloud-svc-{index}', 'name': f'projects/project-{index % 2 + 2}',
+             'status': 403, 'message': message} for index in range(count)]
+
+
+def _get_metric_data(*args):
+    metric_data_frame = MetricFrame(errors=_make_errors(500) + _make_errors(1, 'Deadline exceeded'))
+    metric_data_frame.add('cloud-svc-ok', array('d', [1596672060.0]), array('d', [1.0]))
+    return metric_data_frame
+
+
+class TestPartialErrors(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package='spaceone.monitoring')
+        config.set_service_config()
+        super().setUpClass()
+
+    def test_group_and_cap_errors(self):
+        partial_errors = json.loads(_make_partial_errors(_make_errors(500)))
+
+        self.assertEqual([(error['name'], error['count'], len(error['cloud_service_ids'])) for error in partial_errors],
+                         [('projects/project-2', 250, 20), ('projects/project-3', 250, 20)])
+
+        errors = [dict(error, message=f'{index}: {_LONG_MESSAGE}') for index, error in enumerate(_make_errors(100))]
+        value = _make_partial_errors(errors)
+        partial_errors = json.loads(value)
+
+        self.assertLessEqual(len(value), MAX_PARTIAL_ERRORS_BYTES)
+        self.assertEqual(sum(error.get('count', 0) + error.get('omitted', 0) for error in partial_errors), 100)
+        self.assertIn('omitted', partial_errors[-1])
+
+    @patch.object(GoogleCloudManager, 'get_metric_data', side_effect=_get_metric_data)
+    def test_get_data_with_many_errors(self, *args):
+        with socket.socket() as sock:
+            sock.bind(('localhost', 0))
+            port = sock.getsockname()[1]
+
+        server = grpc.server(ThreadPoolExecutor(max_workers=2))
+        metric_pb2_grpc.add_MetricServicer_to_server(Metric(), server)
+        server.add_insecure_port(f'localhost:{port}')
+        server.start()
+
+        method = metric_pb2.DESCRIPTOR.services_by_name['Metric'].methods_by_name['get_data']
+        request = json_format.ParseDict({
+            'options': {},
+            'secret_data': {'project_id': 'project-1'},
+            'metric_query': {'cloud-svc-ok': {'name': 'projects/project-1'}},
+            'metric': 'compute.googleapis.com/instance/cpu/utilization',
+            'start': '2020-08-06T00:00:00Z',
+            'end': '2020-08-06T01:00:00Z'
+        }, getattr(metric_pb2, method.input_type.name)(), ignore_unknown_fields=True)
+
+        try:
+            with grpc.insecure_channel(f'localhost:{port}') as channel:
+                response, call = metric_pb2_grpc.MetricStub(channel).get_data.with_call(request, timeout=10)
+        finally:
+            server.stop(None)
+
+        self.assertEqual(json_format.MessageToDict(response)['values'], {'cloud-svc-ok': [1.0]})
+        partial_errors = json.loads(dict(call.trailing_metadata())[PARTIAL_ERRORS_KEY])
+        self.assertEqual(sum(error.get('count', 0) + error.get('omitted', 0) for error in partial_errors), 501)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,117 @@
+import asyncio
+import socket
+import unittest
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import grpc
+from google.protobuf import json_format
+
+from spaceone.core import config
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.api.monitoring.plugin import metric_pb2
+from spaceone.monitoring import aio_server
+from spaceone.monitoring.api.plugin.metric import Metric
+from spaceone.monitoring.error import ERROR_INVALID_PARAMETER
+from spaceone.monitoring.manager.google_cloud_manager import GoogleCloudManager
+from spaceone.monitoring.model.metric_frame import MetricFrame
+
+STREAM_DATA = '/spaceone.api.monitoring.plugin.Metric/stream_data'
+
+
+def _get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def _make_request():
+    method = metric_pb2.DESCRIPTOR.services_by_name['Metric'].methods_by_name['get_data']
+    request = getattr(metric_pb2, method.input_type.name)()
+    return json_format.ParseDict({
+        'options': {},
+        'secret_data': {'project_id': 'project-1'},
+        'metric_query': {'cloud-svc-1': {'name': 'projects/project-1'}},
+        'metric': 'compute.googleapis.com/instance/cpu/utilization',
+        'start': '2020-08-06T00:00:00Z',
+        'end': '2020-08-06T01:00:00Z'
+    }, request, ignore_unknown_fields=True)
+
+
+def _stream_metric_data(*args):
+    for index in range(2):
+        metric_data_frame = MetricFrame()
+        metric_data_frame.add(f'cloud-svc-{index}', array('d', [1596672060.0]), array('d', [float(index)]))
+        yield metric_data_frame
+
+
+def _fail(*args):
+    raise ERROR_INVALID_PARAMETER(key='options.fill', reason='must be one of the fill policies.')
+
+
+def _get_response_class():
+    method = metric_pb2.DESCRIPTOR.services_by_name['Metric'].methods_by_name['get_data']
+    return getattr(metric_pb2, method.output_type.name)
+
+
+class TestStreamData(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package='spaceone.monitoring')
+        config.set_service_config()
+        super().setUpClass()
+
+    def _call(self, port):
+        with grpc.insecure_channel(f'localhost:{port}') as channel:
+            stream_data = channel.unary_stream(STREAM_DATA, request_serializer=type(_make_request()).SerializeToString,
+                                               response_deserializer=_get_response_class().FromString)
+            return [json_format.MessageToDict(response) for response in stream_data(_make_request(), timeout=10)]
+
+    def _call_sync_server(self):
+        # Registered like spaceone.core.pygrpc.server does for `spaceone grpc`
+        port = _get_free_port()
+        server = grpc.server(ThreadPoolExecutor(max_workers=4))
+        servicer = Metric()
+        getattr(servicer.pb2_grpc_module, f'add_{servicer.name}Servicer_to_server')(servicer, server)
+        server.add_insecure_port(f'localhost:{port}')
+        server.start()
+        try:
+            return self._call(port)
+        finally:
+            server.stop(None)
+
+    def _call_aio_server(self):
+        port = _get_free_port()
+
+        async def _run():
+            server = aio_server.create_server(port, max_workers=4)
+            await server.start()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, self._call, port)
+            finally:
+                await server.stop(None)
+
+        return asyncio.run(_run())
+
+    @patch.object(GoogleCloudManager, 'stream_metric_data', side_effect=_stream_metric_data)
+    def test_stream_data(self, *args):
+        for call in [self._call_sync_server, self._call_aio_server]:
+            responses = call()
+
+            self.assertEqual([response['values'] for response in responses],
+                             [{'cloud-svc-0': [0.0]}, {'cloud-svc-1': [1.0]}])
+
+    @patch.object(GoogleCloudManager, 'stream_metric_data', side_effect=_fail)
+    def test_map_errors_to_status_code(self, *args):
+        for call in [self._call_sync_server, self._call_aio_server]:
+            with self.assertRaises(grpc.RpcError) as context:
+                call()
+
+            self.assertEqual(context.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+            self.assertIn('ERROR_INVALID_PARAMETER', context.exception.details())
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
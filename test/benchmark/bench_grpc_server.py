@@ -0,0 +1,195 @@
+""" Throughput of Metric.get_data on the default gRPC server and on the aio server
+
+Only the HTTP round trip to Google is simulated: PooledHttp.request sleeps
+(default server, a worker thread waits) and AsyncHttp.request awaits a sleep
+(aio server, nothing waits but the coroutine), both returning the same
+timeSeries.list page. Everything above the transport (service, manager,
+connector, discovery client, decoding) runs as in production. The cache,
+single flight and rate limiter are disabled and every call asks for another
+resource, so each get_data makes one Google call.
+
+The server runs in a process of its own, so that it does not share the GIL
+with the clients. Each of --concurrency clients sends --rounds calls one
+after the other. The default server is bounded by MAX_WORKERS / latency
+calls per second, the aio server by the CPU time of a call.
+
+    python -m test.benchmark.bench_grpc_server --concurrency 100 500 1000 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import grpc
+import httplib2
+from google.protobuf import json_format
+
+from spaceone.core import config
+from spaceone.api.monitoring.plugin import metric_pb2, metric_pb2_grpc
+from spaceone.monitoring import aio_server
+from spaceone.monitoring.api.plugin.metric import Metric
+from spaceone.monitoring.connector.google_cloud_connector import GoogleCloudConnector
+from spaceone.monitoring.connector.google_cloud_connector.aio_transport import AsyncHttp
+from spaceone.monitoring.connector.google_cloud_connector.http_transport import PooledHttp
+
+PORT = 50151
+METRIC_TYPE = 'compute.googleapis.com/instance/cpu/utilization'
+
+
+def _make_page():
+    return json.dumps({
+        'timeSeries': [{
+            'metric': {'type': METRIC_TYPE, 'labels': {}},
+            'resource': {'type': 'gce_instance', 'labels': {'instance_id': 'instance-0'}},
+            'points': [{
+                'interval': {'startTime': f'2020-08-06T00:{minute:02d}:00Z',
+                             'endTime': f'2020-08-06T00:{minute:02d}:00Z'},
+                'value': {'doubleValue': float(minute)}
+            } for minute in range(59, -1, -1)]
+        }],
+        'unit': '10^2.%'
+    }).encode('utf-8')
+
+
+def _make_fake_transport(latency):
+    page = _make_page()
+
+    def _request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        time.sleep(latency)
+        return httplib2.Response({'status': '200'}), page
+
+    async def _request_async(self, uri, method='GET', body=None, headers=None):
+        await asyncio.sleep(latency)
+        return httplib2.Response({'status': '200'}), page
+
+    return _request, _request_async
+
+
+def _make_credentials(secret_data):
+    return Mock(valid=True, universe_domain='googleapis.com')
+
+
+def _make_get_data_request(index):
+    method = metric_pb2.DESCRIPTOR.services_by_name['Metric'].methods_by_name['get_data']
+    request = getattr(metric_pb2, method.input_type.name)()
+    return json_format.ParseDict({
+        'options': {},
+        'secret_data': {'project_id': 'benchmark'},
+        'metric_query': {
+            f'cloud-svc-{index}': {
+                'name': 'projects/benchmark',
+                'resource_id': f'instance-{index}',
+                'filter': {
+                    'metric_type': METRIC_TYPE,
+                    'labels': [{'key': 'resource.labels.instance_id', 'value': f'instance-{index}'}]
+                }
+            }
+        },
+        'metric': METRIC_TYPE,
+        'start': '2020-08-06T00:00:00Z',
+        'end': '2020-08-06T01:00:00Z',
+        'period': 60
+    }, request, ignore_unknown_fields=True)
+
+
+async def _run_clients(port, concurrency, rounds):
+    latencies = []
+
+    async with grpc.aio.insecure_channel(f'localhost:{port}') as channel:
+        stub = metric_pb2_grpc.MetricStub(channel)
+
+        async def _client(client_index):
+            for round_index in range(rounds):
+                started = time.perf_counter()
+                await stub.get_data(_make_get_data_request(round_index * concurrency + client_index), timeout=600)
+                latencies.append(time.perf_counter() - started)
+
+        await _client(-1)
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*[_client(client_index) for client_index in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[int(len(latencies) * 0.99) - 1]
+
+
+def _serve_sync(ready):
+    # Same registration as spaceone.core.pygrpc.server, with its MAX_WORKERS thread pool
+    server = grpc.server(ThreadPoolExecutor(max_workers=config.get_global('MAX_WORKERS')))
+    servicer = Metric()
+    getattr(servicer.pb2_grpc_module, f'add_{servicer.name}Servicer_to_server')(servicer, server)
+    server.add_insecure_port(f'[::]:{PORT}')
+    server.start()
+    ready.set()
+    server.wait_for_termination()
+
+
+def _serve_aio(ready):
+    async def _serve():
+        server = aio_server.create_server(PORT)
+        await server.start()
+        ready.set()
+        await server.wait_for_termination()
+
+    asyncio.run(_serve())
+
+
+def _serve(server_name, latency, ready):
+    config.init_conf(package='spaceone.monitoring')
+    config.set_service_config()
+    _set_benchmark_config()
+    request, request_async = _make_fake_transport(latency)
+
+    with patch.object(PooledHttp, 'request', request), patch.object(AsyncHttp, 'request', request_async), \
+            patch.object(GoogleCloudConnector, '_build_credentials', side_effect=_make_credentials):
+        _serve_sync(ready) if server_name == 'sync' else _serve_aio(ready)
+
+
+def _set_benchmark_config():
+    connector_conf = copy.deepcopy(config.get_global('CONNECTORS'))
+    google_cloud_conf = connector_conf['GoogleCloudConnector']
+    google_cloud_conf['rate_limit']['enabled'] = False
+    google_cloud_conf['time_series_cache']['enabled'] = False
+    config.set_global(CONNECTORS=connector_conf, SINGLE_FLIGHT={'enabled': False})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--rounds', type=int, default=3, help='calls per client')
+    parser.add_argument('--latency', type=float, default=0.2, help='simulated Google API latency (seconds)')
+    args = parser.parse_args()
+
+    config.init_conf(package='spaceone.monitoring')
+    config.set_service_config()
+    context = multiprocessing.get_context('spawn')
+
+    results = {}
+    for server_name in ['sync', 'aio']:
+        ready = context.Event()
+        server = context.Process(target=_serve, args=(server_name, args.latency, ready), daemon=True)
+        server.start()
+        try:
+            ready.wait(60)
+            results[server_name] = [asyncio.run(_run_clients(PORT, concurrency, args.rounds))
+                                    for concurrency in args.concurrency]
+        finally:
+            server.terminate()
+            server.join()
+
+    print(f'MAX_WORKERS={config.get_global("MAX_WORKERS")}, latency={args.latency}s, rounds={args.rounds}')
+    print(f'{"concurrency":>12}' + ''.join(f'{f"{name} rps":>12}{f"{name} p99 (s)":>14}' for name in results))
+    for index, concurrency in enumerate(args.concurrency):
+        print(f'{concurrency:>12}' + ''.join(f'{rps:>12.1f}{p99:>14.3f}' for rps, p99 in
+                                             (results[name][index] for name in results)))
+
+
+if __name__ == '__main__':
+    main()
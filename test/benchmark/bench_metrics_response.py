@@ -0,0 +1,59 @@
+""" Metric.list response building: schematics models vs inline checks
+
+    python -m test.benchmark.bench_metrics_response --metrics 10000
+"""
+
+import argparse
+import time
+
+from spaceone.monitoring.model.metric_response_model import MetricsModel, build_metrics_response
+
+
+def _make_metrics_info(count):
+    return {
+        'metrics': [{
+            'key': f'compute.googleapis.com/instance/metric_{index}',
+            'name': f'Metric {index}',
+            'unit': {'x': 'Timestamp', 'y': 'Bytes'},
+            'metric_query': {
+                'name': 'projects/project-1',
+                'resource_id': 'instance-1',
+                'filter': {
+                    'metric_type': f'compute.googleapis.com/instance/metric_{index}',
+                    'labels': [{'key': 'resource.labels.instance_id', 'value': '1000001'}]
+                }
+            }
+        } for index in range(count)]
+    }
+
+
+def _schematics(metrics_info):
+    response_model = MetricsModel(metrics_info)
+    response_model.validate()
+    return response_model.to_primitive()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--metrics', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"metrics":>10} {"schematics ms":>15} {"inline ms":>15} {"speedup":>10}')
+    for count in args.metrics:
+        metrics_info = _make_metrics_info(count)
+        assert build_metrics_response(metrics_info) == _schematics(metrics_info)
+
+        elapsed = {}
+        for name, func in [('schematics', _schematics), ('inline', build_metrics_response)]:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                func(metrics_info)
+            elapsed[name] = (time.perf_counter() - started) / args.repeat * 1000
+
+        print(f'{count:>10} {elapsed["schematics"]:>15.1f} {elapsed["inline"]:>15.1f} '
+              f'{elapsed["schematics"] / elapsed["inline"]:>9.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+""" Offline benchmark of Metric.list, Metric.get_data and DataSource.verify
+
+The Google client is replaced by FakeMonitoringClient, so no GCP project or
+credentials are needed. Each scenario runs the service layer plus the
+protobuf conversion done by the API layer and reports p50/p99 latency,
+throughput and peak traced memory.
+
+    python -m test.benchmark.bench_plugin --resources 50 --hours 24 --concurrency 8
+    python -m test.benchmark.bench_plugin --no-cache --max-p99-ms get_data=500 --json result.json
+
+A scenario whose p99 exceeds --max-p99-ms makes the run exit with 1, so this
+can gate a CI job.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from spaceone.core import config
+from spaceone.core.transaction import Transaction
+from spaceone.monitoring.connector.google_cloud_connector import GoogleCloudConnector
+from spaceone.monitoring.info.metric_info import MetricsInfo, MetricDataInfo
+from spaceone.monitoring.service.data_source_service import DataSourceService
+from spaceone.monitoring.service.metric_service import MetricService
+from test.benchmark.fake_monitoring import FakeMonitoringClient
+
+SECRET_DATA = {'project_id': 'fake-project', 'client_email': 'benchmark@fake-project.iam.gserviceaccount.com'}
+
+
+def _make_metric_query(resources):
+    return {
+        f'cloud-svc-{index}': {
+            'name': 'projects/fake-project',
+            'resource_id': f'instance-{index}',
+            'filter': {
+                'metric_type': 'compute.googleapis.com/instance/cpu/utilization',
+                'labels': [{'key': 'resource.labels.instance_id', 'value': str(1000000 + index)}]
+            }
+        } for index in range(resources)
+    }
+
+
+def _make_scenarios(args):
+    end = datetime.utcnow()
+    start = end - timedelta(hours=args.hours)
+
+    def _list():
+        metric_svc = MetricService(transaction=Transaction({'service': 'monitoring', 'api_class': 'Metric'}))
+        return MetricsInfo(metric_svc.list({
+            'options': {},
+            'secret_data': SECRET_DATA,
+            'query': {
+                'name': 'projects/fake-project',
+                'resource_id': 'instance-0',
+                'filters': [{'metric_type': 'compute.googleapis.com',
+                             'labels': [{'key': 'resource.labels.instance_id', 'value': '1000000'}]}]
+            }
+        }))
+
+    def _get_data():
+        metric_svc = MetricService(transaction=Transaction({'service': 'monitoring', 'api_class': 'Metric'}))
+        return MetricDataInfo(metric_svc.get_data({
+            'options': {},
+            'secret_data': SECRET_DATA,
+            'metric_query': _make_metric_query(args.resources),
+            'metric': 'compute.googleapis.com/instance/cpu/utilization',
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'period': args.period
+        }))
+
+    def _verify():
+        data_source_svc = DataSourceService(transaction=Transaction({'service': 'monitoring',
+                                                                     'api_class': 'DataSource'}))
+        return data_source_svc.verify({'options': {}, 'secret_data': SECRET_DATA})
+
+    return {'list': _list, 'get_data': _get_data, 'verify': _verify}
+
+
+def _run_scenario(func, iterations, concurrency):
+    latencies = []
+
+    def _timed_call(_):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(_timed_call, range(iterations)))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'throughput_rps': iterations / elapsed,
+        'peak_memory_mb': peak / 1024 / 1024
+    }
+
+
+def _disable_caches():
+    connectors = config.get_global('CONNECTORS')
+    connector_conf = connectors['GoogleCloudConnector']
+    connector_conf['metric_catalog'] = dict(connector_conf.get('metric_catalog', {}), enabled=False)
+    connector_conf['time_series_cache'] = dict(connector_conf.get('time_series_cache', {}), enabled=False)
+    config.set_global(CONNECTORS=connectors, SINGLE_FLIGHT={'enabled': False})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenarios', nargs='+', default=['list', 'get_data', 'verify'])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--resources', type=int, default=50, help='resources in metric_query of get_data')
+    parser.add_argument('--hours', type=int, default=24, help='time range of get_data')
+    parser.add_argument('--period', type=int, default=60, help='alignment period of get_data (seconds)')
+    parser.add_argument('--descriptors', type=int, default=2000)
+    parser.add_argument('--series-per-resource', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=100000)
+    parser.add_argument('--latency', type=float, default=0.05, help='fake API latency per call (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--no-cache', action='store_true', help='disable descriptor, time series and request caches')
+    parser.add_argument('--max-p99-ms', nargs='*', default=[], help='thresholds as scenario=milliseconds')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    config.init_conf(package='spaceone.monitoring')
+    config.set_service_config()
+    if args.no_cache:
+        _disable_caches()
+
+    fake_client = FakeMonitoringClient(descriptor_count=args.descriptors, series_per_value=args.series_per_resource,
+                                       page_size=args.page_size, latency=args.latency, jitter=args.jitter)
+    scenarios = _make_scenarios(args)
+    thresholds = {scenario: float(limit) for scenario, limit in
+                  (threshold.split('=', 1) for threshold in args.max_p99_ms)}
+
+    results = {}
+    with patch.object(GoogleCloudConnector, '_build_client', return_value=fake_client):
+        for name in args.scenarios:
+            calls_before = fake_client.calls
+            results[name] = _run_scenario(scenarios[name], args.iterations, args.concurrency)
+            results[name]['api_calls'] = fake_client.calls - calls_before
+
+    print(f'{"scenario":>10} {"p50 ms":>10} {"p99 ms":>10} {"rps":>10} {"peak MB":>10} {"api calls":>10}')
+    for name, result in results.items():
+        print(f'{name:>10} {result["p50_ms"]:>10.1f} {result["p99_ms"]:>10.1f} {result["throughput_rps"]:>10.1f} '
+              f'{result["peak_memory_mb"]:>10.1f} {result["api_calls"]:>10}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    failed = [name for name, limit in thresholds.items() if name in results and results[name]['p99_ms'] > limit]
+    for name in failed:
+        print(f'[FAIL] {name}: p99 {results[name]["p99_ms"]:.1f}ms > {thresholds[name]:.1f}ms', file=sys.stderr)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+""" Time to the first served Metric.get_data of a fresh process
+
+Every run starts a new interpreter, imports the plugin, builds a client and
+serves get_data twice. The Google API is answered in process by
+FakeMonitoringClient through a fake HTTP transport, so discovery and client
+construction are measured without any network or credentials.
+
+    python -m test.benchmark.bench_startup --runs 10
+    python -m test.benchmark.bench_startup --discovery pinned library
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qsl, urlparse
+
+SECRET_DATA = {'project_id': 'fake-project', 'client_email': 'benchmark@fake-project.iam.gserviceaccount.com'}
+
+
+class _FakeHttp(object):
+    """ httplib2-style transport that forwards Monitoring REST calls to FakeMonitoringClient
+    """
+
+    def __init__(self, fake_client):
+        self._fake_client = fake_client
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        import httplib2
+
+        url = urlparse(uri)
+        if '$discovery' in url.path or 'discovery' in url.netloc:
+            raise RuntimeError(f'discovery document requested over the network: {uri}')
+
+        query = {key.replace('.', '_'): value for key, value in parse_qsl(url.query)}
+        self._fake_client.wait()
+        if url.path.endswith('/timeSeries'):
+            content = self._fake_client.list_time_series(query)
+        else:
+            content = self._fake_client.list_metric_descriptors(query)
+
+        return httplib2.Response({'status': '200', 'content-type': 'application/json'}), json.dumps(content).encode()
+
+
+def _run_child(args):
+    started = time.perf_counter()
+
+    from spaceone.core import config
+    from spaceone.core.transaction import Transaction
+    from spaceone.monitoring.connector import google_cloud_connector
+    from spaceone.monitoring.service.metric_service import MetricService
+    from test.benchmark.fake_monitoring import FakeMonitoringClient
+
+    imported = time.perf_counter()
+
+    config.init_conf(package='spaceone.monitoring')
+    config.set_service_config()
+    connectors = config.get_global('CONNECTORS')
+    connectors['GoogleCloudConnector']['static_discovery'] = args.discovery == 'pinned'
+    config.set_global(CONNECTORS=connectors)
+
+    fake_http = _FakeHttp(FakeMonitoringClient(descriptor_count=10, latency=0))
+    end = datetime.utcnow()
+    params = {
+        'options': {},
+        'secret_data': SECRET_DATA,
+        'metric_query': {
+            'cloud-svc-1': {
+                'name': 'projects/fake-project',
+                'resource_id': 'instance-1',
+                'filter': {
+                    'metric_type': 'compute.googleapis.com/instance/cpu/utilization',
+                    'labels': [{'key': 'resource.labels.instance_id', 'value': '1000001'}]
+                }
+            }
+        },
+        'metric': 'compute.googleapis.com/instance/cpu/utilization',
+        'start': (end - timedelta(hours=1)).isoformat(),
+        'end': end.isoformat()
+    }
+
+    timings = {'import_ms': (imported - started) * 1000}
+    with patch.object(google_cloud_connector.ThreadSafeCredentials, 'from_service_account_info',
+                      return_value=MagicMock()), \
+            patch.object(google_cloud_connector, 'PooledHttp', return_value=fake_http):
+        for name in ['first_get_data_ms', 'second_get_data_ms']:
+            call_started = time.perf_counter()
+            metric_svc = MetricService(transaction=Transaction({'service': 'monitoring', 'api_class': 'Metric'}))
+            metric_svc.get_data(dict(params))
+            timings[name] = (time.perf_counter() - call_started) * 1000
+
+    timings['time_to_first_get_data_ms'] = timings['import_ms'] + timings['first_get_data_ms']
+    print(json.dumps(timings))
+
+
+def _run_parent(args):
+    print(f'{"discovery":>10} {"import ms":>12} {"1st call ms":>12} {"2nd call ms":>12} {"to 1st ms":>12}')
+    for discovery in args.discovery_modes:
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run([sys.executable, '-m', 'test.benchmark.bench_startup', '--child',
+                                     '--discovery', discovery], check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+        medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f'{discovery:>10} {medians["import_ms"]:>12.1f} {medians["first_get_data_ms"]:>12.1f} '
+              f'{medians["second_get_data_ms"]:>12.1f} {medians["time_to_first_get_data_ms"]:>12.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--discovery', dest='discovery_modes', nargs='+', default=['pinned', 'library'],
+                        help="'pinned': bundled trimmed document, 'library': googleapiclient's own document")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        args.discovery = args.discovery_modes[0]
+        _run_child(args)
+    else:
+        _run_parent(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+""" MetricDataInfo: change_struct_type vs the direct wire-format encoder
+
+    python -m test.benchmark.bench_struct_encoder --resources 50 --points 1440
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from google.protobuf.internal import api_implementation
+
+from spaceone.api.monitoring.plugin import metric_pb2
+from spaceone.core.pygrpc.message_type import change_list_value_type, change_struct_type
+from spaceone.monitoring.info.metric_info import MetricDataInfo
+from spaceone.monitoring.info.struct_encoder import encode_list_value, encode_struct
+
+
+def _struct_info(metric_data):
+    return metric_pb2.MetricDataInfo(labels=change_list_value_type(metric_data['labels']),
+                                     values=change_struct_type(metric_data['values']))
+
+
+def _encode_only(metric_data):
+    encode_list_value(metric_data['labels'])
+    encode_struct(metric_data['values'])
+
+
+def _measure(func, metric_data, repeat):
+    tracemalloc.start()
+    func(metric_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(metric_data)
+    return (time.perf_counter() - started) / repeat * 1000, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resources', type=int, nargs='+', default=[1, 50, 500])
+    parser.add_argument('--points', type=int, default=1440)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'protobuf implementation: {api_implementation.Type()}')
+    print(f'{"resources":>10} {"path":>16} {"ms":>10} {"peak MB":>10}')
+    for resources in args.resources:
+        metric_data = {
+            'labels': [f'2020-08-06T00:00:{index:02d}.000Z' for index in range(args.points)],
+            'values': {f'cloud-svc-{index}': [random.random() * 100 for _ in range(args.points)]
+                       for index in range(resources)}
+        }
+        assert MetricDataInfo(metric_data) == _struct_info(metric_data)
+
+        for name, func in [('struct', _struct_info), ('encoder', MetricDataInfo), ('encode only', _encode_only)]:
+            elapsed, peak = _measure(func, metric_data, args.repeat)
+            print(f'{resources:>10} {name:>16} {elapsed:>10.1f} {peak:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+""" In-process stand-in for the Cloud Monitoring v3 client
+
+FakeMonitoringClient answers the calls the connector makes on a discovery
+client (projects().timeSeries().list(...).execute() and
+projects().metricDescriptors().list(...).execute()) with synthetic data:
+
+- metric descriptors under a few GCP service prefixes
+- one series per label value found in the filter (one_of() or "=")
+- aligned points over the requested interval and alignment period
+- one series per group_by value when a cross-series reducer is requested
+
+Latency, page size and the number of descriptors/series/points can be
+configured to model large projects without a real GCP project.
+"""
+
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+__all__ = ['FakeMonitoringClient']
+
+_SERVICE_PREFIXES = ['compute.googleapis.com/instance', 'cloudsql.googleapis.com/database',
+                     'storage.googleapis.com/api', 'loadbalancing.googleapis.com/https']
+_ONE_OF_FILTER = re.compile(r'(\S+) = one_of\(([^)]*)\)')
+_EQUAL_FILTER = re.compile(r'(\S+) = "([^"]*)"')
+_METRIC_TYPE_FILTER = re.compile(r'metric\.type = "([^"]*)"')
+
+
+def _to_epoch(value):
+    return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+
+
+def _to_rfc3339(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class _Request(object):
+
+    def __init__(self, client, func):
+        self._client = client
+        self._func = func
+
+    def execute(self, *args, **kwargs):
+        self._client.wait()
+        return self._func()
+
+
+class _TimeSeries(object):
+
+    def __init__(self, client):
+        self._client = client
+
+    def list(self, **query):
+        return _Request(self._client, lambda: self._client.list_time_series(query))
+
+
+class _MetricDescriptors(object):
+
+    def __init__(self, client):
+        self._client = client
+
+    def list(self, **query):
+        return _Request(self._client, lambda: self._client.list_metric_descriptors(query))
+
+
+class _Projects(object):
+
+    def __init__(self, client):
+        self._client = client
+
+    def timeSeries(self):
+        return _TimeSeries(self._client)
+
+    def metricDescriptors(self):
+        return _MetricDescriptors(self._client)
+
+
+class FakeMonitoringClient(object):
+
+    def __init__(self, descriptor_count=2000, series_per_value=1, max_points_per_series=None,
+                 page_size=100000, latency=0.05, jitter=0.0, seed=0):
+        self.descriptor_count = descriptor_count
+        self.series_per_value = series_per_value
+        self.max_points_per_series = max_points_per_series
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._descriptors = self._make_descriptors()
+        # Pages of one query are served from the same generated series
+        self._time_series_by_query = {}
+
+    def projects(self):
+        return _Projects(self)
+
+    def wait(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def list_metric_descriptors(self, query):
+        descriptors = self._descriptors
+        metric_type = re.search(r'starts_with\("([^"]*)"\)', query.get('filter', ''))
+        if metric_type:
+            descriptors = [descriptor for descriptor in descriptors if descriptor['type'].startswith(metric_type.group(1))]
+
+        return self._paginate(descriptors, 'metricDescriptors', query, lambda descriptor: 1)
+
+    def list_time_series(self, query):
+        query_key = tuple(sorted((key, str(value)) for key, value in query.items() if key != 'pageToken'))
+        with self._lock:
+            time_series = self._time_series_by_query.get(query_key)
+
+        if time_series is None:
+            time_series = self._generate_time_series(query)
+            with self._lock:
+                if len(self._time_series_by_query) > 64:
+                    self._time_series_by_query.clear()
+                self._time_series_by_query[query_key] = time_series
+
+        response = self._paginate(time_series, 'timeSeries', query, lambda series: len(series['points']))
+        metric_type = time_series[0]['metric']['type'] if time_series else ''
+        response['unit'] = '10^2.%' if metric_type.endswith('utilization') else '1'
+        return response
+
+    def _generate_time_series(self, query):
+        _filter = query.get('filter', '')
+        metric_type_match = _METRIC_TYPE_FILTER.search(_filter)
+        metric_type = metric_type_match.group(1) if metric_type_match else 'custom.googleapis.com/fake'
+        label_key, label_values = self._parse_label_filter(_filter)
+
+        start = _to_epoch(query['interval_startTime'])
+        end = _to_epoch(query['interval_endTime'])
+        period = int(str(query.get('aggregation_alignmentPeriod', '60s')).rstrip('s'))
+
+        time_series = []
+        for label_value in label_values:
+            for index in range(self.series_per_value):
+                time_series.append(self._make_time_series(metric_type, label_key, label_value, index, start, end, period))
+
+        if query.get('aggregation_crossSeriesReducer', 'REDUCE_NONE') != 'REDUCE_NONE':
+            time_series = self._reduce(time_series, query.get('aggregation_groupByFields') or [])
+
+        return time_series
+
+    @staticmethod
+    def _reduce(time_series, group_by):
+        """ Keeps the first series of each group with only the group_by labels, like Google does
+        """
+        if isinstance(group_by, str):
+            group_by = [group_by]
+
+        groups = {}
+        for series in time_series:
+            labels = {'resource': {}, 'metric': {}}
+            for field in group_by:
+                section, _, key = field.partition('.labels.')
+                if key:
+                    labels[section][key] = series[section]['labels'].get(key)
+
+            group_key = (tuple(sorted(labels['resource'].items())), tuple(sorted(labels['metric'].items())))
+            if group_key not in groups:
+                groups[group_key] = {
+                    'metric': {'type': series['metric']['type'], 'labels': labels['metric']},
+                    'resource': {'type': series['resource']['type'], 'labels': labels['resource']},
+                    'metricKind': series['metricKind'],
+                    'valueType': series['valueType'],
+                    'points': series['points']
+                }
+
+        return list(groups.values())
+
+    def _paginate(self, items, items_key, query, size_of):
+        page_size = min(int(query.get('pageSize') or self.page_size), self.page_size)
+        offset = int(query.get('pageToken') or 0)
+
+        page = []
+        size = 0
+        while offset < len(items) and (not page or size + size_of(items[offset]) <= page_size):
+            page.append(items[offset])
+            size += size_of(items[offset])
+            offset += 1
+
+        response = {items_key: page}
+        if offset < len(items):
+            response['nextPageToken'] = str(offset)
+
+        return response
+
+    def _make_descriptors(self):
+        descriptors = []
+        for index in range(self.descriptor_count):
+            prefix = _SERVICE_PREFIXES[index % len(_SERVICE_PREFIXES)]
+            descriptors.append({
+                'type': f'{prefix}/metric_{index}',
+                'displayName': f'Metric {index}',
+                'metricKind': 'GAUGE' if index % 3 else 'DELTA',
+                'valueType': 'DOUBLE' if index % 2 else 'INT64',
+                'unit': '10^2.%' if index % 5 == 0 else 'By',
+                'labels': [{'key': 'instance_name'}, {'key': 'device_name'}],
+                'monitoredResourceTypes': ['gce_instance']
+            })
+        return descriptors
+
+    def _make_time_series(self, metric_type, label_key, label_value, index, start, end, period):
+        points = []
+        bucket_end = int(end // period) * period
+        while bucket_end > start:
+            points.append({
+                'interval': {'startTime': _to_rfc3339(bucket_end), 'endTime': _to_rfc3339(bucket_end)},
+                'value': {'doubleValue': self._random.random()}
+            })
+            bucket_end -= period
+            if self.max_points_per_series and len(points) >= self.max_points_per_series:
+                break
+
+        resource_labels = {'project_id': 'fake-project', 'zone': 'asia-northeast3-a'}
+        metric_labels = {'device_name': f'disk-{index}'} if self.series_per_value > 1 else {}
+        if label_key:
+            section, _, key = label_key.partition('.labels.')
+            (resource_labels if section == 'resource' else metric_labels)[key] = label_value
+
+        return {
+            'metric': {'type': metric_type, 'labels': metric_labels},
+            'resource': {'type': 'gce_instance', 'labels': resource_labels},
+            'metricKind': 'GAUGE',
+            'valueType': 'DOUBLE',
+            'points': points
+        }
+
+    @staticmethod
+    def _parse_label_filter(_filter):
+        one_of = _ONE_OF_FILTER.search(_filter)
+        if one_of:
+            return one_of.group(1), [value.strip('"') for value in one_of.group(2).split('","')]
+
+        for key, value in _EQUAL_FILTER.findall(_filter):
+            if key != 'metric.type':
+                return key, [value]
+
+        return None, [None]
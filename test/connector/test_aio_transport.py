@@ -0,0 +1,102 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import Mock
+
+import googleapiclient.discovery
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMock
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.aio_transport import AsyncHttp
+from spaceone.monitoring.connector.google_cloud_connector.discovery_document import MONITORING_V3
+
+
+def _make_credentials(valid=True):
+    credentials = Mock(valid=valid)
+    credentials.apply.side_effect = lambda headers: headers.update({'authorization': 'Bearer access-token'})
+    return credentials
+
+
+class TestAsyncHttp(unittest.TestCase):
+
+    def setUp(self):
+        self.requests = []
+
+    async def _handle(self, request):
+        self.requests.append({
+            'method': request.method,
+            'path': request.path,
+            'query': dict(request.query),
+            'headers': {key.lower(): value for key, value in request.headers.items()},
+            'body': await request.text()
+        })
+        if request.path.endswith('/project-2/timeSeries'):
+            return web.json_response({'error': {'code': 403, 'message': 'Permission denied'}}, status=403)
+        return web.json_response({'timeSeries': [], 'unit': 'By'})
+
+    def _execute(self, build_request, credentials=None):
+        """ Runs the request built by build_request(projects) through AsyncHttp against a local server
+        """
+        async def _run():
+            app = web.Application()
+            app.router.add_route('*', '/{path:.*}', self._handle)
+            server = TestServer(app)
+            await server.start_server()
+
+            http = AsyncHttp(credentials or _make_credentials(), pool_size=4)
+            client = googleapiclient.discovery.build_from_document(
+                MONITORING_V3, http=HttpMock(), client_options={'api_endpoint': str(server.make_url('/'))})
+            try:
+                return await http.execute(build_request(client.projects()))
+            finally:
+                http.close()
+                await asyncio.sleep(0)
+                await server.close()
+
+        return asyncio.run(_run())
+
+    def test_execute_request_of_discovery_client(self):
+        response = self._execute(lambda projects: projects.timeSeries().list(name='projects/project-1',
+                                                                              filter='metric.type = "x"'))
+
+        self.assertEqual(response, {'timeSeries': [], 'unit': 'By'})
+        request = self.requests[0]
+        self.assertEqual((request['method'], request['path']), ('GET', '/v3/projects/project-1/timeSeries'))
+        self.assertEqual(request['query']['filter'], 'metric.type = "x"')
+        self.assertEqual(request['headers']['authorization'], 'Bearer access-token')
+
+    def test_send_long_get_as_post(self):
+        metric_filter = 'metric.type = "x" AND ' + ' OR '.join(f'resource.labels.instance_id = "{index}"'
+                                                                for index in range(200))
+
+        self._execute(lambda projects: projects.timeSeries().list(name='projects/project-1', filter=metric_filter))
+
+        request = self.requests[0]
+        self.assertEqual((request['method'], request['path']), ('POST', '/v3/projects/project-1/timeSeries'))
+        self.assertEqual(request['query'], {})
+        self.assertEqual(request['headers']['x-http-method-override'], 'GET')
+        self.assertIn('resource.labels.instance_id', request['body'])
+
+    def test_raise_http_error(self):
+        with self.assertRaises(HttpError) as context:
+            self._execute(lambda projects: projects.timeSeries().list(name='projects/project-2'))
+
+        self.assertEqual(context.exception.resp.status, 403)
+        self.assertEqual(json.loads(context.exception.content)['error']['code'], 403)
+
+    def test_refresh_invalid_credentials(self):
+        credentials = _make_credentials(valid=False)
+
+        self._execute(lambda projects: projects.timeSeries().query(name='projects/project-1',
+                                                                   body={'query': 'fetch gce_instance'}),
+                      credentials)
+
+        credentials.refresh.assert_called_once()
+        self.assertEqual(json.loads(self.requests[0]['body']), {'query': 'fetch gce_instance'})
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
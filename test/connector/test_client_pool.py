@@ -0,0 +1,145 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import google.oauth2.service_account
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.client_pool import (ClientPool, ThreadLocalHttp,
+                                                                              ThreadSafeCredentials, make_pool_key)
+
+
+class _Client(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestClientPool(unittest.TestCase):
+
+    def test_count_hits_and_misses(self):
+        pool = ClientPool()
+
+        client = pool.get('key-a', lambda: _Client('a'))
+        self.assertIs(pool.get('key-a', lambda: _Client('other')), client)
+        pool.get('key-b', lambda: _Client('b'))
+
+        self.assertEqual(pool.stats(), {'size': 2, 'max_size': 32, 'ttl': 3600, 'hits': 1, 'misses': 2,
+                                        'evictions': 0})
+
+    def test_expire_and_close_after_ttl(self):
+        pool = ClientPool(ttl=60)
+
+        with patch('time.monotonic', return_value=1000.0):
+            client = pool.get('key-a', lambda: _Client('a'))
+        with patch('time.monotonic', return_value=1059.0):
+            self.assertIs(pool.get('key-a', lambda: _Client('other')), client)
+        with patch('time.monotonic', return_value=1060.0):
+            rebuilt_client = pool.get('key-a', lambda: _Client('rebuilt'))
+
+        self.assertEqual(rebuilt_client.name, 'rebuilt')
+        self.assertTrue(client.closed)
+        self.assertEqual(pool.evictions, 1)
+
+    def test_evict_and_close_least_recently_used(self):
+        pool = ClientPool(max_size=2)
+        clients = {name: pool.get(name, lambda name=name: _Client(name)) for name in ['a', 'b']}
+
+        pool.get('a', lambda: _Client('other'))
+        clients['c'] = pool.get('c', lambda: _Client('c'))
+
+        self.assertTrue(clients['b'].closed)
+        self.assertFalse(clients['a'].closed)
+        self.assertEqual(list(pool._entries.keys()), ['a', 'c'])
+
+        pool.configure(max_size=1)
+        self.assertTrue(clients['a'].closed)
+        self.assertEqual(pool.stats()['evictions'], 2)
+
+        pool.clear()
+        self.assertTrue(clients['c'].closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_build_once_for_concurrent_callers(self):
+        pool = ClientPool()
+        factory = Mock(side_effect=lambda: time.sleep(0.05) or _Client('a'))
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(pool.get('key-a', factory))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(factory.call_count, 1)
+        self.assertEqual(len(set(map(id, results))), 1)
+        self.assertEqual(pool._build_locks, {})
+
+    def test_release_build_lock_when_factory_fails(self):
+        pool = ClientPool()
+
+        with self.assertRaises(ValueError):
+            pool.get('key-a', Mock(side_effect=ValueError('invalid credentials')))
+
+        self.assertEqual(pool._build_locks, {})
+        self.assertEqual(pool.get('key-a', lambda: _Client('a')).name, 'a')
+
+    def test_make_pool_key(self):
+        secret_data = {'project_id': 'project-1', 'private_key': 'secret'}
+
+        self.assertEqual(make_pool_key(secret_data), make_pool_key(dict(reversed(list(secret_data.items())))))
+        self.assertNotEqual(make_pool_key(secret_data), make_pool_key(secret_data, 'http://proxy:3128'))
+        self.assertNotIn('secret', make_pool_key(secret_data))
+
+
+class TestThreadLocalHttp(unittest.TestCase):
+
+    def test_close_instances_of_every_thread(self):
+        instances = []
+        http = ThreadLocalHttp(lambda: instances.append(Mock()) or instances[-1])
+
+        threads = [threading.Thread(target=http.request, args=('https://monitoring.googleapis.com',))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        http.close()
+
+        self.assertEqual(len(instances), 3)
+        for instance in instances:
+            instance.request.assert_called_once_with('https://monitoring.googleapis.com')
+            instance.close.assert_called_once_with()
+
+
+class TestThreadSafeCredentials(unittest.TestCase):
+
+    def test_refresh_token_once_for_concurrent_callers(self):
+        credentials = ThreadSafeCredentials(Mock(), 'plugin@project-1.iam.gserviceaccount.com',
+                                            'https://oauth2.googleapis.com/token')
+        refreshes = []
+
+        def _refresh(self, request):
+            refreshes.append(threading.get_ident())
+            time.sleep(0.05)
+            self.token = 'access-token'
+
+        with patch.object(google.oauth2.service_account.Credentials, 'refresh', _refresh):
+            threads = [threading.Thread(target=credentials.refresh, args=(Mock(),)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(len(refreshes), 1)
+        self.assertEqual(credentials.token, 'access-token')
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,123 @@
+import tempfile
+import threading
+import time
+import unittest
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.descriptor_catalog import (MetricDescriptorCatalog,
+                                                                                     ProjectCatalog)
+
+DESCRIPTORS = [
+    {'type': 'compute.googleapis.com/instance/disk/read_bytes_count', 'labels': [{'key': 'device_name'}],
+     'monitoredResourceTypes': ['gce_instance']},
+    {'type': 'compute.googleapis.com/instance/cpu/utilization', 'labels': [],
+     'monitoredResourceTypes': ['gce_instance']},
+    {'type': 'cloudsql.googleapis.com/database/cpu/utilization', 'labels': [],
+     'monitoredResourceTypes': ['cloudsql_database']}
+]
+
+
+class _Fetch(object):
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return list(DESCRIPTORS)
+
+
+class TestMetricDescriptorCatalog(unittest.TestCase):
+
+    def _set_age(self, catalog, key, age):
+        catalog._catalogs[key].fetched_at = time.time() - age
+
+    def test_find_by_prefix_and_labels(self):
+        catalog = ProjectCatalog(DESCRIPTORS, time.time())
+
+        self.assertEqual([descriptor['type'] for descriptor in catalog.find('compute.googleapis.com/instance')],
+                         ['compute.googleapis.com/instance/cpu/utilization',
+                          'compute.googleapis.com/instance/disk/read_bytes_count'])
+        self.assertEqual(len(list(catalog.find('compute.googleapis.com/', [{'key': 'metric.labels.device_name'}]))),
+                         1)
+        self.assertEqual(len(list(catalog.find('', [{'key': 'resource.type', 'value': 'cloudsql_database'}]))), 1)
+
+    def test_serve_fresh_catalog_without_fetch(self):
+        catalog = MetricDescriptorCatalog(ttl=60, max_stale=3600)
+        fetch = _Fetch()
+
+        for _ in range(3):
+            catalog.get('credentials', 'projects/project-1', fetch)
+
+        self.assertEqual(fetch.calls, 1)
+
+    def test_refresh_in_background_after_ttl(self):
+        catalog = MetricDescriptorCatalog(ttl=60, max_stale=3600)
+        fetch = _Fetch()
+        key = ('credentials', 'projects/project-1')
+        catalog.get(*key, fetch)
+        self._set_age(catalog, key, 120)
+
+        stale = catalog.get(*key, fetch)
+
+        self.assertGreater(stale.age, 60)
+        for _ in range(100):
+            if catalog._catalogs[key].age < 60:
+                break
+            time.sleep(0.01)
+        self.assertEqual(fetch.calls, 2)
+        self.assertLess(catalog._catalogs[key].age, 60)
+
+    def test_refresh_inline_after_max_stale(self):
+        catalog = MetricDescriptorCatalog(ttl=60, max_stale=3600)
+        fetch = _Fetch()
+        key = ('credentials', 'projects/project-1')
+        catalog.get(*key, fetch)
+        self._set_age(catalog, key, 7200)
+
+        self.assertLess(catalog.get(*key, fetch).age, 60)
+        self.assertEqual(fetch.calls, 2)
+
+    def test_fetch_cold_catalog_once_for_concurrent_callers(self):
+        catalog = MetricDescriptorCatalog()
+        fetch = _Fetch(delay=0.1)
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(catalog.get('credentials', 'projects/p', fetch)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+        self.assertEqual(catalog._build_locks, {})
+
+    def test_load_from_disk_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetch = _Fetch()
+            MetricDescriptorCatalog(cache_dir=cache_dir).get('credentials', 'projects/project-1', fetch)
+
+            loaded = MetricDescriptorCatalog(cache_dir=cache_dir).get('credentials', 'projects/project-1', fetch)
+
+            self.assertEqual(fetch.calls, 1)
+            self.assertEqual(len(loaded.types), 3)
+
+    def test_invalidate(self):
+        catalog = MetricDescriptorCatalog()
+        fetch = _Fetch()
+        catalog.get('credentials', 'projects/project-1', fetch)
+
+        catalog.invalidate(name='projects/project-1')
+        catalog.get('credentials', 'projects/project-1', fetch)
+
+        self.assertEqual(fetch.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,75 @@
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+import googleapiclient.discovery
+from googleapiclient.http import HttpMock
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.discovery_document import MONITORING_V3
+
+
+class TestDiscoveryDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.projects = googleapiclient.discovery.build_from_document(MONITORING_V3, http=HttpMock()).projects()
+
+    def test_build_time_series_list_with_parameters_used(self):
+        # The same query as GoogleCloudMonitoring._make_metric_query, paged
+        request = self.projects.timeSeries().list(
+            name='projects/project-1',
+            filter='metric.type = "compute.googleapis.com/instance/cpu/utilization"',
+            aggregation_alignmentPeriod='60s',
+            aggregation_crossSeriesReducer='REDUCE_MEAN',
+            aggregation_perSeriesAligner='ALIGN_MEAN',
+            aggregation_groupByFields=['resource.labels.zone', 'metric.labels.instance_name'],
+            interval_startTime='2020-08-06T00:00:00.000Z',
+            interval_endTime='2020-08-06T01:00:00.000Z',
+            view='FULL',
+            pageSize=1000,
+            pageToken='token-1'
+        )
+
+        uri = urlparse(request.uri)
+        self.assertEqual((request.method, uri.path), ('GET', '/v3/projects/project-1/timeSeries'))
+        self.assertEqual(parse_qs(uri.query), {
+            'filter': ['metric.type = "compute.googleapis.com/instance/cpu/utilization"'],
+            'aggregation.alignmentPeriod': ['60s'],
+            'aggregation.crossSeriesReducer': ['REDUCE_MEAN'],
+            'aggregation.perSeriesAligner': ['ALIGN_MEAN'],
+            'aggregation.groupByFields': ['resource.labels.zone', 'metric.labels.instance_name'],
+            'interval.startTime': ['2020-08-06T00:00:00.000Z'],
+            'interval.endTime': ['2020-08-06T01:00:00.000Z'],
+            'view': ['FULL'],
+            'pageSize': ['1000'],
+            'pageToken': ['token-1'],
+            'alt': ['json']
+        })
+
+        with self.assertRaises(TypeError):
+            self.projects.timeSeries().list(name='projects/project-1', view='PARTIAL')
+
+    def test_build_time_series_query(self):
+        request = self.projects.timeSeries().query(name='projects/project-1',
+                                                   body={'query': 'fetch gce_instance', 'pageSize': 1000,
+                                                         'pageToken': 'token-1'})
+
+        self.assertEqual(request.method, 'POST')
+        self.assertEqual(urlparse(request.uri).path, '/v3/projects/project-1/timeSeries:query')
+        self.assertEqual(set(MONITORING_V3['schemas']['QueryTimeSeriesRequest']['properties']),
+                         {'query', 'pageSize', 'pageToken'})
+
+    def test_build_metric_descriptors_list(self):
+        request = self.projects.metricDescriptors().list(name='projects/project-1',
+                                                         filter='metric.type = starts_with("compute.googleapis.com")',
+                                                         pageSize=100, pageToken='token-1')
+
+        uri = urlparse(request.uri)
+        self.assertEqual(uri.path, '/v3/projects/project-1/metricDescriptors')
+        self.assertEqual(parse_qs(uri.query)['pageToken'], ['token-1'])
+
+        with self.assertRaises(TypeError):
+            self.projects.metricDescriptors().list(name='projects/project-1', orderBy='name')
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.fan_out import (ProjectTimeoutError, fan_out,
+                                                                          fan_out_async)
+
+
+class TestFanOut(unittest.TestCase):
+
+    def test_merge_results_and_errors(self):
+        def _fail():
+            raise ValueError('project-2')
+
+        results, errors = fan_out({'project-1': lambda: 1, 'project-2': _fail, 'project-3': lambda: 3})
+
+        self.assertEqual(results, {'project-1': 1, 'project-3': 3})
+        self.assertIsInstance(errors['project-2'], ValueError)
+
+    def test_slow_project_does_not_block_the_others(self):
+        release = threading.Event()
+        started = time.monotonic()
+
+        results, errors = fan_out({'slow': lambda: release.wait(5), 'fast': lambda: 'ok'}, project_timeout=0.2)
+        elapsed = time.monotonic() - started
+        release.set()
+
+        self.assertEqual(results, {'fast': 'ok'})
+        self.assertIsInstance(errors['slow'], ProjectTimeoutError)
+        self.assertLess(elapsed, 2)
+
+    def test_queued_projects_get_their_own_deadline(self):
+        results, errors = fan_out({f'project-{index}': lambda: time.sleep(0.1) or 'ok' for index in range(4)},
+                                  max_projects=1, project_timeout=0.3)
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(errors, {})
+
+
+class TestFanOutAsync(unittest.TestCase):
+
+    def test_cancel_project_past_its_deadline(self):
+        cancelled = []
+
+        async def _slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append('slow')
+                raise
+
+        async def _fail():
+            raise ValueError('project-2')
+
+        async def _fast():
+            return 'ok'
+
+        started = time.monotonic()
+        results, errors = asyncio.run(fan_out_async({'slow': _slow, 'project-2': _fail, 'fast': _fast},
+                                                    project_timeout=0.2))
+
+        self.assertEqual(results, {'fast': 'ok'})
+        self.assertIsInstance(errors['slow'], ProjectTimeoutError)
+        self.assertIsInstance(errors['project-2'], ValueError)
+        self.assertEqual(cancelled, ['slow'])
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_queued_projects_get_their_own_deadline(self):
+        async def _job():
+            await asyncio.sleep(0.1)
+            return 'ok'
+
+        results, errors = asyncio.run(fan_out_async({f'project-{index}': _job for index in range(4)},
+                                                    max_projects=1, project_timeout=0.3))
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(errors, {})
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,559 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import googleapiclient.discovery
+import httplib2
+from googleapiclient.http import HttpMock, HttpMockSequence
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.discovery_document import MONITORING_V3
+from spaceone.monitoring.connector.google_cloud_connector.google_cloud_monitoring import GoogleCloudMonitoring
+from spaceone.monitoring.connector.google_cloud_connector.point_decoder import format_epoch, to_epoch
+
+
+def _make_series(device_name, value):
+    return {
+        'metric': {'type': 'compute.googleapis.com/instance/disk/read_bytes_count',
+                   'labels': {'device_name': device_name}},
+        'resource': {'type': 'gce_instance', 'labels': {'instance_id': '1', 'zone': 'asia-northeast3-a'}},
+        'points': [{'interval': {'startTime': '2020-08-06T00:01:00Z', 'endTime': '2020-08-06T00:01:00Z'},
+                    'value': {'doubleValue': value}}]
+    }
+
+
+def _make_page(series_list, next_page_token=None):
+    page = {'timeSeries': series_list, 'unit': 'By'}
+    if next_page_token:
+        page['nextPageToken'] = next_page_token
+    return {'status': '200'}, json.dumps(page)
+
+
+def _make_paged_monitoring(pages, config=None):
+    http = HttpMockSequence(pages)
+    client = googleapiclient.discovery.build_from_document(MONITORING_V3, http=http)
+    return GoogleCloudMonitoring(client, 'project-1', dict({'rate_limit': {'enabled': False}}, **(config or {}))), \
+        http
+
+
+def _get_query_params(http):
+    return [parse_qs(urlparse(uri).query) for uri, _, _, _ in http.request_sequence]
+
+
+class _FakeAsyncHttp(object):
+    """ Answers like HttpMockSequence, for the *_async methods
+    """
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.request_sequence = []
+
+    async def execute(self, http_request):
+        self.request_sequence.append((http_request.uri, http_request.method, http_request.body, None))
+        await asyncio.sleep(0)
+        response, content = self.pages.pop(0)
+        return http_request.postproc(httplib2.Response(response), content.encode('utf-8'))
+
+
+def _make_async_monitoring(pages, config=None, cache_namespace=None):
+    client = googleapiclient.discovery.build_from_document(MONITORING_V3, http=HttpMock())
+    aio_http = _FakeAsyncHttp(pages)
+    return GoogleCloudMonitoring(client, 'project-1', dict({'rate_limit': {'enabled': False}}, **(config or {})),
+                                 cache_namespace=cache_namespace, aio_http=aio_http), aio_http
+
+
+def _make_metric_query(device_names, metric_type='compute.googleapis.com/instance/disk/read_bytes_count'):
+    return {
+        f'cloud-svc-{device_name}': {
+            'name': 'projects/project-1',
+            'resource_id': device_name,
+            'filter': {
+                'metric_type': metric_type,
+                'labels': [{'key': 'metric.labels.device_name', 'value': device_name}]
+            }
+        } for device_name in device_names
+    }
+
+
+class _ConcurrencyTracker(object):
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def __exit__(self, *args):
+        with self._lock:
+            self.running -= 1
+
+
+class TestGoogleCloudMonitoring(unittest.TestCase):
+
+    def setUp(self):
+        self.monitoring = GoogleCloudMonitoring(None, 'project-1')
+
+    def test_keep_first_series_by_default(self):
+        time_series = [_make_series('sda', 1.0), _make_series('sdb', 2.0)]
+
+        metric_data_frame = self.monitoring.make_metric_data_frame(
+            self.monitoring.decode_metric_data('cloud-svc-1', time_series, False), '60s')
+
+        self.assertEqual(metric_data_frame.to_dict(), {'labels': ['2020-08-06T00:01:00.000Z'],
+                                                       'values': {'cloud-svc-1': [1.0]}})
+
+    def test_key_all_series_by_distinguishing_labels(self):
+        time_series = [_make_series('sda', 1.0), _make_series('sdb', 2.0)]
+
+        metric_data_frame = self.monitoring.make_metric_data_frame(
+            self.monitoring.decode_metric_data('cloud-svc-1', time_series, False, all_series=True), '60s')
+
+        self.assertEqual(metric_data_frame.to_dict()['values'],
+                         {'cloud-svc-1': {'metric.labels.device_name=sda': [1.0],
+                                          'metric.labels.device_name=sdb': [2.0]}})
+
+    def test_keep_list_for_single_series(self):
+        metric_data_frame = self.monitoring.make_metric_data_frame(
+            self.monitoring.decode_metric_data('cloud-svc-1', [_make_series('sda', 1.0)], False, all_series=True),
+            '60s')
+
+        self.assertEqual(metric_data_frame.to_dict()['values'], {'cloud-svc-1': [1.0]})
+
+    def test_iter_metric_data_per_resource(self):
+        metric_query = {
+            f'cloud-svc-{device_name}': {
+                'name': 'projects/project-1',
+                'resource_id': device_name,
+                'filter': {
+                    'metric_type': 'compute.googleapis.com/instance/disk/read_bytes_count',
+                    'labels': [{'key': 'metric.labels.device_name', 'value': device_name}]
+                }
+            } for device_name in ['sda', 'sdb']
+        }
+        response = {'timeSeries': [_make_series('sda', 1.0), _make_series('sdb', 2.0)]}
+        end = datetime.utcnow()
+
+        with patch.object(GoogleCloudMonitoring, '_list_unit_time_series', return_value=response):
+            chunks = list(self.monitoring.iter_metric_data(metric_query, None, end - timedelta(hours=1), end,
+                                                           '60s', 'ALIGN_MEAN'))
+
+        values = {}
+        for chunk in chunks:
+            self.assertEqual(len(chunk.columns), 1)
+            values.update(chunk.to_dict()['values'])
+
+        self.assertEqual(values, {'cloud-svc-sda': [1.0], 'cloud-svc-sdb': [2.0]})
+
+    def test_align_resources_on_one_grid(self):
+        short_series = _make_series('sda', 1.0)
+        long_series = _make_series('sdb', 2.0)
+        long_series['points'].insert(0, {'interval': {'startTime': '2020-08-06T00:03:00Z',
+                                                      'endTime': '2020-08-06T00:03:00Z'},
+                                         'value': {'doubleValue': 3.0}})
+        metric_data = [{'cloud_service_id': 'cloud-svc-1', 'time_series': [short_series]},
+                       {'cloud_service_id': 'cloud-svc-2', 'time_series': [long_series]}]
+        end = datetime.utcnow()
+
+        with patch.object(GoogleCloudMonitoring, 'list_metrics_time_series',
+                          return_value={'metric_data': metric_data}):
+            metric_data_info = self.monitoring.get_metric_data({}, None, end - timedelta(hours=1), end, '60s',
+                                                               'ALIGN_MEAN', fill='previous')
+
+        self.assertEqual(metric_data_info.to_dict(), {
+            'labels': ['2020-08-06T00:01:00.000Z', '2020-08-06T00:02:00.000Z', '2020-08-06T00:03:00.000Z'],
+            'values': {'cloud-svc-1': [1.0, 1.0, 1.0], 'cloud-svc-2': [2.0, 2.0, 3.0]}
+        })
+
+    def test_iter_concurrently_skips_nothing_on_error(self):
+        def _fetch(value):
+            if value == 2:
+                raise ValueError(value)
+            return value * 10
+
+        results = sorted(self.monitoring._iter_concurrently(_fetch, [(value,) for value in range(25)]),
+                         key=lambda result: result[0])
+
+        self.assertEqual(len(results), 25)
+        self.assertIsInstance(results[2][2], ValueError)
+        self.assertEqual(results[3][1], 30)
+
+    def test_run_concurrently_in_order_of_args(self):
+        monitoring = GoogleCloudMonitoring(None, 'project-1', {'max_in_flight': 4})
+        tracker = _ConcurrencyTracker()
+
+        def _fetch(value):
+            with tracker:
+                # Later args finish first
+                time.sleep((10 - value) * 0.005)
+                if value == 3:
+                    raise ValueError(value)
+                return value * 10
+
+        results = monitoring._run_concurrently(_fetch, [(value,) for value in range(10)])
+
+        self.assertEqual([result for result, _ in results], [0, 10, 20, None, 40, 50, 60, 70, 80, 90])
+        self.assertEqual([index for index, (_, error) in enumerate(results) if error is not None], [3])
+        self.assertIsInstance(results[3][1], ValueError)
+        self.assertLessEqual(tracker.peak, 4)
+
+    def test_run_concurrently_single_call_inline(self):
+        results = self.monitoring._run_concurrently(lambda: threading.current_thread(), [()])
+
+        self.assertEqual(results, [(threading.current_thread(), None)])
+
+    def test_iter_concurrently_bounded_by_consumer(self):
+        monitoring = GoogleCloudMonitoring(None, 'project-1', {'max_in_flight': 3})
+        tracker = _ConcurrencyTracker()
+        started = []
+
+        def _fetch(value):
+            with tracker:
+                started.append(value)
+                return value
+
+        results = monitoring._iter_concurrently(_fetch, [(value,) for value in range(10)])
+
+        next(results)
+        time.sleep(0.05)
+        # The result that was read is only replaced when the next one is asked for
+        self.assertEqual(len(started), 3)
+
+        next(results)
+        time.sleep(0.05)
+        self.assertEqual(len(started), 4)
+
+        self.assertEqual(len(list(results)), 8)
+        self.assertEqual(sorted(started), list(range(10)))
+        self.assertLessEqual(tracker.peak, 3)
+
+    def test_iter_concurrently_cancels_pending_when_closed(self):
+        monitoring = GoogleCloudMonitoring(None, 'project-1', {'max_in_flight': 2})
+        release = threading.Event()
+        started = []
+
+        def _fetch(value):
+            started.append(value)
+            if value > 0:
+                release.wait(5)
+            return value
+
+        results = monitoring._iter_concurrently(_fetch, [(value,) for value in range(10)])
+        self.assertEqual(next(results), (0, 0, None))
+
+        release.set()
+        results.close()
+
+        # Nothing beyond the calls in flight is started
+        self.assertLessEqual(set(started), {0, 1})
+
+    def test_list_time_series_stitches_series_split_across_pages(self):
+        newer_points = _make_series('sda', 2.0)
+        newer_points['points'][0]['interval'] = {'startTime': '2020-08-06T00:02:00Z',
+                                                 'endTime': '2020-08-06T00:02:00Z'}
+        monitoring, http = _make_paged_monitoring([
+            _make_page([newer_points], 'token-1'),
+            _make_page([_make_series('sda', 1.0), _make_series('sdb', 3.0)])
+        ])
+
+        response = monitoring.list_time_series({'name': 'projects/project-1', 'filter': 'metric.type = "x"'},
+                                               page_size=2)
+
+        self.assertEqual(response['unit'], 'By')
+        self.assertEqual([[point['value']['doubleValue'] for point in series['points']]
+                          for series in response['timeSeries']], [[2.0, 1.0], [3.0]])
+
+        params = _get_query_params(http)
+        self.assertEqual([param.get('pageSize') for param in params], [['2'], ['2']])
+        self.assertEqual([param.get('pageToken') for param in params], [None, ['token-1']])
+
+    def test_truncate_to_max_series(self):
+        monitoring, http = _make_paged_monitoring([
+            _make_page([_make_series('sda', 1.0), _make_series('sdb', 2.0)], 'token-1'),
+            _make_page([_make_series('sdc', 3.0), _make_series('sdd', 4.0)], 'token-2'),
+            _make_page([_make_series('sde', 5.0)])
+        ])
+
+        response = monitoring.list_time_series({'name': 'projects/project-1'}, max_series=3)
+
+        self.assertEqual([series['metric']['labels']['device_name'] for series in response['timeSeries']],
+                         ['sda', 'sdb', 'sdc'])
+        self.assertEqual(len(http.request_sequence), 2)
+
+    def test_stop_paging_at_max_points_from_config(self):
+        monitoring, http = _make_paged_monitoring([
+            _make_page([_make_series('sda', 1.0)], 'token-1'),
+            _make_page([_make_series('sdb', 2.0)], 'token-2'),
+            _make_page([_make_series('sdc', 3.0)])
+        ], {'pagination': {'max_points': 2, 'page_size': 100}})
+
+        pages = list(monitoring.iter_time_series_pages({'name': 'projects/project-1'}))
+
+        # Paging stops after the page that reaches max_points, that page is kept whole
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(len(http.request_sequence), 2)
+        self.assertEqual([param.get('pageSize') for param in _get_query_params(http)], [['100'], ['100']])
+
+    def test_decode_time_series_page_by_page(self):
+        newer_points = _make_series('sda', 0.2)
+        newer_points['points'][0]['interval'] = {'startTime': '2020-08-06T00:02:00Z',
+                                                 'endTime': '2020-08-06T00:02:00Z'}
+        monitoring, http = _make_paged_monitoring([
+            _make_page([newer_points, _make_series('sdb', 0.3)], 'token-1'),
+            _make_page([_make_series('sda', 0.1)])
+        ])
+
+        with patch.object(GoogleCloudMonitoring, 'list_time_series', side_effect=AssertionError('not streamed')):
+            response = monitoring.decode_time_series({'name': 'projects/project-1'})
+
+        self.assertEqual(response['unit'], 'By')
+        self.assertEqual(len(http.request_sequence), 2)
+        self.assertEqual([(series['metric']['labels']['device_name'], 'points' in series,
+                           [list(part) for part in series['decoded_points']]) for series in response['timeSeries']],
+                         [('sda', False, [[1596672060.0, 1596672120.0], [0.1, 0.2]]),
+                          ('sdb', False, [[1596672060.0], [0.3]])])
+
+    def test_get_metric_data_decodes_pages_without_cache(self):
+        monitoring, _ = _make_paged_monitoring([
+            _make_page([_make_series('sda', 0.5)], 'token-1'),
+            _make_page([_make_series('sdb', 0.25)])
+        ], {'time_series_cache': {'enabled': False}})
+        metric_query = {
+            f'cloud-svc-{device_name}': {
+                'name': 'projects/project-1',
+                'resource_id': device_name,
+                'filter': {
+                    'metric_type': 'compute.googleapis.com/instance/disk/read_bytes_count',
+                    'labels': [{'key': 'metric.labels.device_name', 'value': device_name}]
+                }
+            } for device_name in ['sda', 'sdb']
+        }
+        end = datetime.utcnow()
+
+        with patch.object(GoogleCloudMonitoring, 'list_time_series', side_effect=AssertionError('not streamed')), \
+                patch('spaceone.monitoring.connector.google_cloud_connector.google_cloud_monitoring.PERCENT_METRIC',
+                      ['By']):
+            metric_data_frame = monitoring.get_metric_data(metric_query, None, end - timedelta(hours=1), end, '60s',
+                                                           'ALIGN_MEAN')
+
+        self.assertEqual(metric_data_frame.to_dict()['values'], {'cloud-svc-sda': [50.0], 'cloud-svc-sdb': [25.0]})
+
+    def test_merge_split_time_series_by_metric_and_resource(self):
+        first_part = _make_series('sda', 2.0)
+        second_part = _make_series('sda', 1.0)
+        # Same labels in another order are the same series
+        second_part['resource']['labels'] = {'zone': 'asia-northeast3-a', 'instance_id': '1'}
+        other_instance = _make_series('sda', 3.0)
+        other_instance['resource']['labels'] = {'instance_id': '2', 'zone': 'asia-northeast3-a'}
+
+        merged = GoogleCloudMonitoring._merge_split_time_series([first_part, other_instance, second_part])
+
+        self.assertEqual([(series['resource']['labels']['instance_id'],
+                           [point['value']['doubleValue'] for point in series['points']]) for series in merged],
+                         [('1', [2.0, 1.0]), ('2', [3.0])])
+
+    def test_keep_last_closed_bucket_with_open_gauge_point(self):
+        boundary = int(time.time() // 60) * 60 - 86400
+        metric_query = {
+            'cloud-svc-sda': {
+                'name': 'projects/project-1',
+                'resource_id': 'sda',
+                'filter': {
+                    'metric_type': 'compute.googleapis.com/instance/cpu/utilization',
+                    'labels': [{'key': 'metric.labels.device_name', 'value': 'sda'}]
+                }
+            }
+        }
+
+        def _fetch_unit_time_series(unit, metric, start, end, *args, **kwargs):
+            # GAUGE points on the grid, and the open bucket stamped with the requested end
+            start, end = to_epoch(start), to_epoch(end)
+            bucket_ends = list(range(int(end // 60) * 60, int(start), -60))
+            series = _make_series('sda', 0.0)
+            series['points'] = [{
+                'interval': {'startTime': format_epoch(bucket_end), 'endTime': format_epoch(bucket_end)},
+                'value': {'doubleValue': 9999.0 if bucket_end > boundary else float(bucket_end - boundary)}
+            } for bucket_end in ([end] if end % 60 else []) + bucket_ends]
+            return {'unit': 'By', 'timeSeries': [series]}
+
+        for offset in [10, 40]:
+            with self.subTest(offset=offset):
+                monitoring = GoogleCloudMonitoring(None, 'project-1', cache_namespace=f'open-bucket-{offset}')
+                end = datetime.utcfromtimestamp(boundary + offset)
+
+                with patch.object(monitoring, '_fetch_unit_time_series', side_effect=_fetch_unit_time_series):
+                    metric_data = monitoring.get_metric_data(metric_query, None, end - timedelta(minutes=5), end,
+                                                             '60s', 'ALIGN_MEAN', fill='null').to_dict()
+
+                self.assertEqual(metric_data['labels'][-2:], [format_epoch(boundary), format_epoch(boundary + 60)])
+                self.assertEqual(metric_data['values']['cloud-svc-sda'][-3:], [-60.0, 0.0, 9999.0])
+
+    def test_get_metric_data_with_mql(self):
+        query_response = {
+            'timeSeriesDescriptor': {'labelDescriptors': [{'key': 'resource.instance_id'}],
+                                     'pointDescriptors': [{'key': 'value', 'valueType': 'DOUBLE'}]},
+            'timeSeriesData': [{
+                'labelValues': [{'stringValue': instance_id}],
+                'pointData': [{'values': [{'doubleValue': float(instance_id)}],
+                               'timeInterval': {'endTime': '2020-08-06T00:01:00Z'}}]
+            } for instance_id in ['1', '2']]
+        }
+        http = HttpMockSequence([({'status': '200'}, json.dumps(query_response))])
+        client = googleapiclient.discovery.build_from_document(MONITORING_V3, http=http)
+        monitoring = GoogleCloudMonitoring(client, 'project-1', {'time_series_cache': {'enabled': False}})
+        metric_query = {
+            f'cloud-svc-{instance_id}': {
+                'name': 'projects/project-1',
+                'resource_id': instance_id,
+                'filter': {
+                    'metric_type': 'compute.googleapis.com/instance/cpu/utilization',
+                    'labels': [{'key': 'resource.labels.instance_id', 'value': instance_id}]
+                }
+            } for instance_id in ['1', '2']
+        }
+        end = datetime.utcnow()
+
+        metric_data_info = monitoring.get_metric_data(metric_query, None, end - timedelta(hours=1), end, '60s',
+                                                      'ALIGN_MEAN', mql={'resource_type': 'gce_instance'})
+
+        self.assertEqual(metric_data_info.to_dict()['values'], {'cloud-svc-1': [1.0], 'cloud-svc-2': [2.0]})
+        uri, method, body, headers = http.request_sequence[0]
+        self.assertEqual(len(http.request_sequence), 1)
+        self.assertEqual(method, 'POST')
+        self.assertTrue(uri.startswith('https://monitoring.googleapis.com/v3/projects/project-1/timeSeries:query'))
+        self.assertIn("resource.instance_id == '1' || resource.instance_id == '2'", json.loads(body)['query'])
+
+    def test_report_failed_project_as_partial_result(self):
+        metric_query = {
+            f'cloud-svc-{project}': {
+                'name': f'projects/{project}',
+                'resource_id': project,
+                'filter': {
+                    'metric_type': 'compute.googleapis.com/instance/disk/read_bytes_count',
+                    'labels': [{'key': 'metric.labels.device_name', 'value': 'sda'}]
+                }
+            } for project in ['project-1', 'project-2']
+        }
+
+        def _list_unit_time_series(unit, *args):
+            if unit.name == 'projects/project-2':
+                raise ValueError('permission denied')
+            return {'timeSeries': [_make_series('sda', 1.0)]}
+
+        end = datetime.utcnow()
+        with patch.object(GoogleCloudMonitoring, '_list_unit_time_series', side_effect=_list_unit_time_series):
+            metric_data_info = self.monitoring.get_metric_data(metric_query, None, end - timedelta(hours=1), end,
+                                                               '60s', 'ALIGN_MEAN')
+
+        self.assertEqual(metric_data_info.to_dict()['values'], {'cloud-svc-project-1': [1.0]})
+        self.assertEqual([(error['cloud_service_id'], error['name']) for error in metric_data_info.errors],
+                         [('cloud-svc-project-2', 'projects/project-2')])
+
+    def test_list_metrics_of_projects(self):
+        descriptors = {
+            'projects/project-1': [{'type': 'compute.googleapis.com/instance/cpu/utilization', 'metricKind': 'GAUGE',
+                                    'valueType': 'DOUBLE', 'displayName': 'CPU utilization'}],
+            'projects/project-2': [{'type': 'compute.googleapis.com/instance/cpu/utilization', 'metricKind': 'GAUGE',
+                                    'valueType': 'DOUBLE', 'displayName': 'CPU utilization'},
+                                   {'type': 'compute.googleapis.com/instance/uptime', 'metricKind': 'DELTA',
+                                    'valueType': 'DOUBLE', 'displayName': 'Uptime'}]
+        }
+
+        def _find_metric_descriptors(name, metric_filter):
+            if name == 'projects/project-3':
+                raise ValueError('permission denied')
+            return descriptors[name]
+
+        query = {'name': 'projects/project-1', 'resource_id': 'instance-1',
+                 'filters': [{'metric_type': 'compute.googleapis.com/instance', 'labels': []}]}
+        with patch.object(self.monitoring, '_find_metric_descriptors', side_effect=_find_metric_descriptors):
+            metrics_info = self.monitoring.list_metrics(query, projects=['project-1', 'project-2', 'project-3'])
+
+        self.assertEqual([(metric['key'], metric['metric_query']['name']) for metric in metrics_info['metrics']],
+                         [('compute.googleapis.com/instance/cpu/utilization', 'projects/project-1'),
+                          ('compute.googleapis.com/instance/uptime', 'projects/project-2')])
+        self.assertEqual([error['name'] for error in metrics_info['errors']], ['projects/project-3'])
+
+
+class TestGoogleCloudMonitoringAsync(unittest.TestCase):
+
+    def test_get_metric_data_as_sync(self):
+        # Closed buckets, so that the cache keeps them
+        end = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(days=1)
+        series_list = [_make_series('sda', 1.0), _make_series('sdb', 2.0)]
+        for series in series_list:
+            point_time = format_epoch(to_epoch(end.isoformat() + 'Z') - 60)
+            series['points'][0]['interval'] = {'startTime': point_time, 'endTime': point_time}
+        pages = [_make_page(series_list[:1], 'token-1'), _make_page(series_list[1:])]
+        args = (_make_metric_query(['sda', 'sdb']), None, end - timedelta(hours=1), end, '60s', 'ALIGN_MEAN')
+
+        for cache_enabled in [False, True]:
+            with self.subTest(cache_enabled=cache_enabled):
+                config = {'time_series_cache': {'enabled': cache_enabled}}
+                monitoring, http = _make_paged_monitoring(list(pages), config)
+                monitoring.cache_namespace = f'sync-{cache_enabled}'
+                async_monitoring, aio_http = _make_async_monitoring(list(pages), config, f'async-{cache_enabled}')
+
+                metric_data = monitoring.get_metric_data(*args).to_dict()
+                async_metric_data = asyncio.run(async_monitoring.get_metric_data_async(*args)).to_dict()
+
+                self.assertEqual(async_metric_data, metric_data)
+                self.assertEqual(async_metric_data['values'], {'cloud-svc-sda': [1.0], 'cloud-svc-sdb': [2.0]})
+                self.assertEqual(_get_query_params(aio_http), _get_query_params(http))
+
+    def test_get_metric_data_with_mql(self):
+        query_response = {
+            'timeSeriesDescriptor': {'labelDescriptors': [{'key': 'metric.device_name'}],
+                                     'pointDescriptors': [{'key': 'value', 'valueType': 'DOUBLE'}]},
+            'timeSeriesData': [{
+                'labelValues': [{'stringValue': 'sda'}],
+                'pointData': [{'values': [{'doubleValue': 1.0}], 'timeInterval': {'endTime': '2020-08-06T00:01:00Z'}}]
+            }]
+        }
+        monitoring, aio_http = _make_async_monitoring([({'status': '200'}, json.dumps(query_response))],
+                                                      {'time_series_cache': {'enabled': False}})
+        end = datetime.utcnow()
+
+        metric_data_info = asyncio.run(monitoring.get_metric_data_async(
+            _make_metric_query(['sda']), None, end - timedelta(hours=1), end, '60s', 'ALIGN_MEAN',
+            mql={'resource_type': 'gce_instance'}))
+
+        self.assertEqual(metric_data_info.to_dict()['values'], {'cloud-svc-sda': [1.0]})
+        uri, method, body, _ = aio_http.request_sequence[0]
+        self.assertEqual(method, 'POST')
+        self.assertTrue(uri.startswith('https://monitoring.googleapis.com/v3/projects/project-1/timeSeries:query'))
+        self.assertIn("metric.device_name == 'sda'", json.loads(body)['query'])
+
+    def test_report_failed_project_as_partial_result(self):
+        metric_query = {
+            f'cloud-svc-{project}': dict(_make_metric_query(['sda'])['cloud-svc-sda'], name=f'projects/{project}')
+            for project in ['project-1', 'project-2']
+        }
+
+        async def _list_unit_time_series_async(unit, *args):
+            if unit.name == 'projects/project-2':
+                raise ValueError('permission denied')
+            return {'timeSeries': [_make_series('sda', 1.0)]}
+
+        end = datetime.utcnow()
+        monitoring, _ = _make_async_monitoring([])
+        with patch.object(monitoring, '_list_unit_time_series_async', side_effect=_list_unit_time_series_async):
+            metric_data_info = asyncio.run(monitoring.get_metric_data_async(metric_query, None,
+                                                                            end - timedelta(hours=1), end, '60s',
+                                                                            'ALIGN_MEAN'))
+
+        self.assertEqual(metric_data_info.to_dict()['values'], {'cloud-svc-project-1': [1.0]})
+        self.assertEqual([(error['cloud_service_id'], error['name']) for error in metric_data_info.errors],
+                         [('cloud-svc-project-2', 'projects/project-2')])
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,75 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import googleapiclient.discovery
+import requests
+from googleapiclient.errors import HttpError
+from requests.structures import CaseInsensitiveDict
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.discovery_document import MONITORING_V3
+from spaceone.monitoring.connector.google_cloud_connector.http_transport import PooledHttp
+
+
+def _make_response(status_code, reason, body):
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = reason
+    response.headers = CaseInsensitiveDict({'Content-Type': 'application/json; charset=UTF-8'})
+    response._content = json.dumps(body).encode('utf-8')
+    return response
+
+
+def _make_credentials():
+    return Mock(universe_domain='googleapis.com')
+
+
+class TestPooledHttp(unittest.TestCase):
+
+    def _make_http(self, response, **kwargs):
+        http = PooledHttp(_make_credentials(), **kwargs)
+        session_request = patch.object(http._session, 'request', return_value=response).start()
+        self.addCleanup(patch.stopall)
+        return http, session_request
+
+    def test_return_httplib2_response_and_content(self):
+        http, session_request = self._make_http(_make_response(404, 'Not Found', {'error': {}}),
+                                                keep_alive=False, timeout=10)
+
+        http_response, content = http.request('https://monitoring.googleapis.com/v3/projects/project-1',
+                                              'POST', body='{}', headers={'content-type': 'application/json'})
+
+        self.assertEqual(http_response.status, 404)
+        self.assertEqual(http_response['status'], '404')
+        self.assertEqual(http_response.reason, 'Not Found')
+        self.assertEqual(http_response['content-type'], 'application/json; charset=UTF-8')
+        self.assertEqual(content, b'{"error": {}}')
+        session_request.assert_called_once_with(
+            'POST', 'https://monitoring.googleapis.com/v3/projects/project-1', data='{}',
+            headers={'content-type': 'application/json', 'connection': 'close'}, timeout=10)
+
+    def test_serve_discovery_client(self):
+        http, _ = self._make_http(_make_response(200, 'OK', {'timeSeries': [], 'unit': 'By'}))
+        client = googleapiclient.discovery.build_from_document(MONITORING_V3, http=http)
+
+        self.assertEqual(client.projects().timeSeries().list(name='projects/project-1').execute(),
+                         {'timeSeries': [], 'unit': 'By'})
+
+        http._session.request.return_value = _make_response(403, 'Forbidden', {'error': {'code': 403}})
+        with self.assertRaises(HttpError) as context:
+            client.projects().timeSeries().list(name='projects/project-1').execute()
+        self.assertEqual(context.exception.resp.status, 403)
+
+    def test_verify_certificates_through_proxy(self):
+        http = PooledHttp(_make_credentials(), https_proxy='http://proxy:3128')
+
+        self.assertEqual(http._session.proxies, {'https': 'http://proxy:3128', 'http': 'http://proxy:3128'})
+        self.assertTrue(http._session.verify)
+
+        http = PooledHttp(_make_credentials(), https_proxy='http://proxy:3128', verify_ssl=False)
+        self.assertFalse(http._session.verify)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,82 @@
+import unittest
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.mql import (MQLQueryUnit, make_mql_window,
+                                                                      plan_mql_queries, to_time_series_response)
+
+
+def _make_metric_query(instance_ids, metric_type='compute.googleapis.com/instance/cpu/utilization'):
+    return {
+        f'cloud-svc-{instance_id}': {
+            'name': 'projects/project-1',
+            'resource_id': instance_id,
+            'filter': {
+                'metric_type': metric_type,
+                'labels': [{'key': 'resource.labels.instance_id', 'value': instance_id}]
+            }
+        } for instance_id in instance_ids
+    }
+
+
+class TestMQL(unittest.TestCase):
+
+    def test_compile_one_query_for_all_resources(self):
+        units = plan_mql_queries(_make_metric_query(['1', '2']), '60s', 'ALIGN_MAX',
+                                 lambda name, metric_type: 'gce_instance')
+
+        self.assertEqual(len(units), 1)
+        self.assertIsInstance(units[0], MQLQueryUnit)
+        self.assertEqual(units[0].filter, "fetch gce_instance\n"
+                                          "| metric 'compute.googleapis.com/instance/cpu/utilization'\n"
+                                          "| filter resource.instance_id == '1' || resource.instance_id == '2'\n"
+                                          "| group_by 60s, [value: max(val())]\n"
+                                          "| every 60s")
+        self.assertEqual(units[0].cloud_service_ids, ['cloud-svc-1', 'cloud-svc-2'])
+
+    def test_custom_query_gets_filter_and_every(self):
+        custom_query = "fetch gce_instance | { metric 'a' ; metric 'b' } | ratio"
+        units = plan_mql_queries(_make_metric_query(["it's"]), '300s', 'ALIGN_MEAN',
+                                 lambda name, metric_type: self.fail('resource type is not needed'), custom_query)
+
+        self.assertEqual(units[0].filter, custom_query + "\n| filter resource.instance_id == 'it\\'s'\n| every 300s")
+
+    def test_chunk_by_batch_size(self):
+        units = plan_mql_queries(_make_metric_query([str(index) for index in range(5)]), '60s', 'ALIGN_MEAN',
+                                 lambda name, metric_type: 'gce_instance', max_batch_size=2)
+
+        self.assertEqual([len(unit.cloud_service_ids) for unit in units], [2, 2, 1])
+
+    def test_reject_unsupported_label(self):
+        metric_query = _make_metric_query(['1'])
+        metric_query['cloud-svc-1']['filter']['labels'].append({'key': 'metadata.user_labels.team', 'value': 'a'})
+
+        with self.assertRaises(ValueError):
+            plan_mql_queries(metric_query, '60s', 'ALIGN_MEAN', lambda name, metric_type: 'gce_instance')
+
+    def test_convert_response_to_list_shape(self):
+        response = {
+            'timeSeriesDescriptor': {
+                'labelDescriptors': [{'key': 'resource.instance_id'}, {'key': 'metric.instance_name'}],
+                'pointDescriptors': [{'key': 'value', 'valueType': 'DOUBLE', 'unit': '10^2.%'}]
+            },
+            'timeSeriesData': [{
+                'labelValues': [{'stringValue': '1'}, {'stringValue': 'vm-1'}],
+                'pointData': [{'values': [{'doubleValue': 0.5}],
+                               'timeInterval': {'startTime': '2020-08-06T00:00:00Z',
+                                                'endTime': '2020-08-06T00:01:00Z'}}]
+            }]
+        }
+
+        response_data = to_time_series_response(response)
+        units = plan_mql_queries(_make_metric_query(['1']), '60s', 'ALIGN_MEAN', lambda *args: 'gce_instance')
+
+        self.assertEqual(response_data['unit'], '10^2.%')
+        self.assertEqual(response_data['timeSeries'][0]['points'][0]['value'], {'doubleValue': 0.5})
+        self.assertEqual(units[0].demultiplex(response_data['timeSeries']),
+                         {'cloud-svc-1': response_data['timeSeries']})
+        self.assertEqual(make_mql_window('2020-08-06T00:00:00Z', '2020-08-06T01:00:00.000Z'),
+                         "\n| within d'2020/08/06 00:00:00', d'2020/08/06 01:00:00'")
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
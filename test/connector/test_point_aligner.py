@@ -0,0 +1,48 @@
+import math
+import unittest
+from array import array
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.point_aligner import align_points, make_grid
+
+
+class TestPointAligner(unittest.TestCase):
+
+    def setUp(self):
+        self.grid = make_grid([array('d', [60.0, 180.0]), array('d', [120.0, 300.0]), array('d')], 60)
+
+    def test_make_grid_from_all_series(self):
+        self.assertEqual(list(self.grid), [60.0, 120.0, 180.0, 240.0, 300.0])
+        self.assertEqual(len(make_grid([array('d')], 60)), 0)
+
+    def test_fill_missing_buckets(self):
+        timestamps = array('d', [120.0, 240.0])
+        values = array('d', [1.0, 2.0])
+
+        aligned = align_points(timestamps, values, self.grid, 60, 'null')
+        self.assertTrue(math.isnan(aligned[0]) and math.isnan(aligned[2]) and math.isnan(aligned[4]))
+        self.assertEqual((aligned[1], aligned[3]), (1.0, 2.0))
+
+        self.assertEqual(list(align_points(timestamps, values, self.grid, 60, 'zero')), [0.0, 1.0, 0.0, 2.0, 0.0])
+
+        aligned = align_points(timestamps, values, self.grid, 60, 'previous')
+        self.assertTrue(math.isnan(aligned[0]))
+        self.assertEqual(list(aligned[1:]), [1.0, 1.0, 2.0, 2.0])
+
+    def test_put_open_bucket_after_last_closed_one(self):
+        for open_timestamp in [310.0, 340.0]:
+            timestamps = array('d', [60.0, 120.0, 180.0, 240.0, 300.0, open_timestamp])
+            values = array('d', [1.0, 2.0, 3.0, 4.0, 5.0, 5.5])
+
+            grid = make_grid([timestamps], 60)
+            self.assertEqual(list(grid), [60.0, 120.0, 180.0, 240.0, 300.0, 360.0])
+            self.assertEqual(list(align_points(timestamps, values, grid, 60)), [1.0, 2.0, 3.0, 4.0, 5.0, 5.5])
+
+    def test_keep_series_covering_grid(self):
+        values = array('d', [1.0, 2.0, 3.0, 4.0, 5.0])
+
+        self.assertIs(align_points(self.grid, values, self.grid, 60), values)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
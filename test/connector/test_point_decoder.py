@@ -0,0 +1,58 @@
+import unittest
+from array import array
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.point_decoder import (decode_points, format_timestamps,
+                                                                               join_points)
+
+
+class TestPointDecoder(unittest.TestCase):
+
+    def test_decode_gauge_points(self):
+        points = [
+            {'interval': {'startTime': '2020-08-06T00:02:00Z', 'endTime': '2020-08-06T00:02:00Z'},
+             'value': {'doubleValue': 0.2}},
+            {'interval': {'startTime': '2020-08-06T00:01:00Z', 'endTime': '2020-08-06T00:01:00Z'},
+             'value': {'doubleValue': 0.1}}
+        ]
+
+        timestamps, values = decode_points(points, multiply=True)
+
+        self.assertEqual(format_timestamps(timestamps), ['2020-08-06T00:01:00.000Z', '2020-08-06T00:02:00.000Z'])
+        self.assertEqual(values.tolist(), [10.0, 20.0])
+
+    def test_decode_delta_points_with_fraction(self):
+        points = [
+            {'interval': {'startTime': '2020-08-06T00:00:00.500000Z', 'endTime': '2020-08-06T00:01:00.500000Z'},
+             'value': {'int64Value': '42'}}
+        ]
+
+        timestamps, values = decode_points(points)
+
+        self.assertEqual(format_timestamps(timestamps), ['2020-08-06T00:00:30.500Z'])
+        self.assertEqual(values.tolist(), [42.0])
+
+    def test_decode_empty_points(self):
+        timestamps, values = decode_points([])
+
+        self.assertEqual(len(timestamps), 0)
+        self.assertEqual(len(values), 0)
+
+    def test_join_points_of_pages(self):
+        newer = (array('d', [120.0, 180.0]), array('d', [2.0, 3.0]))
+        older = (array('d', [0.0, 60.0]), array('d', [0.0, 1.0]))
+        empty = (array('d'), array('d'))
+
+        for first, second in [(newer, older), (older, newer)]:
+            timestamps, values = join_points(first, second)
+            self.assertEqual(timestamps.tolist(), [0.0, 60.0, 120.0, 180.0])
+            self.assertEqual(values.tolist(), [0.0, 1.0, 2.0, 3.0])
+
+        timestamps, values = join_points((array('d', [0.0, 120.0]), array('d', [0.0, 2.0])),
+                                         (array('d', [60.0]), array('d', [1.0])))
+        self.assertEqual(values.tolist(), [0.0, 1.0, 2.0])
+        self.assertIs(join_points(empty, newer), newer)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,62 @@
+import unittest
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.query_planner import plan_time_series_queries
+
+
+def _make_metric_query(instance_ids, label_key='resource.labels.instance_id'):
+    return {
+        f'cloud-svc-{index}': {
+            'name': 'projects/project-1',
+            'resource_id': instance_id,
+            'filter': {
+                'metric_type': 'compute.googleapis.com/instance/cpu/utilization',
+                'labels': [{'key': label_key, 'value': instance_id}]
+            }
+        } for index, instance_id in enumerate(instance_ids)
+    }
+
+
+class TestQueryPlanner(unittest.TestCase):
+
+    def test_batch_resources_with_same_label_key(self):
+        units = plan_time_series_queries(_make_metric_query(['1', '2', '3']))
+
+        self.assertEqual(len(units), 1)
+        self.assertIn('resource.labels.instance_id = one_of("1","2","3")', units[0].filter)
+
+    def test_split_batch_by_max_batch_size(self):
+        units = plan_time_series_queries(_make_metric_query([str(i) for i in range(5)]), max_batch_size=2)
+
+        self.assertEqual([len(unit.cloud_service_ids) for unit in units], [2, 2, 1])
+
+    def test_split_batch_by_max_filter_length(self):
+        units = plan_time_series_queries(_make_metric_query([str(i) * 20 for i in range(1, 10)]),
+                                         max_filter_length=200)
+
+        self.assertGreater(len(units), 1)
+        for unit in units:
+            self.assertLessEqual(len(unit.filter), 200)
+
+    def test_keep_unbatchable_resource_as_single_request(self):
+        metric_query = _make_metric_query(['1', '2'], label_key='metadata.system_labels.name')
+        units = plan_time_series_queries(metric_query)
+
+        self.assertEqual(len(units), 2)
+
+    def test_demultiplex_time_series(self):
+        units = plan_time_series_queries(_make_metric_query(['1', '2', '1']))
+        time_series = [
+            {'resource': {'labels': {'instance_id': '1'}}, 'points': []},
+            {'resource': {'labels': {'instance_id': '2'}}, 'points': []}
+        ]
+
+        result = units[0].demultiplex(time_series)
+
+        self.assertEqual(result['cloud-svc-0'], [time_series[0]])
+        self.assertEqual(result['cloud-svc-1'], [time_series[1]])
+        self.assertEqual(result['cloud-svc-2'], [time_series[0]])
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
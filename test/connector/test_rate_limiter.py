@@ -0,0 +1,165 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.rate_limiter import (RateLimiter, RateLimiterPool,
+                                                                              get_error_message, get_status_code)
+
+
+class _FakeResponse(dict):
+
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+
+
+class _FakeHttpError(Exception):
+
+    def __init__(self, status, headers=None):
+        super().__init__(f'HTTP {status}')
+        self.resp = _FakeResponse(status, headers)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_retry_throttled_call_after_retry_after(self):
+        rate_limiter = RateLimiter(max_retries=3)
+        responses = [_FakeHttpError(429, {'retry-after': '0'}), _FakeHttpError(503, {'retry-after': '0'}), 'ok']
+
+        def _call():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        self.assertEqual(rate_limiter.call(_call), 'ok')
+
+        stats = rate_limiter.stats()
+        self.assertEqual(stats['calls'], 3)
+        self.assertEqual(stats['throttled'], 2)
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['failures'], 0)
+
+    def test_halve_concurrency_when_throttled(self):
+        rate_limiter = RateLimiter(max_concurrency=8, max_retries=0)
+
+        with self.assertRaises(_FakeHttpError):
+            rate_limiter.call(self._raise(_FakeHttpError(429, {'retry-after': '0'})))
+        self.assertEqual(rate_limiter.stats()['concurrency_limit'], 4)
+
+        rate_limiter.call(lambda: None)
+        self.assertGreater(rate_limiter.stats()['concurrency_limit'], 4)
+
+    def test_raise_other_errors_without_retry(self):
+        rate_limiter = RateLimiter()
+
+        with self.assertRaises(_FakeHttpError):
+            rate_limiter.call(self._raise(_FakeHttpError(403)))
+
+        stats = rate_limiter.stats()
+        self.assertEqual(stats['retries'], 0)
+        self.assertEqual(stats['concurrency_limit'], 10)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_give_up_after_max_retries(self):
+        rate_limiter = RateLimiter(max_retries=2)
+
+        with self.assertRaises(_FakeHttpError):
+            rate_limiter.call(self._raise(_FakeHttpError(429, {'retry-after': '0'})))
+
+        stats = rate_limiter.stats()
+        self.assertEqual(stats['calls'], 3)
+        self.assertEqual(stats['failures'], 1)
+        self.assertEqual(get_status_code(ValueError()), None)
+
+    def test_retry_throttled_coroutine(self):
+        rate_limiter = RateLimiter(max_retries=3)
+        responses = [_FakeHttpError(429, {'retry-after': '0'}), 'ok']
+
+        async def _call():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        self.assertEqual(asyncio.run(rate_limiter.call_async(_call)), 'ok')
+
+        stats = rate_limiter.stats()
+        self.assertEqual((stats['calls'], stats['retries'], stats['in_flight']), (2, 1, 0))
+
+        async def _fail():
+            raise _FakeHttpError(403)
+
+        with self.assertRaises(_FakeHttpError):
+            asyncio.run(rate_limiter.call_async(_fail))
+        self.assertEqual(rate_limiter.stats()['in_flight'], 0)
+
+    @staticmethod
+    def _raise(error):
+        def _call():
+            raise error
+        return _call
+
+    def test_keep_reason_of_http_error_without_uri(self):
+        content = json.dumps({'error': {'code': 403, 'message': 'Permission monitoring.timeSeries.list denied'}})
+        error = HttpError(httplib2.Response({'status': 403}), content.encode('utf-8'),
+                          uri='https://monitoring.googleapis.com/v3/projects/p/timeSeries?filter=' + 'x' * 2000)
+
+        self.assertEqual(get_error_message(error), 'Permission monitoring.timeSeries.list denied')
+        self.assertEqual(len(get_error_message(ValueError('x' * 2000))), 200)
+
+
+class TestRateLimiterPool(unittest.TestCase):
+
+    def test_configure_limiter_only_when_created(self):
+        pool = RateLimiterPool()
+
+        rate_limiter = pool.get('project-1', rate=10, max_concurrency=4)
+        with patch.object(RateLimiter, '__init__', side_effect=AssertionError('rebuilt')):
+            self.assertIs(pool.get('project-1', rate=50, max_concurrency=8), rate_limiter)
+
+        self.assertEqual((rate_limiter.rate, rate_limiter.max_concurrency), (10, 4))
+        self.assertEqual(pool.get_rate_limiter_stats()['project-1']['rate'], 10)
+
+    def test_drop_limiter_idle_for_ttl(self):
+        pool = RateLimiterPool(ttl=60)
+
+        with patch('time.monotonic', return_value=1000.0):
+            rate_limiter = pool.get('project-1')
+            pool.get('project-2')
+        with patch('time.monotonic', return_value=1059.0):
+            self.assertIs(pool.get('project-1'), rate_limiter)
+        with patch('time.monotonic', return_value=1060.0):
+            pool.get('project-3')
+
+        # project-2 was idle for 60s and is dropped when another project is used
+        self.assertEqual(list(pool.get_rate_limiter_stats().keys()), ['project-1', 'project-3'])
+        with patch('time.monotonic', return_value=1118.0):
+            self.assertIs(pool.get('project-1'), rate_limiter)
+        with patch('time.monotonic', return_value=1178.0):
+            self.assertIsNot(pool.get('project-1'), rate_limiter)
+
+        self.assertEqual(pool.stats(), {'size': 1, 'max_size': 1024, 'ttl': 60, 'evictions': 3})
+
+    def test_evict_least_recently_used(self):
+        pool = RateLimiterPool(max_size=2)
+        rate_limiters = {project: pool.get(project) for project in ['project-1', 'project-2']}
+
+        pool.get('project-1')
+        pool.get('project-3')
+
+        self.assertEqual(list(pool._entries.keys()), ['project-1', 'project-3'])
+        self.assertIs(pool.get('project-1'), rate_limiters['project-1'])
+        self.assertEqual(pool.stats()['evictions'], 1)
+
+        pool.clear()
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
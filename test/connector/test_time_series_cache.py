@@ -0,0 +1,165 @@
+import asyncio
+import time
+import unittest
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.point_decoder import format_epoch, to_epoch
+from spaceone.monitoring.connector.google_cloud_connector.time_series_cache import TimeSeriesCache
+
+PERIOD = 60
+KEY = ('credentials', 'projects/project-1', 'metric.type = "x"', 'ALIGN_MEAN', '60s', 'REDUCE_NONE')
+
+
+def _make_response(start, end, gauge=False):
+    """ One series with a point per bucket ending in (start, end], the last one ending at end
+
+    DELTA points span their bucket, GAUGE points are an instant (startTime == endTime).
+    """
+    points = []
+    bucket_end = end
+    while bucket_end > start:
+        interval = {'startTime': format_epoch(bucket_end if gauge else max(bucket_end - PERIOD, start)),
+                    'endTime': format_epoch(bucket_end)}
+        points.append({'interval': interval, 'value': {'doubleValue': float(bucket_end)}})
+        bucket_end = (bucket_end - 1) // PERIOD * PERIOD if bucket_end % PERIOD else bucket_end - PERIOD
+
+    return {
+        'unit': 'By',
+        'timeSeries': [{
+            'metric': {'type': 'compute.googleapis.com/instance/cpu/utilization', 'labels': {}},
+            'resource': {'type': 'gce_instance', 'labels': {'instance_id': '1'}},
+            'points': points
+        }]
+    }
+
+
+def _get_bucket_ends(response):
+    return sorted(to_epoch(point['interval']['endTime']) for point in response['timeSeries'][0]['points'])
+
+
+class TestTimeSeriesCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TimeSeriesCache(settle_seconds=300)
+        self.fetched = []
+        self.gauge = False
+        self.boundary = int(time.time() // PERIOD) * PERIOD - 86400
+
+    def _fetch_range(self, start, end):
+        self.fetched.append((start, end))
+        return _make_response(start, end, self.gauge)
+
+    def _fetch(self, start, end):
+        return self.cache.fetch(KEY, format_epoch(start), format_epoch(end), '60s', self._fetch_range)
+
+    def test_fetch_async_as_fetch(self):
+        start, end = self.boundary - 3600, self.boundary
+
+        async def _fetch_range(_start, _end):
+            return self._fetch_range(_start, _end)
+
+        async def _fetch_async(_start, _end):
+            return await self.cache.fetch_async(KEY, format_epoch(_start), format_epoch(_end), '60s', _fetch_range)
+
+        first = asyncio.run(_fetch_async(start, end))
+        response = asyncio.run(_fetch_async(start + 600, end + 600))
+
+        self.assertEqual(_get_bucket_ends(first), list(range(start + 60, end + 60, PERIOD)))
+        self.assertEqual(self.fetched, [(start, end), (end, end + 600)])
+        self.assertEqual(response, self._fetch(start + 600, end + 600))
+        self.assertEqual((self.cache.misses, self.cache.partial_hits, self.cache.hits), (1, 1, 1))
+
+    def test_serve_closed_buckets_from_cache(self):
+        start, end = self.boundary - 3600, self.boundary
+
+        first = self._fetch(start, end)
+        second = self._fetch(start, end)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.fetched, [(start, end)])
+        self.assertEqual(len(_get_bucket_ends(second)), 60)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+
+    def test_fetch_only_new_buckets_of_sliding_window(self):
+        start, end = self.boundary - 3600, self.boundary
+        self._fetch(start, end)
+
+        response = self._fetch(start + 600, end + 600)
+
+        self.assertEqual(self.fetched, [(start, end), (end, end + 600)])
+        self.assertEqual(_get_bucket_ends(response), list(range(start + 660, end + 660, PERIOD)))
+        self.assertEqual(self.cache.partial_hits, 1)
+
+    def test_always_fetch_open_bucket(self):
+        start, end = self.boundary - 3600, self.boundary + 20
+
+        for _ in range(2):
+            response = self._fetch(start, end)
+            self.assertEqual(_get_bucket_ends(response)[-2:], [self.boundary, self.boundary + PERIOD])
+
+        # The open bucket comes with the closed ones, then alone
+        self.assertEqual(self.fetched, [(start, end), (self.boundary, end)])
+        self.assertEqual(self.cache.stats()['points'], 60)
+
+        open_point = response['timeSeries'][0]['points'][0]
+        self.assertEqual(open_point['value']['doubleValue'], float(end))
+        self.assertEqual(open_point['interval'], {'startTime': format_epoch(self.boundary),
+                                                  'endTime': format_epoch(self.boundary + PERIOD)})
+
+    def test_move_gauge_open_point_to_next_bucket(self):
+        self.gauge = True
+        start, end = self.boundary - 3600, self.boundary + 20
+
+        response = self._fetch(start, end)
+
+        open_point = response['timeSeries'][0]['points'][0]
+        self.assertEqual(open_point['interval'], {'startTime': format_epoch(self.boundary + PERIOD),
+                                                  'endTime': format_epoch(self.boundary + PERIOD)})
+        self.assertEqual(_get_bucket_ends(response)[-2:], [self.boundary, self.boundary + PERIOD])
+
+    def test_fetch_tail_and_open_bucket_in_one_request(self):
+        start, end = self.boundary - 3600, self.boundary + 20
+        self._fetch(start, end)
+
+        response = self._fetch(start + 600, end + 600)
+
+        self.assertEqual(self.fetched, [(start, end), (self.boundary, end + 600)])
+        self.assertEqual(_get_bucket_ends(response), list(range(start + 660, self.boundary + 720, PERIOD)))
+
+    def test_do_not_cache_open_buckets(self):
+        now = int(time.time())
+        end = now // PERIOD * PERIOD
+        self._fetch(end - 3600, end)
+        self._fetch(end - 3600, end)
+
+        # Buckets of the last settle_seconds are fetched again
+        self.assertEqual(len(self.fetched), 2)
+        self.assertLessEqual(self.fetched[1][0], end - 300 + PERIOD)
+        self.assertEqual(self.fetched[1][1], end)
+
+    def test_pass_through_window_shorter_than_bucket(self):
+        start = self.boundary + 10
+        self._fetch(start, start + 30)
+
+        self.assertEqual(self.fetched, [(start, start + 30)])
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_evict_least_recently_used(self):
+        self.cache.configure(max_entries=2)
+        start, end = self.boundary - 3600, self.boundary
+
+        for project in ['project-1', 'project-2', 'project-3']:
+            self.cache.fetch(('credentials', project), format_epoch(start), format_epoch(end), '60s',
+                             self._fetch_range)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['points'], 120)
+
+        self.cache.configure(max_points=100)
+        self._fetch(start, end)
+        self.assertEqual(self.cache.stats()['entries'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
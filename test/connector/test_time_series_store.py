@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+import unittest
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.point_decoder import format_epoch
+from spaceone.monitoring.connector.google_cloud_connector.time_series_cache import TimeSeriesCache
+from spaceone.monitoring.connector.google_cloud_connector.time_series_store import TimeSeriesStore
+
+PERIOD = 60
+
+
+def _make_response(start, end, value_type='doubleValue'):
+    """ One series with a point per bucket ending in (start, end]
+    """
+    points = []
+    for bucket_end in range(end, start, -PERIOD):
+        value = {'doubleValue': bucket_end / 1000, 'int64Value': str(bucket_end), 'boolValue': True}[value_type]
+        interval = {'startTime': format_epoch(bucket_end - PERIOD), 'endTime': format_epoch(bucket_end)}
+        points.append({'interval': interval, 'value': {value_type: value}})
+
+    return {
+        'unit': 'By',
+        'timeSeries': [{
+            'metric': {'type': 'compute.googleapis.com/instance/disk/read_bytes_count', 'labels': {}},
+            'resource': {'type': 'gce_instance', 'labels': {'instance_id': '1'}},
+            'points': points
+        }]
+    }
+
+
+class TestTimeSeriesStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'time_series.db')
+        self.now = int(time.time() // PERIOD) * PERIOD
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_back_what_was_written(self):
+        store = TimeSeriesStore(self.path, compact_interval=0)
+        start = self.now - 3600
+
+        for value_type in ['doubleValue', 'int64Value', 'boolValue']:
+            response = _make_response(start, start + 600, value_type)
+            store.write(value_type, 'projects/project-1', start, start + 600, response)
+            self.assertEqual(store.read(value_type, start, start + 600), response)
+
+        store.write('doubleValue', 'projects/project-1', start + 600, start + 900,
+                    _make_response(start + 600, start + 900))
+        self.assertEqual(store.get_range('doubleValue'), (start, start + 900))
+        self.assertEqual(store.stats()['points'], 35)
+        store.close()
+
+    def test_serve_closed_buckets_after_restart(self):
+        start, end = self.now - 86400, self.now
+        fetched = []
+
+        def _fetch_range(_start, _end):
+            fetched.append((_start, _end))
+            return _make_response(int(_start), int(_end))
+
+        cache = TimeSeriesCache(settle_seconds=600)
+        cache.configure(store={'enabled': True, 'path': self.path, 'compact_interval': 0})
+        expected = cache.fetch('query-1', format_epoch(start), format_epoch(end), '60s', _fetch_range)
+        cache.configure(store={'enabled': False})
+
+        restarted_cache = TimeSeriesCache(settle_seconds=600)
+        restarted_cache.configure(store={'enabled': True, 'path': self.path, 'compact_interval': 0})
+        response = restarted_cache.fetch('query-1', format_epoch(start), format_epoch(end), '60s', _fetch_range)
+
+        self.assertEqual(fetched, [(start, end), (end - 600, end)])
+        self.assertEqual(response['timeSeries'][0]['points'], expected['timeSeries'][0]['points'])
+        self.assertEqual(restarted_cache.stats()['store_hits'], 1)
+        restarted_cache.configure(store={'enabled': False})
+
+    def test_evict_least_recently_read_queries(self):
+        store = TimeSeriesStore(self.path, max_points=15, compact_interval=0)
+        start = self.now - 3600
+
+        store.write('query-1', None, start, start + 600, _make_response(start, start + 600))
+        store.write('query-2', None, start, start + 600, _make_response(start, start + 600))
+
+        self.assertIsNone(store.get_range('query-1'))
+        self.assertEqual(store.get_range('query-2'), (start, start + 600))
+        store.close()
+
+    def test_compact_old_buckets(self):
+        store = TimeSeriesStore(self.path, max_age=1800, compact_interval=0)
+        start = self.now - 3600
+
+        store.write('query-1', None, start, self.now, _make_response(start, self.now))
+        store.compact()
+
+        lo, hi = store.get_range('query-1')
+        self.assertGreaterEqual(lo, self.now - 1800 - PERIOD)
+        self.assertEqual(hi, self.now)
+        self.assertEqual(store.stats()['points'], len(store.read('query-1', lo, hi)['timeSeries'][0]['points']))
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,59 @@
+import unittest
+from array import array
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.core.pygrpc.message_type import change_list_value_type, change_struct_type
+from spaceone.monitoring.info.metric_info import MetricDataInfo
+from spaceone.monitoring.info.struct_encoder import make_list_value, make_struct
+from spaceone.monitoring.model.metric_frame import MetricFrame
+
+
+class TestStructEncoder(unittest.TestCase):
+
+    def test_make_struct_as_change_struct_type(self):
+        values = {
+            'cloud-svc-1': [0.0, -1.5, 3, 1e300],
+            'cloud-svc-2': [],
+            'nested': {'text': '한글', 'flag': True, 'empty': None, 'mixed': [1, 'a', None, False, {'k': [2.5]}]}
+        }
+
+        self.assertEqual(make_struct(values), change_struct_type(values))
+
+    def test_make_list_value_from_array(self):
+        self.assertEqual(make_list_value(array('d', [1.0, 2.5])), change_list_value_type([1.0, 2.5]))
+
+    def test_encode_nan_as_null_value(self):
+        list_value = make_list_value(array('d', [1.0, float('nan'), 2.0, float('nan')]))
+
+        self.assertEqual([value.WhichOneof('kind') for value in list_value.values],
+                         ['number_value', 'null_value', 'number_value', 'null_value'])
+        self.assertEqual(list_value, change_list_value_type([1.0, None, 2.0, None]))
+
+    def test_keep_bool_as_bool_value(self):
+        list_value = make_list_value([True, 1])
+
+        self.assertEqual(list_value.values[0].WhichOneof('kind'), 'bool_value')
+        self.assertEqual(list_value.values[1].WhichOneof('kind'), 'number_value')
+
+    def test_metric_data_info(self):
+        metric_data = {
+            'labels': ['2020-08-06T00:01:00.000Z', '2020-08-06T00:02:00.000Z'],
+            'values': {'cloud-svc-1': [10.0, 20.0]}
+        }
+
+        info = MetricDataInfo(metric_data)
+
+        self.assertEqual(info.labels, change_list_value_type(metric_data['labels']))
+        self.assertEqual(info.values, change_struct_type(metric_data['values']))
+
+    def test_metric_data_info_from_frame(self):
+        metric_data_frame = MetricFrame()
+        metric_data_frame.add('cloud-svc-1', array('d', [1596672060.0, 1596672120.0]), array('d', [10.0, 20.0]))
+        metric_data_frame.add_series('cloud-svc-2', 'metric.labels.device_name=sda', array('d', [1596672060.0]),
+                                     array('d', [1.5]))
+
+        self.assertEqual(MetricDataInfo(metric_data_frame), MetricDataInfo(metric_data_frame.to_dict()))
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
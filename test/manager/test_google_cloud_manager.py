@@ -1,10 +1,12 @@
+import asyncio
 import unittest
-from datetime import datetime, timedelta
-from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
 
 from spaceone.core.unittest.result import print_data
 from spaceone.core.unittest.runner import RichTestRunner
 from spaceone.core import config
+from spaceone.monitoring import instrumentation
 from spaceone.monitoring.error import *
 from spaceone.monitoring.connector.google_cloud_connector import GoogleCloudConnector
 from spaceone.monitoring.manager.google_cloud_manager import GoogleCloudManager
@@ -15,6 +17,7 @@ class TestMetricManager(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         config.init_conf(package='spaceone.monitoring')
+        config.set_service_config()
         super().setUpClass()
 
     @classmethod
@@ -33,6 +36,22 @@ class TestMetricManager(unittest.TestCase):
         with self.assertRaises(ERROR_NOT_SUPPORT_STAT):
             google_cloud_mgr._convert_stat('AVERAGE')
 
+    @patch.object(GoogleCloudConnector, '__init__', return_value=None)
+    def test_convert_aggregation(self, *args):
+        google_cloud_mgr = GoogleCloudManager()
+        aggregation = google_cloud_mgr._convert_aggregation({'reducer': 'PERCENTILE_99',
+                                                             'group_by': ['resource.labels.zone']})
+        print_data(aggregation, 'test_convert_aggregation')
+
+        self.assertEqual(aggregation, {'reducer': 'REDUCE_PERCENTILE_99', 'group_by': ['resource.labels.zone']})
+        self.assertIsNone(google_cloud_mgr._convert_aggregation(None))
+
+    @patch.object(GoogleCloudConnector, '__init__', return_value=None)
+    def test_convert_aggregation_with_invalid_reducer(self, *args):
+        google_cloud_mgr = GoogleCloudManager()
+        with self.assertRaises(ERROR_NOT_SUPPORT_REDUCER):
+            google_cloud_mgr._convert_aggregation({'reducer': 'AVERAGE'})
+
     @patch.object(GoogleCloudConnector, '__init__', return_value=None)
     def test_make_period_from_time_range(self, *args):
         google_cloud_mgr = GoogleCloudManager()
@@ -43,6 +62,103 @@ class TestMetricManager(unittest.TestCase):
         period = google_cloud_mgr._make_period_from_time_range(start, end)
         print_data(period, 'test_make_period_from_time_range')
 
+        self.assertEqual(period, '1800s')
+
+    @patch.object(GoogleCloudConnector, '__init__', return_value=None)
+    def test_make_period_from_time_range_boundaries(self, *args):
+        google_cloud_mgr = GoogleCloudManager()
+        start = datetime(2020, 8, 6, tzinfo=timezone.utc)
+
+        cases = [
+            (timedelta(0), 60, '60s'),
+            (timedelta(hours=1), 60, '60s'),
+            (timedelta(hours=1, seconds=1), 60, '120s'),
+            (timedelta(hours=24), 1440, '60s'),
+            (timedelta(days=21), 60, '43200s'),
+            (timedelta(days=60), 60, '86400s'),
+            (timedelta(days=365), 60, '604800s'),
+            (timedelta(days=365), 1, '31536000s'),
+        ]
+        for time_delta, max_points, expected in cases:
+            period = google_cloud_mgr._make_period_from_time_range(start, start + time_delta, max_points)
+            self.assertEqual(period, expected, f'{time_delta} / {max_points}')
+            self.assertLessEqual(time_delta.total_seconds() / int(period[:-1]), max_points)
+
+    @patch.object(GoogleCloudConnector, '__init__', return_value=None)
+    def test_get_max_points(self, *args):
+        google_cloud_mgr = GoogleCloudManager()
+
+        self.assertEqual(google_cloud_mgr._get_max_points({'max_points': 300}), 300)
+        with self.assertRaises(ERROR_INVALID_PARAMETER):
+            google_cloud_mgr._get_max_points({'max_points': -1})
+
+    @patch.object(GoogleCloudConnector, '__init__', return_value=None)
+    def test_convert_mql(self, *args):
+        google_cloud_mgr = GoogleCloudManager()
+
+        self.assertIsNone(google_cloud_mgr._convert_mql({}))
+        self.assertEqual(google_cloud_mgr._convert_mql({'query_backend': 'mql'}),
+                         {'query': None, 'resource_type': None})
+        self.assertEqual(google_cloud_mgr._convert_mql({'mql': {'resource_type': 'gce_instance'}}),
+                         {'query': None, 'resource_type': 'gce_instance'})
+
+        with self.assertRaises(ERROR_INVALID_PARAMETER):
+            google_cloud_mgr._convert_mql({'query_backend': 'promql'})
+        with self.assertRaises(ERROR_INVALID_PARAMETER):
+            google_cloud_mgr._convert_mql({'query_backend': 'mql'}, {'reducer': 'REDUCE_MEAN', 'group_by': []})
+
+    @patch.object(GoogleCloudConnector, '__init__', return_value=None)
+    def test_get_fill(self, *args):
+        google_cloud_mgr = GoogleCloudManager()
+
+        self.assertEqual(google_cloud_mgr._get_fill({'fill': 'previous'}), 'previous')
+        with self.assertRaises(ERROR_INVALID_PARAMETER):
+            google_cloud_mgr._get_fill({'fill': 'linear'})
+
+    @patch.object(GoogleCloudConnector, '__init__', return_value=None)
+    def test_ignore_profile_option_unless_enabled(self, *args):
+        google_cloud_mgr = GoogleCloudManager()
+        instrumentation_conf = config.get_global('INSTRUMENTATION')
+
+        with patch.object(GoogleCloudManager, '_get_metric_data', return_value={}), \
+                patch('spaceone.monitoring.instrumentation.profile', wraps=instrumentation.profile) as profile:
+            try:
+                for profile_enabled in [False, True]:
+                    config.set_global(INSTRUMENTATION=dict(instrumentation_conf, profile_enabled=profile_enabled))
+                    google_cloud_mgr.get_metric_data({}, {'profile': True}, {}, {}, 'metric', None, None, 60, None)
+            finally:
+                config.set_global(INSTRUMENTATION=instrumentation_conf)
+
+        self.assertFalse(instrumentation_conf['profile_enabled'])
+        self.assertEqual([call.args[1] for call in profile.call_args_list], [False, True])
+
+    @patch.object(GoogleCloudConnector, '__init__', return_value=None)
+    def test_get_metric_data_async_as_sync(self, *args):
+        google_cloud_mgr = GoogleCloudManager()
+        start = datetime(2020, 8, 6, tzinfo=timezone.utc)
+        options = {'aggregation': {'reducer': 'MEAN'}, 'fill': 'zero'}
+        single_flight_conf = config.get_global('SINGLE_FLIGHT')
+
+        with patch.object(GoogleCloudConnector, 'set_connect'), \
+                patch.object(GoogleCloudConnector, 'get_metric_data', return_value={}) as get_metric_data, \
+                patch.object(GoogleCloudConnector, 'set_connect_async', new_callable=AsyncMock), \
+                patch.object(GoogleCloudConnector, 'get_metric_data_async', new_callable=AsyncMock,
+                             return_value={}) as get_metric_data_async:
+            try:
+                for enabled in [True, False]:
+                    config.set_global(SINGLE_FLIGHT=dict(single_flight_conf, enabled=enabled))
+                    get_data_args = ({}, options, {}, {'cloud-svc-1': {}}, 'metric', start,
+                                     start + timedelta(hours=2), None, 'MAX')
+                    google_cloud_mgr.get_metric_data(*get_data_args)
+                    asyncio.run(google_cloud_mgr.get_metric_data_async(*get_data_args))
+            finally:
+                config.set_global(SINGLE_FLIGHT=single_flight_conf)
+
+        self.assertEqual(get_metric_data_async.call_args_list, get_metric_data.call_args_list)
+        self.assertEqual(get_metric_data_async.call_args.args[4:], ('120s', 'ALIGN_MAX'))
+        self.assertEqual(get_metric_data_async.call_args.kwargs['aggregation'], {'reducer': 'REDUCE_MEAN',
+                                                                                 'group_by': []})
+
 
 if __name__ == "__main__":
     unittest.main(testRunner=RichTestRunner)
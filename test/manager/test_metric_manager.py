@@ -0,0 +1,97 @@
+import unittest
+
+from schematics.exceptions import DataError
+
+from spaceone.core import config
+from spaceone.core.error import ERROR_INVALID_PARAMETER_TYPE, ERROR_REQUIRED_PARAMETER
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.manager.metric_manager import MetricManager
+
+
+def _make_metrics_info(count=3):
+    return {
+        'metrics': [{
+            'key': f'compute.googleapis.com/instance/metric_{index}',
+            'name': f'Metric {index}',
+            'unit': {'x': 'Timestamp', 'y': 'Percentage'},
+            'metric_query': {
+                'name': 'projects/project-1',
+                'resource_id': 'instance-1',
+                'filter': {'metric_type': f'compute.googleapis.com/instance/metric_{index}', 'labels': None}
+            }
+        } for index in range(count)]
+    }
+
+
+class TestMetricManager(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        config.init_conf(package='spaceone.monitoring')
+        config.set_service_config()
+        super().setUpClass()
+
+    def tearDown(self):
+        config.set_global(RESPONSE_MODEL={'strict': False})
+
+    def _make_response(self, metrics_info, strict):
+        config.set_global(RESPONSE_MODEL={'strict': strict})
+        return MetricManager.make_metrics_response(metrics_info)
+
+    def test_same_response_as_strict_mode(self):
+        metrics_info = _make_metrics_info()
+        metrics_info['metrics'][0]['group'] = 'CPU'
+
+        self.assertEqual(self._make_response(metrics_info, False), self._make_response(metrics_info, True))
+
+    def test_reject_missing_required_field(self):
+        metrics_info = _make_metrics_info()
+        del metrics_info['metrics'][1]['unit']
+
+        with self.assertRaises(ERROR_REQUIRED_PARAMETER):
+            self._make_response(metrics_info, False)
+
+    def test_reject_invalid_type(self):
+        metrics_info = _make_metrics_info()
+        metrics_info['metrics'][2]['unit'] = 'Percentage'
+
+        with self.assertRaises(ERROR_INVALID_PARAMETER_TYPE):
+            self._make_response(metrics_info, False)
+
+    def test_reject_like_strict_mode(self):
+        invalid_metrics = {
+            'missing unit': {'unit': None},
+            'missing unit value': {'unit': {'x': None, 'y': 'Percentage'}},
+            'missing name': {'name': None},
+            'unit not a dict': {'unit': 'Percentage'}
+        }
+
+        for case, fields in invalid_metrics.items():
+            metrics_info = _make_metrics_info(1)
+            metrics_info['metrics'][0].update(fields)
+
+            with self.subTest(case=case):
+                with self.assertRaises(DataError):
+                    self._make_response(metrics_info, True)
+                with self.assertRaises((ERROR_REQUIRED_PARAMETER, ERROR_INVALID_PARAMETER_TYPE)):
+                    self._make_response(metrics_info, False)
+
+    def test_reject_missing_unit_value(self):
+        metrics_info = _make_metrics_info(1)
+        metrics_info['metrics'][0]['unit'] = {'x': 'Timestamp', 'y': None}
+
+        with self.assertRaises(ERROR_REQUIRED_PARAMETER):
+            self._make_response(metrics_info, False)
+
+    def test_pass_partial_errors_through(self):
+        metrics_info = _make_metrics_info(1)
+        metrics_info['errors'] = [{'name': 'projects/project-2', 'status': 403, 'message': 'permission denied'}]
+
+        for strict in [False, True]:
+            response = self._make_response(metrics_info, strict)
+            self.assertEqual(response['errors'], metrics_info['errors'])
+            self.assertEqual(len(response['metrics']), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
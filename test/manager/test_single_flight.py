@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.manager.google_cloud_manager import _SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def _run_followers(self, flight, key, func, count, timeout=None):
+        results = [None] * count
+        errors = [None] * count
+
+        def _follow(index):
+            try:
+                results[index] = flight.do(key, func, timeout)
+            except Exception as e:
+                errors[index] = e
+
+        threads = [threading.Thread(target=_follow, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def _wait_followers(self, flight, count):
+        while flight.followers < count:
+            time.sleep(0.001)
+
+    def test_share_result_of_leader(self):
+        flight = _SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def _func():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'labels': []}
+
+        leader, leader_results, _ = self._run_followers(flight, 'key', _func, 1)
+        started.wait(5)
+        followers, results, errors = self._run_followers(flight, 'key', _func, 4)
+        self._wait_followers(flight, 4)
+        release.set()
+
+        for thread in leader + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(errors, [None] * 4)
+        for result in results:
+            self.assertIs(result, leader_results[0])
+        self.assertEqual(flight.stats(), {'in_flight': 0, 'leaders': 1, 'followers': 4, 'timeouts': 0,
+                                          'coalescing_ratio': 0.8})
+
+    def test_propagate_error_of_leader(self):
+        flight = _SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        error = ValueError('quota exceeded')
+
+        def _func():
+            started.set()
+            release.wait(5)
+            raise error
+
+        leader, _, leader_errors = self._run_followers(flight, 'key', _func, 1)
+        started.wait(5)
+        followers, results, errors = self._run_followers(flight, 'key', _func, 3)
+        self._wait_followers(flight, 3)
+        release.set()
+
+        for thread in leader + followers:
+            thread.join(5)
+
+        self.assertIs(leader_errors[0], error)
+        self.assertEqual(errors, [error] * 3)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+        # The failed call is not kept, the next caller runs the function again
+        self.assertEqual(flight.do('key', lambda: 'retried'), 'retried')
+
+    def test_isolate_keys(self):
+        flight = _SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def _func():
+            started.set()
+            release.wait(5)
+            return 'a'
+
+        leader, results, _ = self._run_followers(flight, 'key-a', _func, 1)
+        started.wait(5)
+
+        # Not blocked by the call of key-a in flight
+        self.assertEqual(flight.do('key-b', lambda: 'b'), 'b')
+        release.set()
+        leader[0].join(5)
+
+        self.assertEqual(results, ['a'])
+        self.assertEqual(flight.leaders, 2)
+        self.assertEqual(flight.followers, 0)
+
+    def test_call_directly_after_timeout(self):
+        flight = _SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def _stuck():
+            started.set()
+            release.wait(5)
+            return 'leader'
+
+        leader, results, _ = self._run_followers(flight, 'key', _stuck, 1)
+        started.wait(5)
+
+        self.assertEqual(flight.do('key', lambda: 'direct', timeout=0.05), 'direct')
+        self.assertEqual(flight.timeouts, 1)
+
+        release.set()
+        leader[0].join(5)
+        self.assertEqual(results, ['leader'])
+
+
+class TestSingleFlightAsync(unittest.TestCase):
+
+    def test_share_result_of_leader(self):
+        flight = _SingleFlight()
+        calls = []
+
+        async def _func():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'labels': []}
+
+        async def _run():
+            return await asyncio.gather(*[flight.do_async('key', _func) for _ in range(5)])
+
+        results = asyncio.run(_run())
+
+        self.assertEqual(len(calls), 1)
+        for result in results:
+            self.assertIs(result, results[0])
+        self.assertEqual(flight.stats(), {'in_flight': 0, 'leaders': 1, 'followers': 4, 'timeouts': 0,
+                                          'coalescing_ratio': 0.8})
+
+    def test_propagate_error_of_leader(self):
+        flight = _SingleFlight()
+        error = ValueError('quota exceeded')
+
+        async def _fail():
+            await asyncio.sleep(0.05)
+            raise error
+
+        async def _run():
+            return await asyncio.gather(*[flight.do_async('key', _fail) for _ in range(3)], return_exceptions=True)
+
+        self.assertEqual(asyncio.run(_run()), [error] * 3)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+    def test_call_directly_after_timeout_or_cancelled_leader(self):
+        flight = _SingleFlight()
+
+        async def _stuck():
+            await asyncio.sleep(5)
+            return 'leader'
+
+        async def _direct():
+            return 'direct'
+
+        async def _run():
+            leader = asyncio.create_task(flight.do_async('key', _stuck))
+            await asyncio.sleep(0)
+            timed_out = await flight.do_async('key', _direct, timeout=0.05)
+
+            follower = asyncio.create_task(flight.do_async('key', _direct))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return timed_out, await follower
+
+        self.assertEqual(asyncio.run(_run()), ('direct', 'direct'))
+        self.assertEqual(flight.timeouts, 1)
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
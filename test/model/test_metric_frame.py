@@ -0,0 +1,62 @@
+import sys
+import unittest
+from array import array
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring.connector.google_cloud_connector.point_decoder import format_epoch
+from spaceone.monitoring.model.metric_frame import MetricFrame, format_epoch_ms
+
+
+class TestMetricFrame(unittest.TestCase):
+
+    def test_share_timestamps_of_first_column(self):
+        metric_data_frame = MetricFrame()
+        metric_data_frame.add('cloud-svc-1', array('d'), array('d'))
+        metric_data_frame.add('cloud-svc-2', array('d', [1596672060.0, 1596672090.5]), array('d', [1.0, 2.0]))
+        metric_data_frame.add('cloud-svc-3', array('d', [1596672000.0]), array('d', [3.0]))
+
+        self.assertEqual(list(metric_data_frame.timestamps), [1596672060000, 1596672090500])
+        self.assertEqual(metric_data_frame.to_dict(), {
+            'labels': ['2020-08-06T00:01:00.000Z', '2020-08-06T00:01:30.500Z'],
+            'values': {'cloud-svc-1': [], 'cloud-svc-2': [1.0, 2.0], 'cloud-svc-3': [3.0]}
+        })
+
+    def test_keep_series_and_errors(self):
+        metric_data_frame = MetricFrame(errors=[{'cloud_service_id': 'cloud-svc-2'}])
+        metric_data_frame.add_series('cloud-svc-1', 'metric.labels.device_name=sda', array('d', [0.0]),
+                                     array('d', [1.0]))
+        metric_data_frame.add_series('cloud-svc-1', 'metric.labels.device_name=sdb', array('d', [0.0]),
+                                     array('d', [2.0]))
+
+        self.assertEqual(metric_data_frame.to_dict(), {
+            'labels': ['1970-01-01T00:00:00.000Z'],
+            'values': {'cloud-svc-1': {'metric.labels.device_name=sda': [1.0],
+                                       'metric.labels.device_name=sdb': [2.0]}},
+            'errors': [{'cloud_service_id': 'cloud-svc-2'}]
+        })
+
+    def test_format_labels_as_point_decoder(self):
+        metric_data_frame = MetricFrame()
+        metric_data_frame.add('cloud-svc-1', array('d', [1596672090.5, 1596672090.999]), array('d', [1.0, 2.0]))
+        format_epoch_ms.cache_clear()
+
+        self.assertEqual(metric_data_frame.labels, [format_epoch(1596672090.5), format_epoch(1596672090.999)])
+        self.assertEqual(metric_data_frame.labels, ['2020-08-06T00:01:30.500Z', '2020-08-06T00:01:30.999Z'])
+        self.assertEqual(format_epoch_ms.cache_info().currsize, 2)
+
+    def test_smaller_than_lists(self):
+        timestamps = array('d', [1596672000.0 + index * 60 for index in range(1440)])
+        metric_data_frame = MetricFrame()
+        for index in range(10):
+            metric_data_frame.add(f'cloud-svc-{index}', timestamps, array('d', [float(index)] * 1440))
+
+        metric_data = metric_data_frame.to_dict()
+        list_bytes = sum(sys.getsizeof(label) for label in metric_data['labels']) + sum(
+            sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+            for values in metric_data['values'].values())
+
+        self.assertLess(metric_data_frame.nbytes * 3, list_bytes)
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,69 @@
+import contextvars
+import logging
+import unittest
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from spaceone.core.unittest.runner import RichTestRunner
+from spaceone.monitoring import instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def test_collect_spans_of_worker_threads_in_trace(self):
+        def _work():
+            with instrumentation.span('api_call', method='timeSeries.list'):
+                pass
+
+        with instrumentation.trace('get_data') as spans:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, _work) for _ in range(3)]
+                [future.result() for future in futures]
+
+            with self.assertRaises(ValueError):
+                with instrumentation.span('decode_points'):
+                    raise ValueError()
+
+        self.assertEqual([stage for stage, _, _ in spans], ['api_call'] * 3 + ['decode_points', 'get_data'])
+        self.assertTrue(spans[3][2])
+
+    def test_render_openmetrics_text(self):
+        instrumentation.inc('api_calls', method='timeSeries.list', status=200)
+        instrumentation.inc('api_calls', method='timeSeries.list', status=200)
+        instrumentation.observe('stage_duration_seconds', 0.003, stage='api_call')
+        instrumentation.observe('stage_duration_seconds', 2.0, stage='api_call')
+        instrumentation.register_collector('fake_limiter', lambda: {'project-1': {'in_flight': 3, 'name': 'x'}},
+                                           label='project')
+
+        lines = instrumentation.render_metrics().splitlines()
+
+        self.assertIn('# TYPE plugin_api_calls counter', lines)
+        self.assertIn('plugin_api_calls_total{method="timeSeries.list",status="200"} 2', lines)
+        self.assertIn('plugin_stage_duration_seconds_bucket{stage="api_call",le="0.005"} 1', lines)
+        self.assertIn('plugin_stage_duration_seconds_bucket{stage="api_call",le="+Inf"} 2', lines)
+        self.assertIn('plugin_stage_duration_seconds_count{stage="api_call"} 2', lines)
+        self.assertIn('plugin_fake_limiter_in_flight{project="project-1"} 3', lines)
+        self.assertFalse(any(line.startswith('plugin_fake_limiter_name') for line in lines))
+        self.assertEqual(lines[-1], '# EOF')
+
+    def test_serve_metrics_over_http(self):
+        instrumentation.inc('points', 10)
+        server = instrumentation.start_metrics_server(0, host='127.0.0.1')
+
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+            self.assertTrue(response.headers['Content-Type'].startswith('application/openmetrics-text'))
+            self.assertIn('plugin_points_total 10', response.read().decode('utf-8'))
+
+    def test_log_profile(self):
+        with self.assertLogs('spaceone.monitoring.instrumentation', level=logging.INFO) as logs:
+            with instrumentation.profile('get_data'):
+                sorted(range(1000), reverse=True)
+
+        self.assertIn('cumulative', logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=RichTestRunner)